@@ -102,8 +102,14 @@ from mvpa2._random import _random_seed, seed, get_random_seed
 # Testing
 #
 
-# import the main unittest interface
-from mvpa2.tests import run as test
+def test(*args, **kwargs):
+    """Runs the full or a subset of the PyMVPA unittest suite.
+
+    Thin wrapper around :func:`mvpa2.tests.run`, which gets imported
+    only when needed, since importing the tests is expensive.
+    """
+    from mvpa2.tests import run
+    return run(*args, **kwargs)
 
 #
 # Externals-dependent tune ups
@@ -123,15 +129,17 @@ if cfg.getboolean('warnings', 'suppress', default=False):
     # NumPy
     np.seterr(**dict([(x, 'ignore') for x in np.geterr()]))
 
-if externals.exists('scipy'):
-    externals._suppress_scipy_warnings()
+# scipy warnings get suppressed upon the first check for scipy, so
+# scipy is not imported here unless needed
 
 # And check if we aren't under IPython so we could pacify completion
 # a bit
 externals.exists('running ipython env', force=True, raise_=False)
 # Check for matplotlib so matplotlib backend becomes set according to
-# our configuration
-externals.exists('matplotlib', force=True, raise_=False)
+# our configuration.  Without a configured backend there is nothing to
+# tune, so the (expensive) import is left until matplotlib gets used
+if cfg.get('matplotlib', 'backend', default=None):
+    externals.exists('matplotlib', force=True, raise_=False)
 
 #
 # Hooks
@@ -12,6 +12,7 @@ TODOs:
 ======
 
  * major optimization. Now code is sloppy and slow -- plenty of checks etc
+   (use label_points/label_voxels to query many coordinates at once)
 
 Module Organization
 ===================
@@ -167,6 +168,27 @@ class XMLBasedAtlas(BaseAtlas):
         return c
 
 
+    def _check_range_many(self, c):
+        """Check and adjust many voxel coordinates at once
+
+        Returns
+        -------
+        ijk : array of int, shape (N, 3)
+          Voxel coordinates, with those outside the extent reset to (0,0,0)
+        inside : array of bool
+          Which of the coordinates were within the extent
+        """
+        ijk = np.array(c, dtype=int).reshape((-1, 3))
+        inside = np.all((ijk >= 0) & (ijk < self.extent), axis=1)
+        if not np.all(inside):
+            outside = np.logical_not(inside)
+            warning("%d coordinates (e.g. %r) are not within the extent %r."
+                    " Reseting them to (0,0,0)"
+                    % (np.sum(outside), tuple(ijk[outside][0]), self.extent))
+            ijk[outside] = 0
+        return ijk, inside
+
+
     @staticmethod
     def _check_version(version):
         """To be overriden in the derived classes. By default anything is good"""
@@ -267,6 +289,53 @@ class XMLBasedAtlas(BaseAtlas):
         return result
 
 
+    def label_points(self, coords, levels=None):
+        """Return labels for many spatial points at once
+
+        All points are transformed into the voxel space at once, and
+        labels are gathered by `label_voxels`.
+
+        Parameters
+        ----------
+        coords : sequence or array, shape (N, 3)
+          Coordinates of the points (xyz)
+        levels : None or list of int
+          At what levels to return the results
+
+        Returns
+        -------
+        list with a result for each point, as `label_point` would return
+        """
+        if not len(coords):
+            return []
+
+        c = self.spaceT.transform_many(coords).tolist()
+
+        results = self.label_voxels(c, levels)
+        for result, coord, c_ in zip(results, coords, c):
+            result['coord_queried'] = coord
+            result['voxel_atlas'] = c_
+        return results
+
+
+    def label_voxels(self, c, levels=None):
+        """Return labels for many voxels at once
+
+        Parameters
+        ----------
+        c : sequence or array, shape (N, 3)
+          Voxel coordinates
+        levels : None or list of int
+          At what levels to return the results
+
+        Returns
+        -------
+        list with a result for each voxel, as `label_voxel` would return
+        """
+        # derived classes provide vectorized versions
+        return [self.label_voxel(c_, levels) for c_ in c]
+
+
     def levels_listing(self):
         lkeys = range(self.nlevels)
         return '\n'.join(['%d: ' % k + str(self._levels[k])
@@ -769,6 +838,37 @@ class LabelsAtlas(PyMVPAAtlas):
         result['labels'] = resultLevels
         return result
 
+    def label_voxels(self, c, levels=None):
+        """
+        Return labels for many voxels at specified levels specified by index
+        """
+        levels = self._get_selected_levels(levels=levels)
+
+        levels_ = []
+        for level in levels:
+            if level in self._levels:
+                levels_.append(self._levels[level])
+            else:
+                raise IndexError(
+                    "Unknown index or description for level %d" % level)
+
+        if not len(c):
+            return []
+
+        ijk, _ = self._check_range_many(c)
+
+        # label indices for all levels and voxels at once
+        volumes = np.array([level_.index for level_ in levels_])[:, None]
+        resultIndexes = self._data[volumes, ijk[:, 0], ijk[:, 1], ijk[:, 2]]
+        resultIndexes = resultIndexes.astype(int).T.tolist()
+
+        return [{'voxel_queried': c_,
+                 'labels': [{'index': level_.index,
+                             'id': level_.description,
+                             'label': level_[resultIndex]}
+                            for level_, resultIndex in zip(levels_, indexes)]}
+                for c_, indexes in zip(c, resultIndexes)]
+
     __doc__ = enhanced_doc_string('LabelsAtlas', locals(), PyMVPAAtlas)
 
 
@@ -862,6 +962,53 @@ class ReferencesAtlas(PyMVPAAtlas):
         return result
 
 
+    def label_voxels(self, c, levels=None):
+        """Return labels for many voxels at once
+
+        The closest referenced voxels are stored in the atlas volumes,
+        so they are gathered for all voxels at once.
+        """
+        if self.__referenceLevel is None:
+            warning("You did not provide what level to use "
+                    "for reference. Assigning 0th level -- '%s'"
+                    % (self._levels[0],))
+            self.set_reference_level(0)
+
+        if not len(c):
+            return []
+
+        ijk, inside = self._check_range_many(c)
+        c = [c_ if inside_ else [0] * 3 for c_, inside_ in zip(c, inside)]
+
+        # obtain coordinates of the closest voxels
+        volumes = np.asarray(self.__referenceLevel.indexes)[:, None]
+        cref = self._data[volumes, ijk[:, 0], ijk[:, 1], ijk[:, 2]].T
+        dists = np.sqrt(np.sum(((cref - ijk) * self.voxdim) ** 2, axis=1))
+        referenced = (self.distance - dists) >= 1e-3 # neglect everything smaller
+        if __debug__:
+            debug('ATL__', "%d out of %d voxels have a referenced point "
+                  "within distance %.2f"
+                  % (np.sum(referenced), len(c), self.distance))
+
+        ref_results = iter(self.__referenceAtlas.label_voxels(
+            list(cref[referenced]), levels))
+        own_results = iter(self.__referenceAtlas.label_voxels(
+            [c_ for c_, r in zip(c, referenced) if not r], levels))
+
+        results = []
+        for c_, r, dist in zip(c, referenced, dists):
+            if r:
+                result = ref_results.next()
+                result['voxel_referenced'] = c_
+                result['distance'] = dist
+            else:
+                result = own_results.next()
+                result['voxel_referenced'] = None
+                result['distance'] = 0
+            results.append(result)
+        return results
+
+
     ##REF: Name was automagically refactored
     def levels_listing(self):
         return self.__referenceAtlas.levels_listing()
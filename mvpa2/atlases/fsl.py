@@ -215,6 +215,50 @@ class FSLProbabilisticAtlas(FSLAtlas):
 
         return result
 
+    def label_voxels(self, c, levels=None):
+        """Return labels for many voxels at once
+
+        Probabilities of all areas are gathered for all voxels at once.
+        See `label_voxel` for the parameters.
+        """
+        if levels is not None and not (levels in [0, [0], (0,)]):
+            raise ValueError, \
+                  "I guess we don't support levels other than 0 in FSL atlas." \
+                  " Got levels=%s" % (levels,)
+        if not self.strategy in ('all', 'max'):
+            raise ValueError, 'Unknown strategy %s' % self.strategy
+
+        if not len(c):
+            return []
+
+        ijk, inside = self._check_range_many(c)
+        c = [c_ if inside_ else [0] * 3 for c_, inside_ in zip(c, inside)]
+
+        areas = self._levels[0].labels
+        probs = self._data[np.arange(len(areas))[:, None],
+                           ijk[:, 0], ijk[:, 1], ijk[:, 2]].astype(int)
+
+        if self.sort or self.strategy == 'max':
+            # stable, so that equal probabilities keep the order of areas
+            order = np.argsort(-probs, axis=0, kind='mergesort')
+        else:
+            order = np.repeat(np.arange(len(areas))[:, None], len(ijk), axis=1)
+
+        results = []
+        for i, c_ in enumerate(c):
+            indexes = order[:, i]
+            indexes = indexes[probs[indexes, i] > self.thr]
+            if self.strategy == 'max':
+                indexes = indexes[:1]
+            resultLabels = [dict(index=index,
+                                 label=areas[index].text,
+                                 prob=prob)
+                            for index, prob in zip(indexes.tolist(),
+                                                   probs[indexes, i].tolist())]
+            results.append({'voxel_queried' : c_,
+                            'labels': [resultLabels]})
+        return results
+
     def find(self, *args, **kwargs):
         """Just a shortcut to the only level.
 
@@ -70,6 +70,34 @@ class TransformationBase:
     def apply(self, coord):
         return coord
 
+    def transform_many(self, coords):
+        """Apply the transformation (chain) to an array of coordinates
+
+        Parameters
+        ----------
+        coords : array, shape (N, 3)
+          One coordinate per row
+
+        Returns
+        -------
+        array with one transformed coordinate per row
+        """
+        coords = np.array(coords, dtype=float, ndmin=2)
+
+        if self.previous:
+            coords = self.previous.transform_many(coords)
+
+        return self.apply_many(coords)
+
+    def apply_many(self, coords):
+        """Apply only this transformation to each row of coords
+
+        Derived classes should override it with a vectorized version.
+        """
+        if not len(coords):
+            return coords
+        return np.array([self.apply(c) for c in coords])
+
 
 class SpaceTransformation(TransformationBase):
     """
@@ -90,8 +118,10 @@ class SpaceTransformation(TransformationBase):
 
         if to_real_space:
             self.apply = self.to_real_space
+            self.apply_many = self._to_real_space_many
         else:
             self.apply = self.to_voxel_space
+            self.apply_many = self._to_voxel_space_many
 
     ##REF: Name was automagically refactored
     def to_real_space(self, coord):
@@ -109,6 +139,14 @@ class SpaceTransformation(TransformationBase):
         coord += self.origin
         return map(lambda x:int(round(x)), coord)
 
+    def _to_real_space_many(self, coords):
+        return (coords - self.origin) * self.voxelSize
+
+    def _to_voxel_space_many(self, coords):
+        coords = coords / self.voxelSize + self.origin
+        # round half away from zero, as the builtin round does
+        return (np.sign(coords) * np.floor(np.abs(coords) + 0.5)).astype(int)
+
 
 class Linear(TransformationBase):
     """
@@ -137,6 +175,9 @@ class Linear(TransformationBase):
         result = np.dot(self.M, coord_)
         return result[0:-1]
 
+    def apply_many(self, coords):
+        return np.dot(coords, self.M[:-1, :-1].T) + self.M[:-1, -1]
+
 
 class MNI2Tal_MatthewBrett(TransformationBase):
     """
@@ -164,6 +205,11 @@ class MNI2Tal_MatthewBrett(TransformationBase):
         return {True: self.__upper,
                 False: self.__lower}[coord[2]>=0][coord]
 
+    def apply_many(self, coords):
+        return np.where(coords[:, 2:3] >= 0,
+                        self.__upper.apply_many(coords),
+                        self.__lower.apply_many(coords))
+
 
 class Tal2MNI_MatthewBrett(TransformationBase):
     """
@@ -181,6 +227,11 @@ class Tal2MNI_MatthewBrett(TransformationBase):
         return {True: self.__upper,
                 False: self.__lower}[coord[2]>=0][coord]
 
+    def apply_many(self, coords):
+        return np.where(coords[:, 2:3] >= 0,
+                        self.__upper.apply_many(coords),
+                        self.__lower.apply_many(coords))
+
 def mni_to_tal_meyer_lindenberg98 (*args, **kwargs):
     """
     Due to Andreas Meyer-Lindenberg
@@ -203,6 +203,7 @@ if __debug__:
     debug.register('CMDLINE', "Handling of command line parameters")
 
     debug.register('NO', "Nodes")
+    debug.register('PROF', "Profiling of nodes")
     debug.register('DG', "Data generators")
     debug.register('LAZY', "Miscelaneous 'lazy' evaluations")
     debug.register('LOOP', "Support's loop construct")
@@ -144,6 +144,10 @@ class ConditionalAttribute(IndexedCollectable):
     """Simple container intended to conditionally store the value
     """
 
+    _enabled_generation = 0
+    """Incremented whenever any conditional attribute gets enabled or
+    disabled, so collections can cache which of theirs are enabled"""
+
     def __init__(self, enabled=True, *args, **kwargs):
         """
         Parameters
@@ -215,6 +219,7 @@ class ConditionalAttribute(IndexedCollectable):
                   ({True: 'Enabling', False: 'Disabling'}[value],
                    self))
         self.__enabled = value
+        ConditionalAttribute._enabled_generation += 1
 
 
     enabled = property(fget=_get_enabled, fset=_set_enabled)
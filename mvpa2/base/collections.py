@@ -28,6 +28,7 @@ if __debug__:
 
 
 _object_getattribute = dict.__getattribute__
+_dict_get = dict.get
 _object_setattr = dict.__setattr__
 _object_setitem = dict.__setitem__
 
@@ -486,10 +487,12 @@ class Collection(dict):
 
 
     def __getattribute__(self, key):
-        try:
-            return self[key].value
-        except KeyError:
+        # no try/except KeyError: most lookups are for methods, and raising
+        # an exception for each of them is expensive
+        item = _dict_get(self, key)
+        if item is None:
             return _object_getattribute(self, key)
+        return item.value
 
 
     def __setattr__(self, key, value):
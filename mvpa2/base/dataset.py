@@ -30,6 +30,54 @@ if not __REPR_STYLE__ in ('full', 'str'):
                      " Valid are 'full' and 'str'." % __REPR_STYLE__)
 
 
+def _snapshot_collection(col, index, length):
+    """Record everything needed to slice an attribute collection later on
+
+    Attribute values are referenced at the time of the call, so later
+    re-assignments in the source collection do not leak into the slice.
+    In-place modifications do, hence only slicing with a `slice` (which
+    yields views anyway) should be deferred.
+    """
+    return (col.__class__, length, index,
+            [(attr.__class__, attr.name, attr.__doc__, attr.value)
+             for attr in col.values()])
+
+
+def _slice_collection(colclass, length, index, attrs):
+    """Create an attribute collection from a `_snapshot_collection` record"""
+    col = colclass(length=length)
+    for attrclass, name, doc, value in attrs:
+        # preserve attribute type
+        newattr = attrclass(doc=doc)
+        # slice
+        newattr.value = value[index]
+        # assign to target collection
+        col[name] = newattr
+    return col
+
+
+class _LazyCollection(object):
+    """Non-data descriptor to materialize a sliced collection on first access
+
+    Once materialized, the collection is stored in the instance dictionary,
+    hence any subsequent access bypasses this descriptor entirely.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._lazyname = '_lazy_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            spec = obj.__dict__.pop(self._lazyname)
+        except KeyError:
+            raise AttributeError("%r object has no attribute %r"
+                                 % (type(obj).__name__, self._name))
+        col = obj.__dict__[self._name] = _slice_collection(*spec)
+        return col
+
+
 class AttrDataset(object):
     """Generic storage class for datasets with multiple attributes.
 
@@ -457,33 +505,8 @@ class AttrDataset(object):
                 samples = samples[:, args[1]]
         if __debug__:
             debug('DS_', "Selected feature/samples %s" % str(self.samples.shape))
-        # and now for the attributes -- we want to maintain the type of the
-        # collections
-        sa = self.sa.__class__(length=samples.shape[0])
-        fa = self.fa.__class__(length=samples.shape[1])
+        # dataset attributes: this time copying
         a = self.a.__class__()
-
-        # per-sample attributes; always needs to run even if slice(None), since
-        # we need fresh SamplesAttributes even if they share the data
-        for attr in self.sa.values():
-            # preserve attribute type
-            newattr = attr.__class__(doc=attr.__doc__)
-            # slice
-            newattr.value = attr.value[args[0]]
-            # assign to target collection
-            sa[attr.name] = newattr
-
-        # per-feature attributes; always needs to run even if slice(None),
-        # since we need fresh SamplesAttributes even if they share the data
-        for attr in self.fa.values():
-            # preserve attribute type
-            newattr = attr.__class__(doc=attr.__doc__)
-            # slice
-            newattr.value = attr.value[args[1]]
-            # assign to target collection
-            fa[attr.name] = newattr
-
-        # and finally dataset attributes: this time copying
         for attr in self.a.values():
             # preserve attribute type
             newattr = attr.__class__(name=attr.name, doc=attr.__doc__)
@@ -494,6 +517,33 @@ class AttrDataset(object):
             # assign to target collection
             a[attr.name] = newattr
 
+        # per-sample and per-feature attributes selected by a slice are only
+        # sliced when they are accessed for the first time -- many consumers
+        # (e.g. searchlights) only look at the samples.  Since a subclass might need its
+        # constructor to run, deferred slicing is limited to the generic one
+        if type(self).__init__ == AttrDataset.__init__:
+            out = self.__class__.__new__(self.__class__)
+            out.samples = samples
+            for name, col, index, length in (
+                    ('sa', self.sa, args[0], samples.shape[0]),
+                    ('fa', self.fa, args[1], samples.shape[1])):
+                spec = _snapshot_collection(col, index, length)
+                if isinstance(index, slice):
+                    setattr(out, '_lazy_' + name, spec)
+                else:
+                    # fancy indexing copies, so it has to happen now for
+                    # later in-place changes of the source not to leak in
+                    setattr(out, name, _slice_collection(*spec))
+            out.a = a
+            return out
+
+        # per-sample and per-feature attributes; always need to be sliced even
+        # if slice(None), since we need fresh collections even if they share
+        # the data
+        sa = _slice_collection(*_snapshot_collection(self.sa, args[0],
+                                                     samples.shape[0]))
+        fa = _slice_collection(*_snapshot_collection(self.fa, args[1],
+                                                     samples.shape[1]))
         # and after a long way instantiate the new dataset of the same type
         return self.__class__(samples, sa=sa, fa=fa, a=a)
 
@@ -632,7 +682,7 @@ class AttrDataset(object):
         return savez(filename, **entries)
 
     @classmethod
-    def from_npz(cls, filename):
+    def from_npz(cls, filename, mmap_mode=None):
         """Load dataset from NumPy's .npz file, as e.g. stored by to_npz
 
         File expected to have 'samples' item, which serves as samples, and
@@ -643,6 +693,12 @@ class AttrDataset(object):
         ----------
         filename: str
           Filename for the .npz file.  Can be specified without .npz suffix
+        mmap_mode: {None, 'r', 'r+', 'c'}, optional
+          If not None, samples are not loaded into memory, but memory-mapped
+          from the file using the given mode (see `numpy.memmap`).  Slicing
+          such a dataset only reads the selected samples/features from disk.
+          Requires the file to be stored without compression, i.e.
+          ``to_npz(filename, compress=False)``.
 
         """
         # some sugaring
@@ -654,9 +710,12 @@ class AttrDataset(object):
 
         cols = {'a': {}, 'fa': {}, 'sa': {}}
         skipped = []
-        for e, v in entries.items():
+        for e in entries.files:
             if e == 'samples':
-                samples = v
+                if mmap_mode is None:
+                    samples = entries[e]
+                else:
+                    samples = _npz_memmap(filename, e, mmap_mode)
             else:
                 if '.' not in e:
                     skipped.append(e)
@@ -665,19 +724,71 @@ class AttrDataset(object):
                 if c not in cols:
                     skipped.append(e)
                     continue
-                cols[c][k] = v
+                cols[c][k] = entries[e]
+        entries.close()
         if skipped:
             warning("Skipped following items since do not belong to any of "
                     "known collections: %s" % (", ".join(sorted(skipped))))
         return cls(samples, **cols)
 
 
+    # sliced attribute collections, materialized on first access
+    sa = _LazyCollection('sa')
+    fa = _LazyCollection('fa')
+
     # shortcut properties
     nsamples = property(fget=len)
     nfeatures = property(fget=lambda self: self.shape[1])
     shape = property(fget=lambda self: self.samples.shape)
 
 
+def _npz_memmap(filename, name, mmap_mode):
+    """Memory-map an uncompressed array stored within an .npz file
+
+    Parameters
+    ----------
+    filename : str
+      Filename of the .npz file.
+    name : str
+      Name of the stored array.
+    mmap_mode : {'r', 'r+', 'c'}
+      Mode to open the memory-map with (see `numpy.memmap`).
+    """
+    import struct
+    import zipfile
+    from numpy.lib import format as npformat
+
+    zf = zipfile.ZipFile(filename)
+    try:
+        info = zf.getinfo(name + '.npy')
+    finally:
+        zf.close()
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError("Cannot memory-map compressed array %r from %s.  "
+                         "Use to_npz(..., compress=False) to store datasets "
+                         "which should be memory-mapped." % (name, filename))
+    f = open(filename, 'rb')
+    try:
+        # skip the member's local file header: 30 bytes of fixed fields,
+        # followed by the filename and an extra field of variable length
+        f.seek(info.header_offset + 26)
+        nname, nextra = struct.unpack('<HH', f.read(4))
+        f.seek(info.header_offset + 30 + nname + nextra)
+        version = npformat.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = npformat.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = npformat.read_array_header_2_0(f)
+        offset = f.tell()
+    finally:
+        f.close()
+    if dtype.hasobject:
+        raise ValueError("Cannot memory-map array %r of object dtype from %s."
+                         % (name, filename))
+    return np.memmap(filename, dtype=dtype, mode=mmap_mode, shape=shape,
+                     order='F' if fortran_order else 'C', offset=offset)
+
+
 def datasetmethod(func):
     """Decorator to easily bind functions to an AttrDataset class
     """
@@ -1240,7 +1351,7 @@ class DatasetAttributeExtractor(object):
         ----------
         ds : AttrDataset
         """
-        return ds.__dict__[self._col][self._key].value
+        return getattr(ds, self._col)[self._key].value
 
     def __repr__(self):
         return "%s(%s, %s)" % (self.__class__.__name__,
@@ -86,6 +86,7 @@ def __check_scipy():
     __assign_numpy_version()
     __assign_scipy_version()
     import scipy as sp
+    _suppress_scipy_warnings()
 
 def _suppress_scipy_warnings():
     # Infiltrate warnings if necessary
@@ -616,6 +617,132 @@ _KNOWN = {'libsvm': 'import mvpa2.clfs.libsvmc._svm as __; x=__.seq_to_svm_node'
           }
 
 
+# Externals to probe in every process, since the outcome depends on the
+# running process or the probe has side effects (e.g. configures the external)
+_UNCACHED = set(['numpy', 'scipy', 'matplotlib', 'rpy2',
+                 'libsvm verbosity control', 'pylab plottable',
+                 'running ipython env', 'afni-3dinfo'])
+# Externals whose probing results get cached on disk -- only the ones known
+# upfront, not the ones registered at run time
+_CACHEABLE = set(_KNOWN).difference(_UNCACHED)
+
+# Version of the layout of the cache -- to be incremented upon any change
+_PROBE_CACHE_VERSION = 1
+# Probing results loaded from the cache (None if not loaded yet)
+_probe_cache = None
+# Externals checked for while probing for the ones being probed
+_probe_requires = []
+
+
+def _get_probe_cache_filename():
+    """Return the cache file for this interpreter, or None if disabled
+
+    Caching is opt-in: externals/cache has to name a directory, or be 'yes'
+    to use pymvpa2 under the user's cache directory.
+    """
+    cachedir = cfg.get('externals', 'cache', default='no')
+    if cachedir.lower() in ('no', 'false', 'off', '0', ''):
+        return None
+    elif cachedir.lower() in ('yes', 'true', 'on', '1'):
+        cachedir = os.path.join(
+            os.environ.get('XDG_CACHE_HOME',
+                           os.path.join(os.path.expanduser('~'), '.cache')),
+            'pymvpa2')
+    import hashlib
+    return os.path.join(
+        cachedir, 'externals-%s.pkl'
+                  % hashlib.sha1(sys.executable + sys.version).hexdigest()[:16])
+
+
+def _get_probe_cache_key():
+    """Describe the environment the probing results are valid for
+
+    Installing or removing modules changes modification times of the
+    directories on sys.path, and rebuilding of our own extensions the ones
+    of their directories.  The current and the script directory are not
+    considered: they differ between runs, which all share the cache file.
+    """
+    def mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+    mvpa2_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    key = [_PROBE_CACHE_VERSION, sys.executable, sys.version]
+    key += [(p, mtime(p)) for p in sys.path[1:] if p]
+    key += [(d, mtime(os.path.join(mvpa2_dir, 'clfs', d)))
+            for d in ('libsvmc', 'libsmlrc')]
+    return key
+
+
+def _load_probe_cache(filename):
+    """Return probing results stored in the file for the current environment
+    """
+    import cPickle
+    try:
+        with open(filename, 'rb') as f:
+            stored = cPickle.load(f)
+    except IOError:
+        # not yet cached
+        return {}
+    except Exception, e:
+        if __debug__:
+            debug('EXT', "Ignoring broken externals cache %s: %s"
+                  % (filename, e))
+        return {}
+    if not isinstance(stored, dict) \
+       or stored.get('key') != _get_probe_cache_key():
+        if __debug__:
+            debug('EXT', "Ignoring outdated externals cache %s" % filename)
+        return {}
+    return stored['probes']
+
+
+def _get_cached_probe(dep):
+    """Return (result, versions, required deps) of a cached probe or None
+    """
+    global _probe_cache
+    if dep not in _CACHEABLE:
+        return None
+    if _probe_cache is None:
+        filename = _get_probe_cache_filename()
+        _probe_cache = _load_probe_cache(filename) if filename else {}
+    entry = _probe_cache.get(dep)
+    # the probe itself might have changed
+    if entry is None or entry[0] != _KNOWN[dep]:
+        return None
+    return entry[1:]
+
+
+def _cache_probe(dep, result, dep_versions, requires):
+    """Store the outcome of probing for the dependency on disk"""
+    global _probe_cache
+    if dep not in _CACHEABLE:
+        return
+    filename = _get_probe_cache_filename()
+    if filename is None:
+        return
+    import cPickle
+    import tempfile
+    # merge with the results stored by other processes in the meanwhile
+    _probe_cache = _load_probe_cache(filename)
+    _probe_cache[dep] = (_KNOWN[dep], result, dep_versions, requires)
+    cachedir = os.path.dirname(filename)
+    try:
+        if not os.path.exists(cachedir):
+            os.makedirs(cachedir)
+        fd, tmpname = tempfile.mkstemp(dir=cachedir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            cPickle.dump({'key': _get_probe_cache_key(),
+                          'probes': _probe_cache}, f, protocol=2)
+        # atomically, so concurrent readers never see a partial file
+        os.rename(tmpname, filename)
+    except (IOError, OSError), e:
+        if __debug__:
+            debug('EXT', "Failed to store externals cache %s: %s"
+                  % (filename, e))
+
+
 def exists(dep, force=False, raise_=False, issueWarning=None,
            exception=RuntimeError):
     """
@@ -652,6 +779,10 @@ def exists(dep, force=False, raise_=False, issueWarning=None,
     # where to look in cfg
     cfgid = 'have ' + dep
 
+    # the outcome of the probe being run might depend on this one
+    if _probe_requires and dep not in _probe_requires[-1]:
+        _probe_requires[-1].append(dep)
+
     # pre-handle raise_ according to the global settings and local argument
     if isinstance(raise_, str):
         if raise_.lower() == 'always':
@@ -663,10 +794,9 @@ def exists(dep, force=False, raise_=False, issueWarning=None,
         raise_ = (raise_
                   and cfg.getboolean('externals', 'raise exception', True))
 
+    retest = force or cfg.getboolean('externals', 'retest', default='no')
     # prevent unnecessary testing
-    if cfg.has_option('externals', cfgid) \
-       and not cfg.getboolean('externals', 'retest', default='no') \
-       and not force:
+    if cfg.has_option('externals', cfgid) and not retest:
         if __debug__:
             debug('EXT', "Skip retesting for '%s'." % dep)
 
@@ -683,7 +813,23 @@ def exists(dep, force=False, raise_=False, issueWarning=None,
 
     if dep not in _KNOWN:
         raise ValueError("%r is not a known dependency key." % (dep,))
+
+    cached = None if retest else _get_cached_probe(dep)
+    if cached is not None:
+        result, dep_versions, requires = cached
+        if __debug__:
+            debug('EXT', "Presence of %s is%s verified (cached)"
+                  % (dep, {True: '', False: ' NOT'}[result]))
+        # externals the cached probe relied upon might need to be set up
+        # within this process
+        for dep_ in requires:
+            exists(dep_)
+        for k, v in dep_versions.iteritems():
+            if k not in versions:
+                versions[k] = v
     else:
+        known_versions = set(versions)
+        _probe_requires.append([])
         # try and load the specific dependency
         if __debug__:
             debug('EXT', "Checking for the presence of %s" % dep)
@@ -713,12 +859,19 @@ def exists(dep, force=False, raise_=False, issueWarning=None,
         finally:
             # And restore warnings
             np.seterr(**old_handling)
+            requires = _probe_requires.pop()
 
         if __debug__:
             vstr = ' (%s)' % versions[dep] if dep in versions else ''
             debug('EXT', "Presence of %s%s is%s verified%s" %
                   (dep, vstr, {True: '', False: ' NOT'}[result], error_str))
 
+        dep_versions = {}
+        for k, v in versions.iteritems():
+            if k not in known_versions:
+                dep_versions[k] = v
+        _cache_probe(dep, result, dep_versions, requires)
+
     if not result:
         if raise_:
             raise exception("Required external '%s' was not found" % dep)
@@ -65,7 +65,13 @@ class HDF5ConversionError(Exception):
     pass
 
 
-def hdf2obj(hdf, memo=None):
+# key to mark lazy loading in the memo of hdf2obj()
+_LAZY_MARKER = '__lazy__'
+# key to mark that the file needs to stay open after lazy loading
+_LAZY_OPEN = '__lazy_open__'
+
+
+def hdf2obj(hdf, memo=None, lazy=False):
     """Convert an HDF5 group definition into an object instance.
 
     Obviously, this function assumes the conventions implemented in the
@@ -79,6 +85,9 @@ def hdf2obj(hdf, memo=None):
     memo : dict
       Dictionary tracking reconstructed objects to prevent recursions (analog to
       deepcopy).
+    lazy : bool, optional
+      If True, samples of any contained dataset are not read into memory,
+      but accessed directly from the file (see `h5load()`).
 
     Notes
     -----
@@ -96,6 +105,9 @@ def hdf2obj(hdf, memo=None):
     if memo is None:
         # init object tracker
         memo = {}
+    if lazy:
+        # memo is passed along the whole reconstruction
+        memo[_LAZY_MARKER] = True
     # note, older file formats did not store objrefs
     if 'objref' in hdf.attrs:
         objref = hdf.attrs['objref']
@@ -245,6 +257,8 @@ def _update_obj_state_from_hdf(obj, hdf, memo):
 
 def _recon_customobj_customrecon(hdf, memo):
     """Reconstruct a custom object from HDF using a custom recontructor"""
+    if memo.get(_LAZY_MARKER, False) and _is_stored_dataset(hdf):
+        return _hdf_to_lazy_dataset(hdf, memo, lazy=True)
     # we found something that has some special idea about how it wants
     # to be reconstructed
     mod_name = hdf.attrs['module'].decode()
@@ -564,6 +578,240 @@ def _hdf_to_ndarray(hdf):
     return obj
 
 
+def _hdf_to_memmap(hdf, mode='r'):
+    """Memory-map an HDF5 dataset directly from its file, if possible
+
+    This is only possible for datasets stored contiguously and without any
+    filters (e.g. compression) applied.
+
+    Returns
+    -------
+    numpy.memmap or None
+      None is returned if the dataset cannot be memory-mapped.
+    """
+    if hdf.chunks is not None or hdf.compression is not None \
+            or 'is_a_view' in hdf.attrs or hdf.dtype.hasobject \
+            or not hdf.size:
+        return None
+    offset = hdf.id.get_offset()
+    if offset is None:
+        # storage was never allocated
+        return None
+    return np.memmap(hdf.file.filename, dtype=hdf.dtype, mode=mode,
+                     shape=hdf.shape, offset=offset)
+
+
+class LazyHDF5Array(object):
+    """Array-like proxy for an HDF5 dataset that is only read when needed.
+
+    Selections are accumulated without reading any data.  Only when the
+    content is requested (e.g. via `numpy.asarray()`), the selected
+    hyperslab is read from the file.  From then on the proxy is backed by
+    the array read, which also serves arithmetic and any other method of
+    `numpy.ndarray`, so it can be used wherever an array is expected.
+    """
+    # take precedence in operations with arrays
+    __array_priority__ = 10.0
+
+    def __init__(self, hdf, index=None):
+        """
+        Parameters
+        ----------
+        hdf : h5py.Dataset
+          Dataset to provide access to.
+        index : tuple of arrays, optional
+          Per axis indices of selected elements.  By default all elements
+          are selected.
+        """
+        self._hdf = hdf
+        if index is None:
+            index = tuple([np.arange(n) for n in hdf.shape])
+        self._index = index
+        self._data = None
+
+    shape = property(fget=lambda self: tuple([len(i) for i in self._index]))
+    ndim = property(fget=lambda self: len(self._index))
+    dtype = property(fget=lambda self: self._hdf.dtype)
+    size = property(fget=lambda self: int(np.prod(self.shape)))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "%s(%r, shape=%s)" % (self.__class__.__name__,
+                                     self._hdf.name, self.shape)
+
+    def __getitem__(self, key):
+        if self._data is not None:
+            return self._data[key]
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError("Too many indices (%i) for %i-dimensional array"
+                             % (len(key), self.ndim))
+        index = list(self._index)
+        squeeze = []
+        for axis, k in enumerate(key):
+            if isinstance(k, (int, np.integer)):
+                # remove the axis after reading
+                squeeze.append(axis)
+                k = [k]
+            index[axis] = index[axis][k]
+        selected = self.__class__(self._hdf, index=tuple(index))
+        if not squeeze:
+            return selected
+        return selected.read()[tuple([0 if axis in squeeze else slice(None)
+                                      for axis in range(self.ndim)])]
+
+    def read(self):
+        """Read the selected hyperslab into a new array"""
+        # local import to avoid circular import
+        from mvpa2.misc.support import mask2slice
+        hdf_sel = []
+        post_sel = []
+        got_fancy = False
+        for index in self._index:
+            if not len(index):
+                sel = slice(0, 0)
+            else:
+                sel = mask2slice(index)
+            if isinstance(sel, slice):
+                hdf_sel.append(sel)
+                post_sel.append(None)
+            elif not got_fancy:
+                # h5py requires sorted unique indices
+                uindex, inverse = np.unique(index, return_inverse=True)
+                hdf_sel.append(uindex)
+                post_sel.append(inverse)
+                got_fancy = True
+            else:
+                # h5py supports a single fancy selection at a time, hence
+                # read the bounding range and select afterwards
+                imin = index.min()
+                hdf_sel.append(slice(imin, index.max() + 1))
+                post_sel.append(index - imin)
+        if not np.prod([len(i) for i in self._index]):
+            data = np.empty(self.shape, dtype=self.dtype)
+        else:
+            data = self._hdf[tuple(hdf_sel)]
+        for axis, sel in enumerate(post_sel):
+            if sel is not None:
+                data = data.take(sel, axis=axis)
+        return data
+
+    def __array__(self, dtype=None):
+        if self._data is None:
+            self._data = self.read()
+        if dtype is not None:
+            return self._data.astype(dtype)
+        return self._data
+
+    def __getattr__(self, name):
+        # only invoked for what the proxy does not provide itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.__array__(), name)
+
+    def view(self):
+        return self.__class__(self._hdf, index=self._index)
+
+    def close(self):
+        """Close the underlying HDF5 file
+
+        Any other `LazyHDF5Array` accessing the same file becomes unusable
+        as well.
+        """
+        if self._hdf.id.valid:
+            self._hdf.file.close()
+
+    def __deepcopy__(self, memo=None):
+        if self._data is not None:
+            return self._data.copy()
+        return self.read()
+
+    def __reduce__(self):
+        return (np.asarray, (self.__deepcopy__(),))
+
+
+def _add_array_operator(name):
+    """Let `LazyHDF5Array` implement an operator through the array read"""
+    def op(self, *args):
+        args = [np.asarray(a) if isinstance(a, LazyHDF5Array) else a
+                for a in args]
+        return getattr(self.__array__(), name)(*args)
+    op.__name__ = name
+    setattr(LazyHDF5Array, name, op)
+
+for _op in ('add', 'sub', 'mul', 'div', 'truediv', 'floordiv', 'mod',
+            'divmod', 'pow', 'lshift', 'rshift', 'and', 'or', 'xor'):
+    _add_array_operator('__%s__' % _op)
+    _add_array_operator('__r%s__' % _op)
+for _op in ('lt', 'le', 'eq', 'ne', 'gt', 'ge', 'neg', 'pos', 'abs',
+            'invert', 'iter', 'contains', 'nonzero'):
+    _add_array_operator('__%s__' % _op)
+del _op
+
+
+def _hdf_to_lazy_dataset(hdf, memo, lazy=False, samples=None,
+                         features=None):
+    """Reconstruct a stored dataset reading only the samples needed
+
+    Samples are memory-mapped or, if not possible, accessed through a
+    `LazyHDF5Array`.  All other pieces of the dataset are loaded as usual.
+    Unless `lazy` is set, only the selected samples are read into memory
+    on return.
+    """
+    mod_name = hdf.attrs['module'].decode()
+    recon_name = hdf.attrs['recon'].decode()
+    mod, recon = _import_from_thin_air(mod_name, recon_name)
+    if not 'rcargs' in hdf:
+        raise ValueError("%r contains no stored dataset." % hdf.name)
+    items = hdf['rcargs']['items']
+    hdf_samples = items['0']
+    if isinstance(hdf_samples, h5py.Dataset) \
+            and not 'is_a_view' in hdf_samples.attrs:
+        ds_samples = _hdf_to_memmap(hdf_samples)
+        if ds_samples is None:
+            if hdf_samples.size:
+                ds_samples = LazyHDF5Array(hdf_samples)
+                memo[_LAZY_OPEN] = True
+            else:
+                ds_samples = hdf2obj(hdf_samples, memo)
+    else:
+        # nothing to gain
+        ds_samples = hdf2obj(hdf_samples, memo)
+    args = [ds_samples]
+    for i in range(1, len(items)):
+        args.append(hdf2obj(items[str(i)], memo=memo))
+    ds = recon(*args)
+    _update_obj_state_from_hdf(ds, hdf, memo)
+
+    if features is not None:
+        if samples is None:
+            samples = slice(None)
+        ds = ds[samples, features]
+    elif samples is not None:
+        ds = ds[samples]
+
+    if not lazy and not type(ds.samples) is np.ndarray:
+        # detach from the file
+        ds.samples = np.array(ds.samples)
+    return ds
+
+
+def _is_stored_dataset(hdf):
+    """Check whether an HDF5 group contains a stored dataset"""
+    if not 'recon' in hdf.attrs:
+        return False
+    from mvpa2.base.dataset import AttrDataset
+    try:
+        mod, recon = _import_from_thin_air(hdf.attrs['module'].decode(),
+                                           hdf.attrs['recon'].decode())
+    except (ImportError, KeyError):
+        return False
+    return isinstance(recon, type) and issubclass(recon, AttrDataset)
+
+
 def _seqitems_to_hdf(obj, hdf, memo, noid=False, **kwargs):
     """Store a sequence as HDF item list"""
     hdf.attrs.create('length', len(obj))
@@ -950,7 +1198,7 @@ def h5save(filename, data, name=None, mode='w', mkdir=True, **kwargs):
         hdf.close()
 
 
-def h5load(filename, name=None):
+def h5load(filename, name=None, lazy=False, samples=None, features=None):
     """Loads the content of an HDF5 file that has been stored by `h5save()`.
 
     This is a convenience wrapper around `hdf2obj()`. Please see its
@@ -962,19 +1210,55 @@ def h5load(filename, name=None):
       Name of the file to open and load its content.
     name : str
       Name of a specific object to load from the file.
+    lazy : bool, optional
+      If True, samples of stored datasets (also those contained in other
+      objects) are not loaded into memory.
+      Instead they are memory-mapped from the file, if stored contiguously
+      and uncompressed, or accessed through a `LazyHDF5Array` that only
+      reads the selected portion of the data when needed.  Any other
+      stored object is loaded as usual.  If all samples could be
+      memory-mapped, the file is closed right away.  Otherwise it stays
+      open until the last `LazyHDF5Array` accessing it is gone, or until
+      it is closed explicitly via `LazyHDF5Array.close()`.
+    samples : slice or sequence, optional
+      Selection of samples to load from a stored dataset.  Only the
+      selected samples are read from the file.
+    features : slice or sequence, optional
+      Selection of features to load from a stored dataset.  Only the
+      selected features are read from the file.
 
     Returns
     -------
     instance
       An object of whatever has been stored in the file.
     """
+    partial = samples is not None or features is not None
     hdf = h5py.File(filename, 'r')
+    # whether anything loaded still needs the open file
+    need_open = [False]
+
+    def _load(hdf_, strict=True):
+        memo = {}
+        if partial and not isinstance(hdf_, h5py.Dataset) \
+                and _is_stored_dataset(hdf_):
+            obj_ = _hdf_to_lazy_dataset(hdf_, memo, lazy=lazy,
+                                        samples=samples, features=features)
+        elif partial and strict:
+            raise ValueError("Selection of samples or features is only "
+                             "possible for stored datasets (%r in '%s')."
+                             % (hdf_.name, filename))
+        else:
+            obj_ = hdf2obj(hdf_, memo=memo, lazy=lazy)
+        if memo.get(_LAZY_OPEN, False):
+            need_open[0] = True
+        return obj_
+
     try:
         if name is not None:
             if not name in hdf:
                 raise ValueError("No object of name '%s' in file '%s'."
                                  % (name, filename))
-            obj = hdf2obj(hdf[name])
+            obj = _load(hdf[name])
         else:
             if not len(hdf) and not len(hdf.attrs):
                 # there is nothing
@@ -984,19 +1268,23 @@ def h5load(filename, name=None):
                 if isinstance(hdf, h5py.Dataset) \
                         or ('class' in hdf.attrs or 'recon' in hdf.attrs):
                     # this is an object stored at the toplevel
-                    obj = hdf2obj(hdf)
+                    obj = _load(hdf)
                 else:
                     # no object into at the top-level, but maybe in the next one
                     # this would happen for plain mat files with arrays
                     if len(hdf) == 1 and '__unnamed__' in hdf:
                         # just a single with special name -> special case:
                         # return as is
-                        obj = hdf2obj(hdf['__unnamed__'])
+                        obj = _load(hdf['__unnamed__'])
                     else:
                         # otherwise build dict with content
                         obj = {}
                         for k in hdf:
-                            obj[k] = hdf2obj(hdf[k])
-    finally:
+                            obj[k] = _load(hdf[k], strict=False)
+    except:
+        hdf.close()
+        raise
+    if not (lazy and need_open[0]):
+        # memory-mapped samples do not depend on the open file
         hdf.close()
     return obj
@@ -18,6 +18,7 @@ from mvpa2.base.state import ConditionalAttribute
 from mvpa2.base.types import is_datasetlike
 from mvpa2.base.dochelpers import _repr_attrs
 from mvpa2.base.node import CompoundNode, CombinedNode
+from mvpa2.base import profiling
 
 if __debug__:
     from mvpa2.base import debug, warning
@@ -131,10 +132,16 @@ class Learner(Node):
         # remember the time when started training
         t0 = time.time()
 
+        profiler = profiling.active_profiler
+        if profiler is None:
+            _train = self._train
+        else:
+            _train = lambda ds: profiler.run(self, '_train', self._train, ds)
+
         if got_ds:
             # things might have happened during pretraining
             if ds.nfeatures > 0:
-                self._train(ds)
+                _train(ds)
             else:
                 warning("Trying to train on dataset with no features present")
                 if __debug__:
@@ -143,10 +150,11 @@ class Learner(Node):
                           "is called")
         else:
             # in this case we claim to have no idea and simply try to train
-            self._train(ds)
+            _train(ds)
 
         # store timing
-        self.ca.training_time = time.time() - t0
+        if 'training_time' in self.ca.enabled_set:
+            self.ca.training_time = time.time() - t0
 
         # and post-proc
         self._posttrain(ds)
@@ -212,7 +220,11 @@ class Learner(Node):
         None
         """
         ca = self.ca
-        if ca.is_enabled('trained_targets') and isinstance(ds, AttrDataset):
+        enabled = ca.enabled_set
+        if not enabled:
+            # nothing to store
+            return
+        if 'trained_targets' in enabled and isinstance(ds, AttrDataset):
             space = self.get_space()
             if space in ds.sa:
                 ca.trained_targets = ds.sa[space].unique
@@ -16,6 +16,7 @@ from mvpa2.support import copy
 
 from mvpa2.base.dochelpers import _str, _repr_attrs
 from mvpa2.base.state import ClassWithCollections, ConditionalAttribute
+from mvpa2.base import profiling
 
 from mvpa2.base.collections import SampleAttributesCollection, \
     FeatureAttributesCollection, DatasetAttributesCollection
@@ -134,10 +135,16 @@ class Node(ClassWithCollections):
         t0 = time.time()                # record the time when call initiated
 
         self._precall(ds)
-        result = self._call(ds, **(_call_kwargs or self._get_call_kwargs(ds)))
+        call_kwargs = _call_kwargs or self._get_call_kwargs(ds)
+        profiler = profiling.active_profiler
+        if profiler is None:
+            result = self._call(ds, **call_kwargs)
+        else:
+            result = profiler.run(self, '_call', self._call, ds, **call_kwargs)
         result = self._postcall(ds, result)
 
-        self.ca.calling_time = time.time() - t0  # set the calling_time
+        if 'calling_time' in self.ca.enabled_set:
+            self.ca.calling_time = time.time() - t0  # set the calling_time
         return result
 
     def _precall(self, ds):
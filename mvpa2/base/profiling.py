@@ -0,0 +1,208 @@
+# emacs: -*- mode: python; py-indent-offset: 4; indent-tabs-mode: nil -*-
+# vi: set ft=python sts=4 ts=4 sw=4 et:
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the PyMVPA package for the
+#   copyright and license terms.
+#
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Opt-in instrumentation of the computations done by nodes.
+
+While a `NodeProfiler` is active, every invocation of `_call`, `_train`
+and `_predict` of any `Node`, `Learner` or `Classifier` gets recorded:
+number of calls, wall and CPU time, and process peak RSS growth, i.e. how
+much a call raised the peak resident memory of the whole process.  Since
+the peak is a high-water mark, memory allocated below an earlier peak does
+not show up.  Calls are aggregated along the chain of nested nodes they
+were made from (e.g. CrossValidation -> MappedClassifier -> SVM), so it is
+possible to see where the time goes without external profilers::
+
+  with NodeProfiler() as prof:
+      cv(ds)
+  print prof.as_table()
+  prof.to_chrome_trace('cv_trace.json')   # to load into chrome://tracing
+
+Only the process the profiler is active in gets instrumented, i.e. not
+the workers of parallelized searchlights.
+"""
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+
+try:
+    import resource
+except ImportError:                     # pragma: no cover -- e.g. Windows
+    resource = None
+
+from mvpa2.base.dochelpers import table2string
+
+if __debug__:
+    from mvpa2.base import debug
+
+__all__ = ['NodeProfiler', 'get_active_profiler']
+
+active_profiler = None
+"""Profiler which is recording at the moment -- checked by the nodes"""
+
+# ru_maxrss is reported in kilobytes on Linux but in bytes on OS X
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def _get_usage():
+    """Return CPU time (in seconds) and peak resident memory (in bytes)"""
+    if resource is None:                # pragma: no cover
+        return time.clock(), 0
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime, ru.ru_maxrss * _MAXRSS_UNIT
+
+
+def get_active_profiler():
+    """Return the `NodeProfiler` which is recording, or None"""
+    return active_profiler
+
+
+class NodeProfiler(object):
+    """Collects statistics of the computations done by nodes
+
+    Use it as a context manager, or `start` and `stop` it explicitly.
+    Only one profiler could be active at a time.
+    """
+
+    def __init__(self, events=True):
+        """
+        Parameters
+        ----------
+        events : bool
+          Either to keep every single call besides the aggregate statistics.
+          Needed for `to_chrome_trace`, but memory demand grows with the
+          number of calls, e.g. in a long searchlight.
+        """
+        self._keep_events = events
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        self._stats = {}
+        """Per chain of calls:
+        [count, wall, self wall, cpu, max process peak RSS growth]
+        """
+        self._events = []
+        self._stack = []
+        self._t0 = time.time()
+
+    def start(self):
+        """Start recording"""
+        global active_profiler
+        if active_profiler is not None and active_profiler is not self:
+            raise RuntimeError("Another profiler %s is already active"
+                               % active_profiler)
+        if __debug__:
+            debug('PROF', "Starting profiling nodes with %s" % self)
+        active_profiler = self
+
+    def stop(self):
+        """Stop recording"""
+        global active_profiler
+        if active_profiler is self:
+            active_profiler = None
+            if __debug__:
+                debug('PROF', "Stopped profiling nodes with %s" % self)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def run(self, node, method, func, *args, **kwargs):
+        """Call `func`, i.e. `method` of `node`, recording its statistics
+        """
+        name = '%s.%s' % (node.__class__.__name__, method)
+        stack = self._stack
+        path = (stack[-1][0] if stack else ()) + (name,)
+        # path and total wall time of the nested calls
+        frame = [path, 0.0]
+        stack.append(frame)
+        cpu0, rss0 = _get_usage()
+        t0 = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            wall = time.time() - t0
+            cpu1, rss1 = _get_usage()
+            stack.pop()
+            if stack:
+                stack[-1][1] += wall
+            cpu = cpu1 - cpu0
+            rss = rss1 - rss0
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = [0, 0.0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += wall
+            stats[2] += wall - frame[1]
+            stats[3] += cpu
+            stats[4] = max(stats[4], rss)
+            if self._keep_events:
+                self._events.append((name, t0, wall, cpu, rss, len(stack)))
+
+    @property
+    def stats(self):
+        """Aggregate statistics as a list of dicts, in the order of the tree
+        of nested calls
+
+        Each dict has `path` (tuple of 'Class.method' names of the chain of
+        nested calls), `calls`, `wall`, `self_wall` (without the time spent
+        in the nested calls of nodes), `cpu` (in seconds) and `maxrss`
+        (largest process peak RSS growth during a call, in bytes).
+        """
+        return [dict(path=path, calls=s[0], wall=s[1], self_wall=s[2],
+                     cpu=s[3], maxrss=s[4])
+                for path, s in sorted(self._stats.iteritems())]
+
+    def as_table(self):
+        """Return aggregate statistics as a table in a string"""
+        table = [['@lnode', '@rcalls', '@rwall[s]', '@rself[s]', '@rcpu[s]',
+                  '@rprocess peak RSS growth[MB]']]
+        for s in self.stats:
+            path = s['path']
+            table.append(['@l' + '  ' * (len(path) - 1) + path[-1],
+                          '@r%d' % s['calls'],
+                          '@r%.3f' % s['wall'],
+                          '@r%.3f' % s['self_wall'],
+                          '@r%.3f' % s['cpu'],
+                          '@r%.1f' % (s['maxrss'] / 1048576.0)])
+        return table2string(table)
+
+    def to_chrome_trace(self, filename=None):
+        """Export recorded calls in Chrome's trace event format
+
+        Parameters
+        ----------
+        filename : str, optional
+          If provided, JSON gets stored into this file, which could be
+          loaded into chrome://tracing.
+
+        Returns
+        -------
+        dict
+          Trace events.
+        """
+        if not self._keep_events and len(self._stats):
+            raise RuntimeError("%s kept no events to export" % self)
+        events = [dict(name=name, cat='node', ph='X', pid=0, tid=0,
+                       ts=int((t0 - self._t0) * 1e6), dur=int(wall * 1e6),
+                       args=dict(cpu=cpu, maxrss=rss, depth=depth))
+                  for name, t0, wall, cpu, rss, depth in self._events]
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if filename is not None:
+            import json
+            with open(filename, 'w') as f:
+                json.dump(trace, f)
+        return trace
+
+    def __repr__(self):
+        return "%s(events=%r)" % (self.__class__.__name__, self._keep_events)
@@ -357,6 +357,9 @@ class ConditionalAttributesCollection(Collection):
           literal description. Usually just attribute name for the
           collection, e.g. 'ca'
         """
+        self.__enabled_cache = None
+        """Stamp and frozenset of enabled ca as of `enabled_set`"""
+
         Collection.__init__(self, items=items, name=name)
 
         self.__storedTemporarily = []
@@ -364,6 +367,12 @@ class ConditionalAttributesCollection(Collection):
         temporarily.
         """
 
+    def __setitem__(self, key, value):
+        Collection.__setitem__(self, key, value)
+        # the replaced one might have been enabled differently
+        _object_setattr(self, '_ConditionalAttributesCollection__enabled_cache',
+                        None)
+
     #
     # XXX TODO: figure out if there is a way to define proper
     #           __copy__'s for a hierarchy of classes. Probably we had
@@ -457,6 +466,25 @@ class ConditionalAttributesCollection(Collection):
         return key in self and self[key].enabled
 
 
+    @property
+    def enabled_set(self):
+        """Frozenset with the names of the enabled conditional attributes
+
+        It is cached until any conditional attribute gets enabled or
+        disabled, so inner loops could query it instead of `is_enabled`,
+        and skip all the bookkeeping if nothing is enabled.
+        """
+        stamp = (ConditionalAttribute._enabled_generation, len(self))
+        cache = self.__enabled_cache
+        if cache is None or cache[0] != stamp:
+            cache = (stamp, frozenset([k for k, v in self.iteritems()
+                                       if v.enabled]))
+            _object_setattr(self,
+                            '_ConditionalAttributesCollection__enabled_cache',
+                            cache)
+        return cache[1]
+
+
     def is_active(self, key):
         """Returns `True` if state `key` is known and is enabled"""
         return key in self and self.is_enabled(key)
@@ -14,9 +14,12 @@ import numpy as np
 
 def is_datasetlike(obj):
     """Check if an object looks like a Dataset."""
+    # collections might be provided by the class (e.g. lazily sliced ones),
+    # which should not be materialized by this check
+    cls = type(obj)
     if hasattr(obj, 'samples') and \
-       hasattr(obj, 'sa') and \
-       hasattr(obj, 'fa') and \
+       (hasattr(cls, 'sa') or hasattr(obj, 'sa')) and \
+       (hasattr(cls, 'fa') or hasattr(obj, 'fa')) and \
        hasattr(obj, 'a'):
         return True
 
@@ -29,6 +29,7 @@ from mvpa2.base.dochelpers import _str, _strid
 from mvpa2.clfs.transerror import ConfusionMatrix, RegressionStatistics
 
 from mvpa2.base import warning
+from mvpa2.base import profiling
 
 if __debug__:
     from mvpa2.base import debug
@@ -402,7 +403,11 @@ class Classifier(Learner):
 
         if self.__trainednfeatures > 0 \
                or 'notrain2predict' in self.__tags__:
-            result = self._predict(dataset)
+            profiler = profiling.active_profiler
+            if profiler is None:
+                result = self._predict(dataset)
+            else:
+                result = profiler.run(self, '_predict', self._predict, dataset)
         else:
             warning("Trying to predict using classifier trained on no features")
             if __debug__:
@@ -40,6 +40,34 @@ if __debug__:
 
 __all__ = [ "GNB", "GNBWeights"]
 
+
+def _log_likelihoods(data, means, variances, norm_weight):
+    """Log-likelihoods of samples under per-class Normal distributions
+
+    Computed for all classes, samples and features at once.
+
+    Parameters
+    ----------
+    data : array (nsamples x ...)
+    means, variances : array (nclasses x ...)
+      Parameters of the Normal distribution per class and feature.
+    norm_weight : array (nclasses x ...)
+      Log of normalization coefficient, i.e. ``-0.5 * log(2*pi*variances)``.
+
+    Returns
+    -------
+    array (nclasses x nsamples x nfeatures)
+      With dimensions of a single sample flattened, so it could be summed
+      across all features, or e.g. across the features of each ROI.
+    """
+    lprob = data[np.newaxis] - means[:, np.newaxis]
+    lprob *= lprob
+    lprob /= variances[:, np.newaxis]
+    lprob *= -0.5
+    lprob += norm_weight[:, np.newaxis]
+    return lprob.reshape(lprob.shape[:2] + (-1,))
+
+
 class GNB(Classifier):
     """Gaussian Naive Bayes `Classifier`.
 
@@ -166,23 +194,26 @@ class GNB(Classifier):
         self.ulabels = ulabels = targets_sa.unique
         nlabels = len(ulabels)
         label2index = dict((l, il) for il, l in enumerate(ulabels))
+        # index of the label of each sample
+        label_ids = np.array([label2index[l] for l in labels], dtype=int)
 
         # set the feature dimensions
         nsamples = len(X)
         s_shape = X.shape[1:]           # shape of a single sample
+        X_2d = X.reshape((nsamples, -1))
+
+        # samples of each class are summed up at once by product with
+        # one-hot encoding of the labels
+        onehot = (label_ids == np.arange(nlabels)[:, np.newaxis]).astype(float)
 
-        self.means = means = \
-                     np.zeros((nlabels, ) + s_shape)
-        self.variances = variances = \
-                     np.zeros((nlabels, ) + s_shape)
         # degenerate dimension are added for easy broadcasting later on
-        nsamples_per_class = np.zeros((nlabels,) + (1,)*len(s_shape))
+        nsamples_per_class = np.bincount(label_ids, minlength=nlabels) \
+                               .astype(float).reshape((nlabels,)
+                                                      + (1,)*len(s_shape))
 
-        # Estimate means and number of samples per each label
-        for s, l in zip(X, labels):
-            il = label2index[l]         # index of the label
-            nsamples_per_class[il] += 1
-            means[il] += s
+        # Estimate means
+        self.means = means = \
+                     np.dot(onehot, X_2d).reshape((nlabels, ) + s_shape)
 
         # helper function - squash all dimensions but 1
         squash = lambda x: np.atleast_1d(x.squeeze())
@@ -194,10 +225,11 @@ class GNB(Classifier):
         self.priors = self._get_priors(nlabels, nsamples, nsamples_per_class)
 
         # Estimate variances
-        # better loop than repmat! ;)
-        for s, l in zip(X, labels):
-            il = label2index[l]         # index of the label
-            variances[il] += (s - means[il])**2
+        resid = X_2d - means.reshape((nlabels, -1))[label_ids]
+        resid *= resid
+        self.variances = variances = \
+                     np.dot(onehot, resid).reshape((nlabels, ) + s_shape)
+        del resid
 
         ## Actually compute the variances
         if params.common_variance:
@@ -244,13 +276,9 @@ class GNB(Classifier):
         """
         params = self.params
         guard_overflows = params.guard_overflows
-        # argument of exponentiation
-        distances = (data - self.means[:, np.newaxis, ...])**2
         # If feature has no variance in any category, it would lead to /0 division
         # When distance == 0 for those, distance should remain 0. If not --
         # scaled distance should be set to ... ?
-        scaled_distances = -0.5 * distances / self.variances[:, np.newaxis, ...]
-
         variances0_mask = self.variances == 0  # class x feature
 
         ## If we had features without any variance in a given class,
@@ -258,9 +286,10 @@ class GNB(Classifier):
         ##  if distance is 0 and there were no variance -- probability is 1
         if np.any(variances0_mask):
             prob1_csf = np.logical_and(
-                distances == 0,  # class x sample x feature
-                variances0_mask[:, None, :]
+                data == self.means[:, np.newaxis],  # class x sample x feature
+                variances0_mask[:, np.newaxis]
             )
+            prob1_csf = prob1_csf.reshape(prob1_csf.shape[:2] + (-1,))
         else:
             prob1_csf = None
 
@@ -274,15 +303,10 @@ class GNB(Classifier):
             # simply discarded since it is common across features AND
             # classes
             # For completeness -- computing everything now even in logprob
-            lprob_csfs = self._norm_weight[:, np.newaxis, ...] \
-                         + scaled_distances
-
-            # XXX for now just cut/paste with different operators, but
-            #     could just bind them and reuse in the same equations
             # Naive part -- just a product of probabilities across features
-            ## First we need to reshape to get class x samples x features
-            lprob_csf = lprob_csfs.reshape(
-                lprob_csfs.shape[:2] + (-1,))
+            ## class x samples x features
+            lprob_csf = _log_likelihoods(data, self.means, self.variances,
+                                         self._norm_weight)
 
             if prob1_csf is not None:
                 # log(1) == 0
@@ -296,11 +320,15 @@ class GNB(Classifier):
             if guard_overflows:
                 assert np.all(np.isfinite(lprob_cs))
         else:
+            # argument of exponentiation, computed in-place
+            prob_csfs = data[np.newaxis] - self.means[:, np.newaxis]
+            prob_csfs *= prob_csfs
+            prob_csfs *= -0.5
+            prob_csfs /= self.variances[:, np.newaxis]
             # Just a regular Normal distribution with per
             # feature/class mean and variances
-            prob_csfs = \
-                 self._norm_weight[:, np.newaxis, ...] \
-                 * np.exp(scaled_distances)
+            np.exp(prob_csfs, out=prob_csfs)
+            prob_csfs *= self._norm_weight[:, np.newaxis]
 
             # Naive part -- just a product of probabilities across features
             ## First we need to reshape to get class x samples x features
@@ -210,6 +210,16 @@ def seq_to_svm_node(x):
 
 
 
+def _dense_array(x):
+    """Return x as a C-contiguous 2D array of doubles, or None if it is not
+    dense data, which could be passed to libsvm at once"""
+    if not isinstance(x, np.ndarray) or x.ndim != 2 or not len(x) \
+           or not np.issubdtype(x.dtype, np.number):
+        return None
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+
 class SVMProblem:
     def __init__(self, y, x):
         assert len(y) == len(x)
@@ -217,22 +227,30 @@ class SVMProblem:
         self.size = size = len(y)
 
         self.y_array = y_array = svmc.new_double(size)
-        for i in xrange(size):
-            svmc.double_setitem(y_array, i, y[i])
-
-        self.x_matrix = x_matrix = svmc.svm_node_matrix(size)
-        data = [None for i in xrange(size)]
-        maxlen = 0
-        for i in xrange(size):
-            x_i = x[i]
-            lx_i = len(x_i)
-            data[i] = d = seq_to_svm_node(x_i)
-            svmc.svm_node_matrix_set(x_matrix, i, d)
-            if isinstance(x_i, dict):
-                if (lx_i > 0):
-                    maxlen = max(maxlen, max(x_i.keys()))
-            else:
-                maxlen = max(maxlen, lx_i)
+        svmc.double_array_set_from_numpy_array(
+            y_array, np.ascontiguousarray(y, dtype=np.float64))
+
+        dense_x = _dense_array(x)
+        if dense_x is not None:
+            # convert all samples in a single call
+            self.x_matrix = x_matrix = \
+                svmc.svm_node_matrix_from_numpy_array(dense_x)
+            data = None
+            maxlen = dense_x.shape[1]
+        else:
+            self.x_matrix = x_matrix = svmc.svm_node_matrix(size)
+            data = [None for i in xrange(size)]
+            maxlen = 0
+            for i in xrange(size):
+                x_i = x[i]
+                lx_i = len(x_i)
+                data[i] = d = seq_to_svm_node(x_i)
+                svmc.svm_node_matrix_set(x_matrix, i, d)
+                if isinstance(x_i, dict):
+                    if (lx_i > 0):
+                        maxlen = max(maxlen, max(x_i.keys()))
+                else:
+                    maxlen = max(maxlen, lx_i)
 
         # bind to instance
         self.data = data
@@ -253,9 +271,12 @@ class SVMProblem:
         del self.prob
         if svmc is not None:
             svmc.delete_double(self.y_array)
-        for i in range(self.size):
-            svmc.svm_node_array_destroy(self.data[i])
-        svmc.svm_node_matrix_destroy(self.x_matrix)
+        if self.data is None:
+            svmc.svm_node_matrix_dense_destroy(self.x_matrix)
+        else:
+            for i in range(self.size):
+                svmc.svm_node_array_destroy(self.data[i])
+            svmc.svm_node_matrix_destroy(self.x_matrix)
         del self.data
         del self.x_matrix
 
@@ -346,7 +367,15 @@ class SVMModel:
 
     ##REF: Name was automagically refactored
     def predict_values(self, x):
-        v = self.predict_values_raw(x)
+        return self.values_to_dict(self.predict_values_raw(x))
+
+
+    def values_to_dict(self, v):
+        """Return raw decision values `v` of a sample by pairs of labels
+
+        For regression and one-class models just the single decision
+        value gets returned.
+        """
         if self.svm_type == NU_SVR \
            or self.svm_type == EPSILON_SVR \
            or self.svm_type == ONE_CLASS:
@@ -362,8 +391,8 @@ class SVMModel:
             return  d
 
 
-    ##REF: Name was automagically refactored
-    def predict_probability(self, x):
+    def check_probability(self):
+        """Raise TypeError if the model provides no probability estimates"""
         #c code will do nothing on wrong type, so we have to check ourself
         if self.svm_type == NU_SVR or self.svm_type == EPSILON_SVR:
             raise TypeError, "call get_svr_probability or get_svr_pdf " \
@@ -375,6 +404,11 @@ class SVMModel:
         if not self.probability:
             raise TypeError, "model does not support probability estimates"
 
+
+    ##REF: Name was automagically refactored
+    def predict_probability(self, x):
+        self.check_probability()
+
         #convert x into SVMNode, alloc a double array to receive probabilities
         data = seq_to_svm_node(x)
         dblarr = svmc.new_double(self.nr_class)
@@ -388,6 +422,52 @@ class SVMModel:
         return pred, p
 
 
+    def predict_all(self, x, values=False, probability=False):
+        """Predict all samples of a 2D array in a single call to libsvm
+
+        Parameters
+        ----------
+        x : array (nsamples x nfeatures)
+        values : bool
+          Either to return raw decision values as well.
+        probability : bool
+          Either to return probability estimates as well.
+
+        Returns
+        -------
+        predictions : array (nsamples,)
+        values : array (nsamples x nr_class*(nr_class-1)/2) or None
+        prob_predictions : array (nsamples,) or None
+          Predictions based on probability estimates.
+        probabilities : array (nsamples x nr_class) or None
+          Probability estimates, columns in the order of `labels`.
+        """
+        if probability:
+            self.check_probability()
+        x = np.asarray(x)
+        nsamples = len(x)
+        predictions = np.empty(nsamples)
+        dec_values = prob_predictions = probabilities = None
+        if values:
+            dec_values = np.empty(
+                (nsamples, self.nr_class * (self.nr_class - 1) // 2))
+        if probability:
+            prob_predictions = np.empty(nsamples)
+            probabilities = np.empty((nsamples, self.nr_class))
+        if nsamples:
+            dense_x = _dense_array(x)
+            if dense_x is None:
+                raise ValueError("Expected 2D array of numbers, got %r" % (x,))
+            matrix = svmc.svm_node_matrix_from_numpy_array(dense_x)
+            try:
+                svmc.svm_predict_matrix(self.model, matrix, nsamples,
+                                        predictions, dec_values,
+                                        probabilities, prob_predictions)
+            finally:
+                svmc.svm_node_matrix_dense_destroy(matrix)
+        return predictions, dec_values, prob_predictions, probabilities
+
+
     ##REF: Name was automagically refactored
     def get_svr_probability(self):
         #leave the Error checking to svm.cpp code
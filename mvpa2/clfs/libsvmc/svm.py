@@ -23,7 +23,7 @@ from mvpa2.clfs.base import accepts_dataset_as_samples, \
 from mvpa2.clfs._svmbase import _SVM
 
 from mvpa2.clfs.libsvmc import _svm
-from mvpa2.kernels.libsvm import LinearLSKernel
+from mvpa2.kernels.libsvm import LSKernel, LinearLSKernel
 from mvpa2.clfs.libsvmc.sens import LinearSVMWeights
 
 from mvpa2.support.due import due, Doi, BibTeX
@@ -46,6 +46,13 @@ class SVM(_SVM):
     """Support Vector Machine Classifier.
 
     This is a simple interface to the libSVM package.
+
+    Besides LibSVM's own kernels (see `mvpa2.kernels.libsvm`), any kernel
+    convertible to a Numpy one could be used.  Such a kernel gets computed
+    by PyMVPA and handed to LibSVM as a precomputed one.  With a
+    `CachedKernel` the kernel matrix is computed only once for the whole
+    dataset and merely looked up while training and testing on subsets of
+    it, e.g. across the folds of a cross-validation and values of C.
     """
 
     # Since this is internal feature of LibSVM, this conditional attribute is present
@@ -112,6 +119,14 @@ class SVM(_SVM):
         # init base class
         _SVM.__init__(self, **kwargs)
 
+        if not isinstance(self.params.kernel, LSKernel):
+            # support vectors of a precomputed kernel are rows of the kernel
+            # matrix, so there are no feature weights even for linear ones
+            self.__tags__ = [t for t in self.__tags__
+                             if not t in ('linear', 'has_sensitivity')]
+            if not 'non-linear' in self.__tags__:
+                self.__tags__.append('non-linear')
+
         self._svm_type = self._KNOWN_IMPLEMENTATIONS[svm_impl][0]
 
         if 'nu' in self._KNOWN_PARAMS and 'epsilon' in self._KNOWN_PARAMS:
@@ -122,6 +137,9 @@ class SVM(_SVM):
         self.__model = None
         """Holds the trained SVM."""
 
+        self.__traindataset = None
+        """Training dataset, if the kernel is precomputed"""
+
 
     @due.dcite(
         Doi('10.1145/1961189.1961199'),
@@ -138,8 +156,16 @@ class SVM(_SVM):
         targets_sa_name = self.get_space()    # name of targets sa
         targets_sa = dataset.sa[targets_sa_name] # actual targets sa
 
-        # libsvm needs doubles
-        src = _data2ls(dataset)
+        kernel = self.params.kernel
+        if isinstance(kernel, LSKernel):
+            # libsvm needs doubles
+            src = _data2ls(dataset)
+            kernel_type = kernel.as_raw_ls() # Just an integer ID
+            self.__traindataset = None
+        else:
+            src = self._get_precomputed_kernel(dataset)
+            kernel_type = PRECOMPUTED
+            self.__traindataset = dataset
 
         # libsvm cannot handle literal labels
         labels = self._attrmap.to_numeric(targets_sa.value).tolist()
@@ -167,7 +193,7 @@ class SVM(_SVM):
         # **kwargs and create appropriate parameters within .params or
         # .kernel_params
         libsvm_param = _svm.SVMParameter(
-            kernel_type=self.params.kernel.as_raw_ls(),# Just an integer ID
+            kernel_type=kernel_type,
             svm_type=self._svm_type,
             **dict(args))
 
@@ -201,15 +227,32 @@ class SVM(_SVM):
     def _predict(self, data):
         """Predict values for the data
         """
-        # libsvm needs doubles
-        src = _data2ls(data)
+        if self.__traindataset is None:
+            # libsvm needs doubles
+            src = _data2ls(data)
+        else:
+            src = self._get_precomputed_kernel(data, self.__traindataset)
         ca = self.ca
+        model = self.model
 
-        predictions = [ self.model.predict(p) for p in src ]
+        probability = ca.is_enabled("probabilities")
+        if probability:
+            try:
+                model.check_probability()
+            except TypeError:
+                warning("Current SVM %s doesn't support probability " %
+                        self + " estimation.")
+                probability = False
+
+        # all samples are predicted at once
+        predictions, values, prob_predictions, probabilities = \
+            model.predict_all(src, values=ca.is_enabled('estimates'),
+                              probability=probability)
+        predictions = predictions.tolist()
 
         if ca.is_enabled('estimates'):
             if self.__is_regression__:
-                estimates = [ self.model.predict_values_raw(p)[0] for p in src ]
+                estimates = values[:, 0].tolist()
             else:
                 # if 'trained_targets' are literal they have to be mapped
                 if ( np.issubdtype(self.ca.trained_targets.dtype, 'c') or
@@ -219,45 +262,51 @@ class SVM(_SVM):
                 else:
                     trained_targets = self.ca.trained_targets
                 nlabels = len(trained_targets)
-                # XXX We do duplicate work. model.predict calls
-                # predict_values_raw internally and then does voting or
-                # thresholding. So if speed becomes a factor we might
-                # want to move out logic from libsvm over here to base
-                # predictions on obtined values, or adjust libsvm to
-                # spit out values from predict() as well
                 if nlabels == 2 and self._svm_impl != 'ONE_CLASS':
                     # Apperently libsvm reorders labels so we need to
                     # track (1,0) values instead of (0,1) thus just
                     # lets take negative reverse
-                    estimates = [ self.model.predict_values(p)[(trained_targets[1],
-                                                            trained_targets[0])]
-                               for p in src ]
-                    if len(estimates) > 0:
-                        if __debug__:
-                            debug("SVM",
-                                  "Forcing estimates to be ndarray and reshaping"
-                                  " them into 1D vector")
-                        estimates = np.asarray(estimates).reshape(len(estimates))
+                    estimates = values[:, 0]
+                    if model.labels[0] != trained_targets[1]:
+                        estimates = -estimates
+                    if len(estimates) == 0:
+                        estimates = []
                 else:
                     # In multiclass we return dictionary for all pairs
                     # of labels, since libsvm does 1-vs-1 pairs
-                    estimates = [ self.model.predict_values(p) for p in src ]
+                    estimates = [ model.values_to_dict(v) for v in values ]
             ca.estimates = estimates
 
-        if ca.is_enabled("probabilities"):
-            # XXX Is this really necesssary? yoh don't think so since
-            # assignment to ca is doing the same
-            #self.probabilities = [ self.model.predict_probability(p)
-            #                       for p in src ]
-            try:
-                ca.probabilities = [ self.model.predict_probability(p)
-                                         for p in src ]
-            except TypeError:
-                warning("Current SVM %s doesn't support probability " %
-                        self + " estimation.")
+        if probability:
+            labels = model.labels
+            ca.probabilities = [ (p, dict(zip(labels, probs)))
+                                 for p, probs in zip(prob_predictions.tolist(),
+                                                     probabilities.tolist()) ]
         return predictions
 
 
+    def get_sensitivity_analyzer(self, **kwargs):
+        """Returns an appropriate SensitivityAnalyzer."""
+        if not isinstance(self.params.kernel, LSKernel):
+            raise NotImplementedError(
+                "Sensitivity analyzers are not available for kernel %s, "
+                "since it is handed to LibSVM as a precomputed one"
+                % self.params.kernel)
+        return super(SVM, self).get_sensitivity_analyzer(**kwargs)
+
+
+    def _get_precomputed_kernel(self, ds1, ds2=None):
+        """Compute kernel between samples of ds1 and ds2 (defaults to ds1)
+        in the layout LibSVM expects for precomputed kernels
+        """
+        kernel = self.params.kernel
+        kernel.compute(ds1, ds2)
+        k = _data2ls(kernel.as_raw_np())
+        # first column holds the 1-based serial numbers of the samples,
+        # which are used by libsvm to look up kernel values of the SVs
+        return np.hstack((np.arange(1, len(k) + 1)[:, None], k))
+
+
     def summary(self):
         """Provide quick summary over the SVM classifier
         """
@@ -287,6 +336,7 @@ class SVM(_SVM):
         super(SVM, self)._untrain()
         del self.__model
         self.__model = None
+        self.__traindataset = None
 
     model = property(fget=lambda self: self.__model)
     """Access to the SVM model."""
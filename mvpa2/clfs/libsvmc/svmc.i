@@ -279,6 +279,93 @@ void svm_node_matrix_destroy(struct svm_node **matrix)
 	free(matrix);
 }
 
+/* copy a contiguous 1D array of doubles into a double array */
+void double_array_set_from_numpy_array(double *array, PyObject *values)
+{
+	PyArrayObject* a = (PyArrayObject*) values;
+	memcpy(array, PyArray_DATA(a), sizeof(double)*PyArray_SIZE(a));
+}
+
+/* convert a contiguous 2D array of doubles into a dense node matrix
+ * at once. All nodes are allocated in a single block, which is
+ * pointed to by the first row (see svm_node_matrix_dense_destroy)
+ */
+struct svm_node **svm_node_matrix_from_numpy_array(PyObject *samples)
+{
+	PyArrayObject* a = (PyArrayObject*) samples;
+	int rows = (int)PyArray_DIM(a, 0);
+	int cols = (int)PyArray_DIM(a, 1);
+	double* data = (double *)PyArray_DATA(a);
+
+	struct svm_node **matrix = svm_node_matrix(rows);
+	struct svm_node *nodes = svm_node_array(rows*(cols+1));
+
+	int i,j;
+	for (i = 0; i<rows; ++i)
+	{
+		matrix[i] = nodes;
+		for (j = 0; j<cols; ++j)
+		{
+			nodes[j].index = j;
+			nodes[j].value = data[cols*i+j];
+		}
+		nodes[cols].index = -1;
+		nodes[cols].value = 0.0;
+		nodes += cols+1;
+	}
+	return matrix;
+}
+
+void svm_node_matrix_dense_destroy(struct svm_node **matrix)
+{
+	free(matrix[0]);
+	free(matrix);
+}
+
+/* predict all rows of a node matrix at once. Results are stored into
+ * contiguous arrays of doubles: predictions (rows), and unless None
+ * decision values (rows x nr_class*(nr_class-1)/2), probability
+ * estimates (rows x nr_class) and predictions based on them (rows)
+ */
+void svm_predict_matrix(const struct svm_model *model,
+						struct svm_node **matrix, int rows,
+						PyObject *predictions, PyObject *dec_values,
+						PyObject *prob_estimates, PyObject *prob_predictions)
+{
+	int nr_class = svm_get_nr_class(model);
+	int nr_dec = nr_class*(nr_class-1)/2;
+	double *pred = (double *)PyArray_DATA((PyArrayObject*) predictions);
+	double *dec = dec_values == Py_None ? NULL
+		: (double *)PyArray_DATA((PyArrayObject*) dec_values);
+	double *prob = prob_estimates == Py_None ? NULL
+		: (double *)PyArray_DATA((PyArrayObject*) prob_estimates);
+	double *prob_pred = prob_predictions == Py_None ? NULL
+		: (double *)PyArray_DATA((PyArrayObject*) prob_predictions);
+
+	int i;
+	for (i = 0; i<rows; ++i)
+	{
+		if (dec)
+		{
+#if LIBSVM_VERSION >= 300
+			pred[i] = svm_predict_values(model, matrix[i], dec + i*nr_dec);
+#else
+			svm_predict_values(model, matrix[i], dec + i*nr_dec);
+			pred[i] = svm_predict(model, matrix[i]);
+#endif
+		}
+		else
+			pred[i] = svm_predict(model, matrix[i]);
+		if (prob)
+		{
+			double p = svm_predict_probability(model, matrix[i],
+											   prob + i*nr_class);
+			if (prob_pred)
+				prob_pred[i] = p;
+		}
+	}
+}
+
 void svm_destroy_model_helper(svm_model *model_ptr)
 {
 #if LIBSVM_VERSION >= 300
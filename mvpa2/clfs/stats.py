@@ -324,9 +324,13 @@ class MCNullDist(NullDist):
     skipped = ConditionalAttribute(enabled=True,
                   doc='# of the samples which were skipped because '
                       'measure has failed to evaluated at them')
+    npermutations = ConditionalAttribute(enabled=False,
+                  doc='Number of permutations each element was evaluated '
+                      'for (differs between elements only with '
+                      '`sequential_stop`)')
 
     def __init__(self, permutator, dist_class=Nonparametric, measure=None,
-                 **kwargs):
+                 sequential_stop=None, **kwargs):
         """Initialize Monte-Carlo Permutation Null-hypothesis testing
 
         Parameters
@@ -341,12 +345,33 @@ class MCNullDist(NullDist):
         measure : Measure or None
           Optional measure that is used to compute results on permuted
           data. If None, a measure needs to be passed to ``fit()``.
+        sequential_stop : int or None
+          If not None, permutation testing is done sequentially
+          (Besag & Clifford, 1991): ``fit()`` computes the measure on the
+          original data and, for each element of the result, permutations
+          stop as soon as this many permuted values were at least as extreme
+          as the original one (in the tested tail(s)).  P-values of such
+          elements are estimated from the permutations done so far, while
+          elements which are likely to be significant get all permutations.
+          Searchlights are re-evaluated only for the ROIs that are still
+          undecided, and featurewise measures (other than sensitivities)
+          only on the features that are still undecided -- i.e. they must
+          compute each feature independently of the others.  Requires
+          `dist_class` to be `Nonparametric`.
         """
         NullDist.__init__(self, **kwargs)
 
+        if sequential_stop is not None:
+            if not dist_class is Nonparametric:
+                raise ValueError("sequential_stop requires Nonparametric "
+                                 "distribution (got %s)" % (dist_class,))
+            if sequential_stop < 1:
+                raise ValueError("sequential_stop must be a positive number "
+                                 "(got %r)" % (sequential_stop,))
         self._dist_class = dist_class
         self._dist = []                 # actual distributions
         self._measure = measure
+        self._sequential_stop = sequential_stop
 
         self.__permutator = permutator
 
@@ -356,11 +381,15 @@ class MCNullDist(NullDist):
         prefixes_ = ["%s" % self.__permutator]
         if self._dist_class != Nonparametric:
             prefixes_.insert(0, 'dist_class=%r' % (self._dist_class,))
+        if self._sequential_stop is not None:
+            prefixes_.append('sequential_stop=%r' % (self._sequential_stop,))
         return super(MCNullDist, self).__repr__(
             prefixes=prefixes_ + prefixes)
 
 
-    def fit(self, measure, ds):
+    sequential_stop = property(fget=lambda self: self._sequential_stop)
+
+    def fit(self, measure, ds, observed=None):
         """Fit the distribution by performing multiple cycles which repeatedly
         permuted labels in the training dataset.
 
@@ -371,6 +400,9 @@ class MCNullDist(NullDist):
           if a measure instance has been provided to the constructor.
         ds: `Dataset` which gets permuted and used to compute the
           measure/transfer error multiple times.
+        observed: Dataset or None
+          Result of the measure on the original `ds`, to compare permuted
+          results against with `sequential_stop`.  If None, it is computed.
         """
         # TODO: place exceptions separately so we could avoid circular imports
         from mvpa2.base.learner import LearnerError
@@ -383,6 +415,10 @@ class MCNullDist(NullDist):
             measure = self._measure
             measure.untrain()
 
+        if self._sequential_stop is not None:
+            self._fit_sequential(measure, ds, observed)
+            return
+
         dist_samples = []
         """Holds the values for randomized labels."""
 
@@ -456,6 +492,115 @@ class MCNullDist(NullDist):
         self._dist = dist
 
 
+    def _fit_sequential(self, measure, ds, observed=None):
+        """Fit Nonparametric distributions with sequential stopping"""
+        from mvpa2.base.learner import LearnerError
+        from mvpa2.measures.base import FeaturewiseMeasure, Sensitivity
+        from mvpa2.measures.searchlight import BaseSearchlight
+
+        h = self._sequential_stop
+        tail = self.tail
+
+        if observed is None:
+            observed = measure(ds)
+        orig = np.asanyarray(getattr(observed, 'samples', observed))
+        shape = orig.shape
+        orig = orig.reshape(-1)
+        nelements = len(orig)
+
+        # searchlights can be restricted to ROIs which are still undecided,
+        # featurewise measures to features which are still undecided.
+        # Sensitivities are excluded, since their values depend on all
+        # features a classifier was trained on
+        center_ids = None
+        restrict_features = isinstance(measure, FeaturewiseMeasure) \
+                            and not isinstance(measure, Sensitivity) \
+                            and len(shape) == 2 and shape[1] == ds.nfeatures
+        if isinstance(measure, BaseSearchlight) and len(shape) == 2:
+            roi_ids = measure.roi_ids
+            if roi_ids is None:
+                center_ids = np.asarray(measure.queryengine.ids)
+            elif isinstance(roi_ids, str):
+                center_ids = ds.fa[roi_ids].value.nonzero()[0]
+            else:
+                center_ids = np.asarray(roi_ids)
+            if len(center_ids) != shape[1]:
+                # cannot map results to ROIs
+                center_ids = None
+        restrict_columns = center_ids is not None or restrict_features
+        if restrict_columns:
+            active_columns = np.ones(shape[1], dtype=bool)
+
+        undecided = np.ones(nelements, dtype=bool)
+        nleft = np.zeros(nelements, dtype=int)
+        nright = np.zeros(nelements, dtype=int)
+        dist_samples = []
+        skipped = 0
+        try:
+            for p, permuted_ds in enumerate(self.__permutator.generate(ds)):
+                if __debug__:
+                    debug('STATMC', "Doing %i permutations: %i (%i undecided)"
+                          % (self.__permutator.count, p + 1, undecided.sum()),
+                          cr=True)
+                if restrict_features and not active_columns.all():
+                    permuted_ds = permuted_ds[:, active_columns]
+                try:
+                    res = np.asanyarray(measure(permuted_ds).samples)
+                except LearnerError, e:
+                    warning('Failed to obtain value from %s due to %s.  '
+                            'Measurement was skipped, which could lead to '
+                            'unstable and/or incorrect assessment of the '
+                            'null_dist' % (measure, e))
+                    skipped += 1
+                    continue
+                values = np.empty(shape)
+                values.fill(np.nan)
+                if restrict_columns:
+                    values[:, active_columns] = res
+                else:
+                    values[:] = res.reshape(shape)
+                values = values.reshape(-1)
+                values[~undecided] = np.nan
+                dist_samples.append(values)
+
+                nleft[undecided] += values[undecided] <= orig[undecided]
+                nright[undecided] += values[undecided] >= orig[undecided]
+                if tail == 'left':
+                    nextreme = nleft
+                elif tail == 'right':
+                    nextreme = nright
+                else:
+                    nextreme = np.minimum(nleft, nright)
+                undecided &= nextreme < h
+                if not undecided.any():
+                    break
+                if restrict_columns:
+                    columns = undecided.reshape(shape).any(axis=0)
+                    if not np.all(columns == active_columns):
+                        active_columns = columns
+                        if center_ids is not None:
+                            measure.roi_ids = center_ids[active_columns]
+        finally:
+            if center_ids is not None:
+                measure.roi_ids = roi_ids
+
+        self.ca.skipped = skipped
+        if not len(dist_samples):
+            raise RuntimeError(
+                'Failed to obtain any value from %s. %d measurements were '
+                'skipped. Check above warnings, and your code/data'
+                % (measure, skipped))
+
+        # (npermutations x nelements) with NaNs for dropped elements
+        dist_samples = np.array(dist_samples)
+        valid = ~np.isnan(dist_samples)
+        self.ca.npermutations = valid.sum(axis=0).reshape(shape)
+        self.ca.dist_samples = Dataset(np.rollaxis(
+            dist_samples.reshape((-1,) + shape), 0, len(shape) + 1))
+        self._dist = [self._dist_class(*self._dist_class.fit(samples[v]))
+                      for samples, v in zip(dist_samples.T, valid.T)]
+
+
     def _cdf(self, x, cdf_func):
         """Return value of the cumulative distribution function at `x`.
         """
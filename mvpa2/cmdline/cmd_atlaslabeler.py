@@ -32,7 +32,7 @@ mask_vt.nii.gz and provided in '-f' argument.
 
 __docformat__ = 'restructuredtext'
 
-import re, sys, os
+import re, sys, os, itertools
 import argparse
 
 import mvpa2
@@ -115,6 +115,61 @@ def parsed_coordinates_iterator(
             yield (v, ctype(r['x']), ctype(r['y']), ctype(r['z']), t)
 
 
+def labeled_coordinates_iterator(atlas, coordsIterator, coordT=None,
+                                 query_voxel=False, levels=None,
+                                 lt=None, ut=None, batch_size=4096):
+    """Iterator to provide coordinates along with their atlas labels
+
+    Coordinates with values outside of the thresholds are skipped. The
+    others are transformed and looked up in the atlas in batches of
+    `batch_size`, which is much faster than querying one at a time.
+
+    Returns
+    -------
+    tuple with value, original coordinates, time and the atlas result
+    """
+    while True:
+        batch = []
+        n_read = 0
+        for c in itertools.islice(coordsIterator, batch_size):
+            n_read += 1
+            value, coord_orig, t = c[0], c[1:4], c[4]
+            if __debug__:
+                debug('ATL', "Obtained coord_orig=%s with value %s"
+                      % (repr(coord_orig), value))
+
+            if lt is not None and value < lt:
+                verbose(5, "Value %s is less than lower threshold %s, thus voxel "
+                        "is skipped" % (value, lt))
+                continue
+            if ut is not None and value > ut:
+                verbose(5, "Value %s is greater than upper threshold %s, thus voxel "
+                        "is skipped" % (value, ut))
+                continue
+
+            batch.append((value, np.array(coord_orig), t))
+
+        if n_read == 0:
+            break
+        if not batch:
+            continue
+
+        # Apply necessary transformations
+        coords = [coord_orig for _, coord_orig, _ in batch]
+        if coordT:
+            # rows stay arrays, as coordT[coord_orig] would return
+            coords = list(coordT.transform_many(coords))
+
+        # Query labels
+        if query_voxel:
+            voxels = atlas.label_voxels(coords, levels)
+        else:
+            voxels = atlas.label_points(coords, levels)
+
+        for (value, coord_orig, t), voxel in zip(batch, voxels):
+            yield value, coord_orig, t, voxel
+
+
 # XXX helper to process labels... move me
 ##REF: Name was automagically refactored
 def present_labels(args, labels):
@@ -684,38 +739,15 @@ def run(args):
             raise NotImplementedError, \
                   "query_voxel was reset to False, can't do queries by voxel"
 
-    # Read coordinates
+    # Read coordinates and query labels for them in batches
     numVoxels = 0
-    for c in coordsIterator:
-
-        value, coord_orig, t = c[0], c[1:4], c[4]
-        if __debug__:
-            debug('ATL', "Obtained coord_orig=%s with value %s"
-                  % (repr(coord_orig), value))
-
-        lt, ut = args.lowerThreshold, args.upperThreshold
-        if lt is not None and value < lt:
-            verbose(5, "Value %s is less than lower threshold %s, thus voxel "
-                    "is skipped" % (value, args.lowerThreshold))
-            continue
-        if ut is not None and value > ut:
-            verbose(5, "Value %s is greater than upper threshold %s, thus voxel "
-                    "is skipped" % (value, args.upperThreshold))
-            continue
+    for value, coord_orig, t, voxel in labeled_coordinates_iterator(
+            atlas, coordsIterator, coordT=coordT, query_voxel=query_voxel,
+            levels=args.levels, lt=args.lowerThreshold,
+            ut=args.upperThreshold):
 
         numVoxels += 1
 
-        # Apply necessary transformations
-        coord = coord_orig = np.array(coord_orig)
-
-        if coordT:
-            coord = coordT[ coord_orig ]
-
-        # Query label
-        if query_voxel:
-            voxel = atlas[coord]
-        else:
-            voxel = atlas(coord)
         voxel['coord_orig'] = coord_orig
         voxel['value'] = value
         voxel['t'] = t
@@ -191,10 +191,31 @@ def _evvars2ds(ds, evvars, eprefix):
     return ds
 
 
+def _times2idx(times, tvec, strategy):
+    """Vectorized `value2idx` for an ascending `tvec`
+    """
+    n = len(tvec)
+    # last sample not later than the time, and first one not earlier
+    prev = np.searchsorted(tvec, times, side='right') - 1
+    next_ = np.searchsorted(tvec, times, side='left')
+    # as value2idx, take the first of identical time-stamps
+    prev_ = np.searchsorted(tvec, tvec[np.maximum(prev, 0)], side='left')
+    if strategy == 'floor':
+        return np.where(prev < 0, 0, prev_)
+    elif strategy == 'ceil':
+        return np.where(next_ >= n, 0, next_)
+    elif strategy == 'round':
+        closer_next = tvec[np.minimum(next_, n - 1)] - times \
+                      < times - tvec[np.maximum(prev, 0)]
+        return np.where((prev < 0) | ((next_ < n) & closer_next),
+                        next_, prev_)
+    raise ValueError("Unknown resolving method '%s'." % strategy)
+
+
 def extract_boxcar_event_samples(
         ds, events=None, time_attr=None, match='prev',
         event_offset=None, event_duration=None,
-        eprefix='event', event_mapper=None):
+        eprefix='event', event_mapper=None, strided=False):
     """Segment a dataset by extracting boxcar events
 
     (Multiple) consecutive samples are extracted for each event, and are either
@@ -266,6 +287,12 @@ def extract_boxcar_event_samples(
       e.g. averaging samples within an event boxcar using an FxMapper. Any
       mapper needs to keep the sample axis unchanged, i.e. number and order of
       samples remain the same.
+    strided : bool
+      If True, evenly spaced events of equal duration are extracted as a
+      read-only view of the input samples (see
+      `~mvpa2.mappers.boxcar.BoxcarMapper`), so that only the
+      ``event_mapper`` (e.g. an average across each boxcar) allocates new
+      samples.  The default flattening always copies.
 
     Returns
     -------
@@ -329,20 +356,28 @@ def extract_boxcar_event_samples(
     if time_attr is not None:
         tvec = ds.sa[time_attr].value
         # we are asked to convert onset time into sample ids
+        onsets = np.array([ev['onset'] for ev in events])
+        ends = onsets + np.array([ev['duration'] for ev in events])
+        if np.all(np.diff(tvec) >= 0):
+            # best matching samples
+            idxs = _times2idx(onsets, tvec, conv_strategy)
+            # figure out how many samples we need
+            durations = np.searchsorted(tvec, ends, side='left') - idxs
+        else:
+            # e.g. time restarting with each run -- search the hard way
+            idxs = [value2idx(onset, tvec, conv_strategy) for onset in onsets]
+            durations = [np.sum(tvec[idx:] < end)
+                         for idx, end in zip(idxs, ends)]
         descr_events = []
-        for ev in events:
+        for ev, idx, duration in zip(events, idxs, durations):
             # do not mess with the input data
             ev = copy.deepcopy(ev)
-            # best matching sample
-            idx = value2idx(ev['onset'], tvec, conv_strategy)
             # store offset of sample time and real onset
             ev['orig_offset'] = ev['onset'] - tvec[idx]
             # rescue the real onset into a new attribute
             ev['orig_onset'] = ev['onset']
             ev['orig_duration'] = ev['duration']
-            # figure out how many samples we need
-            ev['duration'] = \
-                    len(tvec[idx:][tvec[idx:] < ev['onset'] + ev['duration']])
+            ev['duration'] = max(int(duration), 0)
             # new onset is sample index
             ev['onset'] = idx
             descr_events.append(ev)
@@ -363,7 +398,8 @@ def extract_boxcar_event_samples(
                     'provided Events.'% boxlength)
 
     # finally create, train und use the boxcar mapper
-    bcm = BoxcarMapper(evvars['onset'], boxlength, space=eprefix)
+    bcm = BoxcarMapper(evvars['onset'], boxlength, space=eprefix,
+                       strided=strided)
     bcm.train(ds)
     ds = ds.get_mapped(bcm)
     if event_mapper is None:
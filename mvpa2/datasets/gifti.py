@@ -176,7 +176,7 @@ def map2gifti(ds, filename=None, encoding='GIFTI_ENCODING_B64GZ',
             # no attributes
             return None
 
-        attr_collection = ds.__dict__.get(attr_name)
+        attr_collection = getattr(ds, attr_name, None)
 
         if isinstance(keys_, basestring):
             keys_ = (keys_,)
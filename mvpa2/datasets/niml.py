@@ -431,19 +431,29 @@ def write(fn, ds, form='binary'):
 
 
 
-def read(fn):
+def read(fn, columns=None):
     '''Read a Dataset from a file in NIML format
 
     Parameters
     ----------
     fn: str
         Filename
+    columns: None or list of int
+        If not None, only these columns (i.e. samples) are read. For
+        NIML files the other columns are skipped while parsing.
     '''
 
-    readers_converters = {('.dset',): (niml_dset.read, from_niml)}
+    dset_reader = niml_dset.read
+    if columns is not None:
+        dset_reader = lambda x: niml_dset.read(x, columns=columns)
+
+    readers_converters = {('.dset',): (dset_reader, from_niml)}
 
     if externals.exists('h5py'):
-        readers_converters[('.h5py', '.hdf')] = (h5load, None)
+        h5_reader = h5load
+        if columns is not None:
+            h5_reader = lambda x: h5load(x)[columns]
+        readers_converters[('.h5py', '.hdf')] = (h5_reader, None)
 
     keys = [exts for exts in readers_converters.iterkeys()
             if any(fn.endswith(ext) for ext in exts)]
@@ -10,6 +10,8 @@
 
 __docformat__ = 'restructuredtext'
 
+import hashlib
+
 import numpy as np
 
 from mvpa2.base.dochelpers import _repr_attrs
@@ -39,10 +41,18 @@ class Partitioner(Node):
     datasets are not modified. In particular, there is no splitting of datasets
     into multiple pieces. If this is desired, a Partitioner can be chained to a
     `Splitter` node to achieve this.
+
+    Partition attributes for all partition sets (see `get_partitions`) are
+    computed only once per unique content of the sample attribute used to
+    determine splits, so partitioning datasets with the same layout over and
+    over again (e.g. for every sphere of a searchlight) is cheap.
     """
 
     _STRATEGIES = ('first', 'random', 'equidistant')
 
+    _PLANS_CACHE_SIZE = 16
+    """Maximal number of different layouts to keep partitions for"""
+
     def __init__(self,
                  count=None,
                  selection_strategy='equidistant',
@@ -78,6 +88,7 @@ class Partitioner(Node):
         # TODO utilize such (or similar) policy through out the code
         self.count = count
         self._set_selection_strategy(selection_strategy)
+        self.__plans = {}
 
 
     def __repr__(self, prefixes=None):
@@ -118,20 +129,88 @@ class Partitioner(Node):
 
     def generate(self, ds):
         # for each split
-        cfgs = self.get_partition_specs(ds)
-        n_cfgs = len(cfgs)
+        plan = self.get_partitions(ds)
+        n_cfgs = len(plan)
 
-        for iparts, parts in enumerate(cfgs):
-            # give attribute array defining the current partition set
-            pattr = self.get_partitions_attr(ds, parts)
+        for iparts, pattr in enumerate(plan):
             # shallow copy of the dataset
             pds = ds.copy(deep=False)
-            pds.sa[self.get_space()] = pattr
+            # give attribute array defining the current partition set
+            pds.sa[self.get_space()] = pattr.copy()
             pds.a[self.get_space() + "_set"] = iparts
             pds.a['lastpartitionset'] = iparts == (n_cfgs - 1)
             yield pds
 
 
+    def _get_plan_key(self, values):
+        """Key for the cache of partitions, or None if not to be cached"""
+        if self.count is not None and self.selection_strategy == 'random':
+            # different partitions every time
+            return None
+        values = np.asanyarray(values)
+        if values.dtype.hasobject:
+            # no way to hash the content reliably
+            return None
+        digest = hashlib.md5(np.ascontiguousarray(values).tostring())
+        # configuration of the partitioner is fully described by its repr
+        return (repr(self), values.dtype.str, values.shape, digest.hexdigest())
+
+
+    def get_partitions(self, ds):
+        """Return partition attribute arrays for all partition sets.
+
+        Partition sets are computed once for each unique content of the
+        sample attribute used to determine splits, and cached for
+        subsequent calls.  Returned arrays must not be modified.
+
+        Parameters
+        ----------
+        ds : Dataset
+          This is this source dataset.
+
+        Returns
+        -------
+        list(array(ints))
+          One partition attribute array (see `get_partitions_attr`) per
+          partition set.
+        """
+        key = self._get_plan_key(ds.sa[self.__attr].value)
+        plans = self.__plans
+        plan = plans.get(key) if key is not None else None
+        if plan is None:
+            plan = [self.get_partitions_attr(ds, parts)
+                    for parts in self.get_partition_specs(ds)]
+            if key is not None:
+                if len(plans) >= self._PLANS_CACHE_SIZE:
+                    plans.clear()
+                plans[key] = plan
+        elif __debug__:
+            debug("SPL", "Reusing %d cached partition sets", (len(plan),))
+        return plan
+
+
+    def get_partition_indices(self, ds, values=(1, 2)):
+        """Return indices of samples in partitions for all partition sets.
+
+        Allows to select samples of partitions without generating any
+        (partitioned) dataset.
+
+        Parameters
+        ----------
+        ds : Dataset
+          This is this source dataset.
+        values : sequence of int
+          Partitions to return indices for, in that order.
+
+        Returns
+        -------
+        list(tuple(array(ints)))
+          Per each partition set, an index array per partition in `values`.
+        """
+        return [tuple(np.flatnonzero(pattr == v) for v in values)
+                for pattr in self.get_partitions(ds)]
+
+
     def get_partitions_attr(self, ds, specs):
         """Create a partition attribute array for a particular partition spec.
 
@@ -153,6 +232,13 @@ class Partitioner(Node):
         cum_filter = None
 
         splitattr_data = ds.sa[self.__attr].value
+        try:
+            # membership gets decided once per unique value and spread to
+            # all samples via their integer codes
+            uniqueattr, codes = np.unique(splitattr_data, return_inverse=True)
+        except TypeError:
+            # values which cannot be sorted -- check each sample
+            uniqueattr, codes = splitattr_data, slice(None)
         # for each partition in this set
         for spec in specs:
             if spec is None:
@@ -160,7 +246,7 @@ class Partitioner(Node):
                 none_specs += 1
             else:
                 filter_ = np.array([ i in spec \
-                                    for i in splitattr_data], dtype='bool')
+                                    for i in uniqueattr], dtype='bool')[codes]
                 filters.append(filter_)
                 if cum_filter is None:
                     cum_filter = filter_
@@ -550,6 +636,10 @@ class FactorialPartitioner(Partitioner):
         # store the subordinate partitioner
         self.partitioner = partitioner
 
+    def get_partitions(self, ds):
+        # partitions are defined by what gets generated
+        return [pds.sa[self.space].value for pds in self.generate(ds)]
+
     def __repr__(self, prefixes=None):
         if prefixes is None:
             prefixes = []
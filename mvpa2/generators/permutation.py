@@ -39,9 +39,14 @@ class AttributePermutator(Node):
     This node only permutes dataset attributes, dataset samples are no affected.
     The permuted output dataset shares the samples container with the input
     dataset.
+
+    With the 'simple' strategy all permutations could also be computed at
+    once as a matrix of indices (see `get_permutations`), e.g. for measures
+    which could process the whole batch by permuting label codes.
     """
     def __init__(self, attr, count=1, limit=None, assure=False,
-                 strategy='simple', chunk_attr=None, rng=None, **kwargs):
+                 strategy='simple', chunk_attr=None, rng=None, batched=False,
+                 **kwargs):
         """
         Parameters
         ----------
@@ -79,7 +84,11 @@ class AttributePermutator(Node):
           Integer to seed a new RandomState upon each call, or instance of the
           numpy.random.RandomState to be reused across calls. If None, the
           numpy.random singleton would be used
-
+        batched : bool
+          If set, `generate` computes all `count` permutations at once
+          (see `get_permutations`) instead of one at a time.  Only supported
+          by the 'simple' strategy.  Note that permutations differ from the
+          ones generated one at a time with the same `rng`.
 
         """
         Node.__init__(self, **kwargs)
@@ -92,6 +101,7 @@ class AttributePermutator(Node):
         self.strategy = strategy
         self.rng = rng
         self.chunk_attr = chunk_attr
+        self.batched = batched
 
     def _get_call_kwargs(self, ds):
         # determine to be permuted attribute to find the collection
@@ -109,7 +119,10 @@ class AttributePermutator(Node):
             'rng': get_rng(self.rng)
         }
 
-    def _call(self, ds, limit_filter=None, rng=None):
+    def _call(self, ds, limit_filter=None, rng=None, perm=None):
+        if perm is not None:
+            # permutation was already computed by get_permutations
+            return self._get_permuted(ds, perm)
         # local binding
         pattr = self._pattr
         assure_permute = self._assure_permute
@@ -256,8 +269,98 @@ class AttributePermutator(Node):
                 out_pattr.value[np.where(chunks == orig)] = \
                     in_pattr.value[np.where(chunks == new)]
 
+    def get_permutations(self, ds, count=None):
+        """Compute multiple permutations at once as a matrix of indices
+
+        Only the 'simple' strategy is supported.  Permutations within each
+        chunk of the ``limit`` are drawn for all permutations at once.
+
+        Parameters
+        ----------
+        ds : Dataset
+          Dataset whose attributes would be permuted.
+        count : int, optional
+          Number of permutations.  If None, ``count`` of the node is used.
+
+        Returns
+        -------
+        array (count x nelements) of int
+          Each row provides for every sample (or feature, if feature
+          attributes get permuted) the index of the one whose attribute
+          values it gets in the permutation, i.e. ``values[perms[i]]`` is
+          the i-th permutation of ``values``.  Elements outside of the
+          ``limit`` keep their own index.
+        """
+        if self.strategy != 'simple':
+            raise ValueError("Only strategy='simple' could produce "
+                             "permutation matrices, not %r" % self.strategy)
+        if count is None:
+            count = self.count
+        pattr = self._pattr
+        if isinstance(pattr, str):
+            pattr = (pattr,)
+        in_pattrs = [ds.get_attr(pa)[0] for pa in pattr]
+        kwargs = self._get_call_kwargs(ds)
+        limit_filter, rng = kwargs['limit_filter'], kwargs['rng']
+
+        if limit_filter.dtype == np.bool:
+            groups = np.where(limit_filter, 0, -1)
+        else:
+            groups = np.unique(limit_filter, return_inverse=True)[1]
+        selected = np.flatnonzero(groups >= 0)
+        groups = groups[selected]
+        # positions of the selected elements, grouped by limit chunks
+        slots = selected[np.argsort(groups, kind='mergesort')]
+
+        def permute(n):
+            # order random keys within each chunk
+            keys = rng.random_sample((n, len(selected)))
+            order = np.lexsort(
+                (keys, np.broadcast_to(groups, keys.shape)), axis=-1)
+            return selected[order]
+
+        perms = np.empty((count, len(limit_filter)), dtype=int)
+        perms[:] = np.arange(len(limit_filter))
+        perms[:, slots] = permute(count)
+
+        if self._assure_permute:
+            values = [pa.value.reshape(len(pa.value), -1) for pa in in_pattrs]
+            for i in xrange(10):
+                # permutations which did not change any value
+                same = np.ones(count, dtype=bool)
+                for v in values:
+                    same &= np.all(v[perms] == v, axis=(1, 2))
+                if not np.any(same):
+                    break
+                perms[np.ix_(same, slots)] = permute(np.sum(same))
+            else:
+                raise RuntimeError(
+                    "Cannot assure permutation of %s with limit %r for "
+                    "some reason (dataset %s). Should not happen"
+                    % (pattr, self._limit, ds))
+        if __debug__:
+            debug('APERM', "Obtained %d permutations of %d elements",
+                  perms.shape)
+        return perms
+
+    def _get_permuted(self, ds, perm):
+        """Shallow copy of the dataset with attributes permuted by indices
+        """
+        pattr = self._pattr
+        if isinstance(pattr, str):
+            pattr = (pattr,)
+        out = ds.copy(deep=False)
+        for pa in pattr:
+            out_pattr = out.get_attr(pa)[0]
+            out_pattr.value = out_pattr.value[perm]
+        return out
+
     def generate(self, ds):
         """Generate the desired number of permuted datasets."""
+        if self.batched:
+            for perm in self.get_permutations(ds):
+                yield self(ds, _call_kwargs={'perm': perm})
+            return
         # figure out permutation setup once for all runs
         # permute as often as requested
         for i in xrange(self.count):
@@ -281,6 +384,7 @@ class AttributePermutator(Node):
             + _repr_attrs(self, ['assure'], default=False)
             + _repr_attrs(self, ['strategy'], default='simple')
             + _repr_attrs(self, ['rng'], default=None)
+            + _repr_attrs(self, ['batched'], default=False)
             )
 
     attr = property(fget=lambda self: self._pattr)
@@ -11,6 +11,7 @@
 __docformat__ = 'restructuredtext'
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
 from mvpa2.mappers.base import Mapper
 from mvpa2.clfs.base import accepts_dataset_as_samples
@@ -27,6 +28,12 @@ class BoxcarMapper(Mapper):
 
     This mapper is somewhat unconventional since it doesn't preserve number
     of samples (ie the size of 0-th dimension).
+
+    Boxes are extracted with a single gather via a matrix of sample indices.
+    With ``strided=True`` evenly spaced boxes are not copied at all, but
+    the mapped samples are a read-only view of the input samples, so that
+    e.g. overlapping peri-stimulus boxes of long recordings do not multiply
+    memory demands.
     """
     # TODO: extend with the possibility to provide real onset vectors and a
     #       samples attribute that is used to determine the actual sample that
@@ -35,7 +42,8 @@ class BoxcarMapper(Mapper):
     #       utility functionality (outside BoxcarMapper) could be used to merge
     #       arbitrary sample attributes into the samples matrix (with
     #       appropriate mapper adjustment, e.g. CombinedMapper).
-    def __init__(self, startpoints, boxlength, offset=0, **kwargs):
+    def __init__(self, startpoints, boxlength, offset=0, strided=False,
+                 **kwargs):
         """
         Parameters
         ----------
@@ -47,6 +55,11 @@ class BoxcarMapper(Mapper):
         offset : int
           The offset between the provided starting point and the actual start
           of the boxcar.
+        strided : bool
+          If True, and startpoints are evenly spaced and ascending, and all
+          boxes are within the data, mapped samples are a read-only view of
+          the input samples instead of a copy.  Sample attributes are copied
+          regardless.
         """
         Mapper.__init__(self, **kwargs)
         self._outshape = None
@@ -68,6 +81,7 @@ class BoxcarMapper(Mapper):
 
         self.boxlength = int(boxlength)
         self.offset = offset
+        self.strided = strided
         self.__selectors = None
 
         # build a list of list where each sublist contains the indexes of to be
@@ -106,8 +120,9 @@ class BoxcarMapper(Mapper):
 
     def __repr__(self):
         s = super(BoxcarMapper, self).__repr__()
-        return s.replace("(", "(boxlength=%d, offset=%d, startpoints=%s, " %
-                         (self.boxlength, self.offset, str(self.startpoints)),
+        return s.replace("(", "(boxlength=%d, offset=%d, startpoints=%s, %s" %
+                         (self.boxlength, self.offset, str(self.startpoints),
+                          'strided=True, ' if self.strided else ''),
                          1)
 
 
@@ -145,7 +160,43 @@ class BoxcarMapper(Mapper):
         """
         # NOTE: _forward_dataset() relies on the assumption that the following
         # also works with 1D arrays and still yields sane results
-        return np.vstack([data[box][np.newaxis] for box in self.__selectors])
+        if self.strided:
+            view = self._get_strided_view(data)
+            if view is not None:
+                return view
+        return self._gather(data)
+
+
+    def _gather(self, data):
+        """Copy the boxes out of data with a single fancy-indexing
+        """
+        starts = self.startpoints + self.offset
+        if len(starts) and (starts.min() < 0
+                            or starts.max() + self.boxlength > len(data)):
+            # let slicing deal with boxes which are out of bounds
+            return np.vstack([data[box][np.newaxis]
+                              for box in self.__selectors])
+        return data[starts[:, np.newaxis] + np.arange(self.boxlength)]
+
+
+    def _get_strided_view(self, data):
+        """Read-only view of evenly spaced boxes, or None if not possible
+        """
+        starts = self.startpoints + self.offset
+        if not len(starts) or data.dtype == np.dtype('object'):
+            return None
+        steps = np.diff(starts)
+        step = steps[0] if len(steps) else 0
+        if np.any(steps != step) or step < 0 or starts[0] < 0 \
+                or starts[-1] + self.boxlength > len(data):
+            return None
+        if __debug__:
+            debug('MAP', "Boxcar: mapping %d boxes as a view with step %d",
+                  (len(starts), step))
+        return as_strided(data[starts[0]:],
+                          shape=(len(starts), self.boxlength) + data.shape[1:],
+                          strides=(step * data.strides[0],) + data.strides,
+                          writeable=False)
 
 
     def _forward_dataset(self, dataset):
@@ -164,9 +215,10 @@ class BoxcarMapper(Mapper):
         # map old sample attributes -- which simply get stacked into one for all
         # boxcar elements/samples
         for k in dataset.sa:
-            # using _forward_data() instead of forward(), since we know that
-            # this implementation can actually deal with 1D-arrays
-            mds.sa[k] = self._forward_data(dataset.sa[k].value)
+            # using _gather() instead of forward(), since we know that
+            # this implementation can actually deal with 1D-arrays, and
+            # attributes should remain writable
+            mds.sa[k] = self._gather(dataset.sa[k].value)
         # create the box offset attribute if space name is given
         if self.get_space():
             mds.fa[self.get_space() + '_offsetidx'] = np.arange(self.boxlength,
@@ -11,22 +11,115 @@
 __docformat__ = 'restructuredtext'
 
 import numpy as np
+from multiprocessing.pool import ThreadPool
 
 from mvpa2.base import externals
 
 if externals.exists('scipy', raise_=True):
     from scipy.signal import resample
     from mvpa2.support.scipy.signal import filtfilt
+    if externals.versions['scipy'] >= '0.18':
+        from scipy.signal import sosfiltfilt
+    else:
+        sosfiltfilt = None
 
 from mvpa2.base import warning
 from mvpa2.base.param import Parameter
-from mvpa2.base.constraints import EnsureChoice, EnsureInt, EnsureNone
+from mvpa2.base.constraints import EnsureChoice, EnsureInt, EnsureNone, \
+     EnsureRange, EnsureBool
 from mvpa2.base.dochelpers import _str, borrowkwargs
 from mvpa2.mappers.base import Mapper
 from mvpa2.datasets import Dataset
 from mvpa2.base.dataset import vstack
 from mvpa2.generators.splitters import Splitter
 
+if __debug__:
+    from mvpa2.base import debug
+
+_BLOCK_SIZE = 2 ** 20
+"""Default number of elements in a block of data processed at once"""
+
+
+def _map_blocks(fx, data, axis=0, nproc=1, block_size=None, out=None):
+    """Apply `fx` to blocks of `data` split along an axis other than `axis`
+
+    `fx` has to process each block along `axis` independently of all other
+    elements, e.g. filter each feature along the samples axis.  Blocks are
+    split along the last axis (or the first one, if `fx` operates along the
+    last axis), and are processed by a pool of `nproc` threads, which
+    only speeds things up if `fx` releases the GIL.  Besides `out`, memory
+    demand is bounded by the temporaries of one block per thread.
+
+    Parameters
+    ----------
+    fx : callable
+      Called with each block, must return an array with the same size of the
+      block along the splitting axis.
+    data : array
+    axis : int
+      Axis along which `fx` operates.
+    nproc : int
+      Number of threads.
+    block_size : int or None
+      Number of elements along the splitting axis in each block.  If None,
+      blocks have about 1M elements, but there are at least `nproc` blocks.
+    out : array or None
+      Array to store the results into, could be `data` itself.  If None, a new
+      one is created according to the results for the first block.
+
+    Returns
+    -------
+    array
+    """
+    ndim = data.ndim
+    if ndim < 2:
+        result = fx(data)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    # axis to split into blocks
+    baxis = 0 if axis % ndim == ndim - 1 else ndim - 1
+    n = data.shape[baxis]
+    if block_size is None:
+        block_size = min(_BLOCK_SIZE * n // max(data.size, 1),
+                         -(-n // nproc))
+    block_size = max(int(block_size), 1)
+
+    def get_block(start):
+        slicer = [slice(None)] * ndim
+        slicer[baxis] = slice(start, start + block_size)
+        return tuple(slicer)
+
+    # the first block determines the output
+    result = fx(data[get_block(0)])
+    if out is None:
+        shape = list(result.shape)
+        shape[baxis] = n
+        out = np.empty(shape, dtype=result.dtype)
+    out[get_block(0)] = result
+    del result
+
+    def process(start):
+        block = get_block(start)
+        out[block] = fx(data[block])
+
+    starts = range(block_size, n, block_size)
+    if __debug__:
+        debug('MAP', "Processing %d blocks of %d elements along axis %d with "
+              "%d threads", (len(starts) + 1, block_size, baxis, nproc))
+    if nproc > 1 and len(starts) > 1:
+        pool = ThreadPool(min(nproc, len(starts)))
+        try:
+            pool.map(process, starts, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for start in starts:
+            process(start)
+    return out
+
 class FFTResampleMapper(Mapper):
     """Mapper for FFT-based resampling.
 
@@ -38,9 +131,11 @@ class FFTResampleMapper(Mapper):
 
     Pretty much Mapper frontend for scipy.signal.resample
 
+    Features are resampled in blocks, optionally by multiple threads.
     """
     def __init__(self, num, window=None, chunks_attr=None, position_attr=None,
-                 attr_strategy='remove', **kwargs):
+                 attr_strategy='remove', nproc=1, block_size=None,
+                 dtype=None, **kwargs):
         """
         Parameters
         ----------
@@ -65,6 +160,15 @@ class FFTResampleMapper(Mapper):
           10th), and 'resample' will also apply the actual data resampling
           procedure to the attributes as well (which might not be possible, e.g.
           for literal attributes).
+        nproc : int
+          Number of threads to resample blocks of features in parallel.
+        block_size : int or None
+          Number of features resampled at once.  If None, it is chosen to
+          get blocks of about 1M elements, but at least `nproc` blocks.
+        dtype : dtype or None
+          If not None, samples are converted into this type one block at a
+          time (e.g. 'float32' to halve the memory demand), and resampled
+          samples are of this type.
         """
         Mapper.__init__(self, **kwargs)
 
@@ -73,6 +177,9 @@ class FFTResampleMapper(Mapper):
         self.__chunks_attr = chunks_attr
         self.__position_attr = position_attr
         self.__attr_strategy = attr_strategy
+        self.__nproc = nproc
+        self.__block_size = block_size
+        self.__dtype = dtype
 
 
     def __repr__(self):
@@ -87,9 +194,25 @@ class FFTResampleMapper(Mapper):
         return _str(self, chunks_attr=self.__chunks_attr)
 
 
+    def _resample(self, data):
+        """Resample samples of data in blocks of features"""
+        num, window, dtype = self.__num, self.__window_args, self.__dtype
+
+        def fx(x):
+            if dtype is not None:
+                x = x.astype(dtype, copy=False)
+            x = resample(x, num, t=None, window=window)
+            if dtype is not None:
+                x = x.astype(dtype, copy=False)
+            return x
+
+        return _map_blocks(fx, data, axis=0, nproc=self.__nproc,
+                           block_size=self.__block_size)
+
+
     def _forward_data(self, data):
         # we cannot have position information without a dataset
-        return resample(data, self.__num, t=None, window=self.__window_args)
+        return self._resample(data)
 
 
     def _forward_dataset(self, ds):
@@ -121,14 +244,12 @@ class FFTResampleMapper(Mapper):
 
         pos = None
         if self.__position_attr is not None:
-            # we know something about sample position
+            # we know something about sample position, new positions do not
+            # depend on the samples
             pos = ds.sa[self.__position_attr].value
-            rsamples, pos = resample(ds.samples, self.__num, t=pos,
-                                     window=self.__window_args)
-        else:
-            # we know nothing about samples position
-            rsamples = resample(ds.samples, self.__num, t=None,
-                                window=self.__window_args)
+            pos = resample(np.zeros(len(pos)), self.__num, t=pos,
+                           window=self.__window_args)[1]
+        rsamples = self._resample(ds.samples)
         # new dataset that reuses that feature and dataset attributes of the
         # source
         mds = Dataset(rsamples, fa=ds.fa, a=ds.a)
@@ -195,6 +316,14 @@ class IIRFilterMapper(Mapper):
     >>> b, a = signal.butter(8, 0.125)
     >>> mapper = IIRFilterMapper(b, a, padlen=150)
 
+    Filters could also be given as second-order sections, which are
+    numerically more stable for high orders (SciPy's sosfiltfilt()):
+
+    >>> sos = signal.butter(8, 0.125, output='sos')
+    >>> mapper = IIRFilterMapper(sos=sos, padlen=150)
+
+    Features are filtered in blocks, optionally by multiple threads (see
+    `nproc`), and could be filtered in place.
     """
 
     axis = Parameter(0, constraints='int',
@@ -214,7 +343,28 @@ class IIRFilterMapper(Mapper):
             `x.shape[axis]-1`.  `padlen=0` implies no padding. The default
             value is 3*max(len(a),len(b))""")
 
-    def __init__(self, b, a, **kwargs):
+    nproc = Parameter(1, constraints=EnsureInt() & EnsureRange(min=1),
+            doc="""Number of threads to filter blocks of features in
+            parallel.""")
+
+    block_size = Parameter(None,
+            constraints=EnsureInt() & EnsureRange(min=1) | EnsureNone(),
+            doc="""Number of features filtered at once.  If None, it is chosen
+            to get blocks of about 1M elements, but at least `nproc`
+            blocks.""")
+
+    dtype = Parameter(None,
+            doc="""If not None, data are converted into this type one block at
+            a time (e.g. 'float32' to halve the memory demand), and filtered
+            data are of this type.""")
+
+    in_place = Parameter(False, constraints=EnsureBool(),
+            doc="""If True, filtered data are stored into the input array,
+            so no memory beyond the temporaries of the blocks is needed.  The
+            input data then has to be of a floating point type, and gets
+            modified.""")
+
+    def __init__(self, b=None, a=None, sos=None, **kwargs):
         """
         All constructor parameters are analogs of filtfilt() or are passed
         on to the Mapper base class.
@@ -226,21 +376,56 @@ class IIRFilterMapper(Mapper):
         a : (N,) array_like
             The denominator coefficient vector of the filter.  If a[0]
             is not 1, then both a and b are normalized by a[0].
+        sos : (n_sections, 6) array_like
+            Second-order sections of the filter, to be used instead of
+            `b` and `a`.
         """
         Mapper.__init__(self, auto_train=True, **kwargs)
+        if sos is None:
+            if b is None or a is None:
+                raise ValueError("Either both b and a, or sos have to be "
+                                 "provided")
+        else:
+            if not (b is None and a is None):
+                raise ValueError("Provide either b and a, or sos, not both")
+            if sosfiltfilt is None:
+                raise RuntimeError("Filtering with second-order sections "
+                                   "requires scipy >= 0.18 (got %s)"
+                                   % externals.versions['scipy'])
         self.__iir_num = b
         self.__iir_denom = a
+        self.__sos = sos
 
     def _forward_data(self, data):
         params = self.params
+        dtype = params.dtype
+        if params.in_place and not np.issubdtype(data.dtype, np.floating):
+            raise ValueError("In-place filtering requires data of a floating "
+                             "point type (got %s)" % data.dtype)
+        sos = self.__sos
+
+        def fx(x):
+            if dtype is not None:
+                x = x.astype(dtype, copy=False)
+            if sos is None:
+                x = filtfilt(self.__iir_num, self.__iir_denom, x,
+                             axis=params.axis, padtype=params.padtype,
+                             padlen=params.padlen)
+            else:
+                x = sosfiltfilt(sos, x, axis=params.axis,
+                                padtype=params.padtype, padlen=params.padlen)
+            if dtype is not None:
+                x = x.astype(dtype, copy=False)
+            return x
+
         try:
-            mapped = filtfilt(self.__iir_num,
-                              self.__iir_denom,
-                              data,
-                              axis=params.axis,
-                              padtype=params.padtype,
-                              padlen=params.padlen)
+            mapped = _map_blocks(fx, data, axis=params.axis,
+                                 nproc=params.nproc,
+                                 block_size=params.block_size,
+                                 out=data if params.in_place else None)
         except TypeError:
+            if sos is not None:
+                raise
             # we have an ancient scipy, do manually
             # but is will only support 2d arrays
             if params.axis == 0:
@@ -206,8 +206,41 @@ class FxMapper(Mapper):
         return out
 
 
+    def _get_groups(self, col):
+        """Assign group codes to samples (or features)
+
+        Codes of the groups follow the requested `order` of the groups.
+        Returns the codes and the number of all possible combinations of
+        unique values of the attributes.
+        """
+        groups = np.zeros(col.attr_length, dtype=int)
+        ncombinations = 1
+        # following the docstring -- the last attribute is the most important
+        # one for ordering
+        for attr in self.__uattrs[::-1]:
+            values = col[attr].value
+            try:
+                if values.dtype == np.dtype('object'):
+                    raise TypeError
+                uvalues, codes = np.unique(values, return_inverse=True)
+            except TypeError:
+                # e.g. tuples in arrays of dtype object
+                uvalues = col[attr].unique
+                codes = np.empty(len(values), dtype=int)
+                for i, value in enumerate(uvalues):
+                    codes[array_whereequal(values, value)] = i
+            ncombinations *= len(uvalues)
+            # recode to keep codes small
+            groups = np.unique(groups * len(uvalues) + codes,
+                               return_inverse=True)[1]
+        if self.__order == 'occurrence':
+            first = np.unique(groups, return_index=True)[1]
+            rank = np.empty(len(first), dtype=int)
+            rank[np.argsort(first)] = np.arange(len(first))
+            groups = rank[groups]
+        return groups, ncombinations
+
     def _forward_dataset_grouped(self, ds):
-        mdata = [] # list of samples array pieces
         if self.__axis == 'samples':
             col = ds.sa
             axis = 0
@@ -217,64 +250,48 @@ class FxMapper(Mapper):
         else:
             raise RuntimeError("This should not have happened!")
 
-        attrs = dict(zip(col.keys(), [[] for i in col]))
-
-        # create a dictionary for all unique elements in all attribute this
-        # mapper should operate on
-        self.__attrcombs = dict(zip(self.__uattrs,
-                                [col[attr].unique for attr in self.__uattrs]))
-        # let it generate all combinations of unique elements in any attr
-        order = self.order
-        order_keys = []
-        for comb in _orthogonal_permutations(self.__attrcombs):
-            selector = reduce(np.multiply,
-                                [array_whereequal(col[attr].value, value)
-                                 for attr, value in comb.iteritems()])
-
-            # process the samples
+        groups, ncombinations = self._get_groups(col)
+        counts = np.bincount(groups)
+        if len(counts) < ncombinations:
+            warning('There were no samples for %d out of %d combinations of '
+                    'unique values of %s. It might be a sign of a disbalanced '
+                    'dataset %s.' % (ncombinations - len(counts),
+                                     ncombinations, self.__uattrs, ds))
+        # groups become contiguous, keeping the original order within groups
+        idx = np.argsort(groups, kind='mergesort')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        samples = np.take(ds.samples, idx, axis=axis)
+
+        mdata = None
+        if not len(self.__fxargs):
+            mdata = _reduce_groups(self.__fx, samples, starts, counts, axis)
+        if mdata is None:
+            if __debug__:
+                debug('FX', "Applying %s to each of %d groups",
+                      (self.__fx, len(counts)))
+            mdata = [self.__smart_apply_along_axis(
+                        samples[start:start + count] if axis == 0
+                        else samples[:, start:start + count])
+                     for start, count in zip(starts, counts)]
             if axis == 0:
-                samples = ds.samples[selector]
+                mdata = np.vstack(mdata)
             else:
-                samples = ds.samples[:, selector]
-
-            # check if there were any samples for such a combination,
-            # if not -- warning and skip the rest of the loop body
-            if not len(samples):
-                warning('There were no samples for combination %s. It might be '
-                        'a sign of a disbalanced dataset %s.' % (comb, ds))
-                continue
-
-            fxed_samples = self.__smart_apply_along_axis(samples)
-            mdata.append(fxed_samples)
-            if self.__attrfx is not None:
-                # and now all samples attributes
-                for i, attr in enumerate(col):
-                    fxed_attr = self.__attrfx(col[attr].value[selector])
-                    attrs[attr].append(fxed_attr)
-            # possibly take care about collecting information to have groups ordered
-            if order == 'uattrs':
-                # reverse order as per docstring -- most of the time we have
-                # used uattrs=['targets', 'chunks'] and did expect chunks being
-                # groupped together.
-                order_keys.append([comb[a] for a in self.__uattrs[::-1]])
-            elif order == 'occurrence':
-                # First index should be sufficient since we are dealing
-                # with unique non-overlapping groups here (AFAIK ;) )
-                order_keys.append(np.where(selector)[0][0])
-
-        if order:
-            # reorder our groups using collected "order_keys"
-            # data
-            order_idxs = argsort(order_keys)
-            mdata = [mdata[i] for i in order_idxs]
-            # and attributes
-            attrs = dict((k, [v[i] for i in order_idxs])
-                         for k,v in attrs.iteritems())
-
-        if axis == 0:
-            mdata = np.vstack(mdata)
-        else:
-            mdata = np.vstack(np.transpose(mdata))
+                mdata = np.vstack(np.transpose(mdata))
+
+        attrs = {}
+        if self.__attrfx is not None:
+            for attr in col:
+                values = col[attr].value[idx]
+                firsts = values[starts]
+                if self.__attrfx is _uniquemerge2literal \
+                        and values.ndim == 1 \
+                        and values.dtype != np.dtype('object') \
+                        and np.all(values == np.repeat(firsts, counts)):
+                    # single value per group -- that value it is
+                    attrs[attr] = firsts
+                else:
+                    attrs[attr] = [self.__attrfx(values[start:start + count])
+                                   for start, count in zip(starts, counts)]
         return mdata, attrs
 
 
@@ -493,6 +510,49 @@ class BinomialProportionCI(Mapper):
 # Utility functions
 #
 
+def _reduce_groups(fx, data, starts, counts, axis):
+    """Reduce contiguous groups of elements along an axis with a known `fx`
+
+    Groups start at `starts` and have `counts` elements.  Returns None if
+    `fx` has no vectorized implementation here, or the data is not suitable.
+    """
+    if data.ndim != 2 or data.dtype.kind not in 'iuf' \
+            or fx not in (np.sum, np.mean, np.median, np.amax, np.amin):
+        return None
+    # dtype of the result as the function itself would produce
+    dtype = fx(np.zeros((1, 1), dtype=data.dtype), axis).dtype
+    if fx is np.sum:
+        return np.add.reduceat(data, starts, axis=axis, dtype=dtype)
+    elif fx is np.amax:
+        return np.maximum.reduceat(data, starts, axis=axis)
+    elif fx is np.amin:
+        return np.minimum.reduceat(data, starts, axis=axis)
+    shape = (-1, 1) if axis == 0 else (1, -1)
+    counts = counts.reshape(shape)
+    if fx is np.mean:
+        sums = np.add.reduceat(data, starts, axis=axis, dtype=dtype)
+        return (sums / counts.astype(dtype)).astype(dtype)
+    elif fx is np.median:
+        if data.dtype.kind == 'f' and np.isnan(np.sum(data)):
+            # np.median should take care about NaNs
+            return None
+        if axis == 1:
+            data = data.T
+        # sort values within groups (elements are ordered by groups already)
+        groups = np.repeat(np.arange(len(starts)), counts.ravel())
+        order = np.argsort(data, axis=0)
+        order = np.take_along_axis(
+            order,
+            np.argsort(groups[order], axis=0, kind='mergesort'),
+            axis=0)
+        data = np.take_along_axis(data, order, axis=0)
+        counts = counts.ravel()
+        lo = data[starts + (counts - 1) // 2]
+        hi = data[starts + counts // 2]
+        mdata = np.mean([lo, hi], axis=0).astype(dtype)
+        return mdata.T if axis == 1 else mdata
+
+
 def _uniquemerge2literal(attrs):
     """Compress a sequence into its unique elements (with string merge).
 
@@ -42,8 +42,8 @@ class GLMMapper(Mapper):
     estimates corresponding to a design matrix column.
 
     This is a base class, thus is not supposed to be used directly by users
-    which should use specific implementations suchas NiPyGLMMapper and
-    StatsmodelsGLMMapper.
+    which should use specific implementations suchas OLSGLMMapper,
+    NiPyGLMMapper and StatsmodelsGLMMapper.
     """
     # TODO optimize design matrix generation in case no regressor comes from the
     # input dataset and everything can be precomputed
@@ -142,6 +142,9 @@ class GLMMapper(Mapper):
         # reconstruct timeseries from model fit
 
 from mvpa2 import externals
+if externals.exists('scipy'):
+    from .ols_glm import OLSGLMMapper
+    __all__.append('OLSGLMMapper')
 if externals.exists('nipy'):
     from .nipy_glm import NiPyGLMMapper
     __all__.append('NiPyGLMMapper')
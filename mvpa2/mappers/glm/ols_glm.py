@@ -0,0 +1,79 @@
+# emacs: -*- mode: python; py-indent-offset: 4; indent-tabs-mode: nil -*-
+# vi: set ft=python sts=4 ts=4 sw=4 et:
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the PyMVPA package for the
+#   copyright and license terms.
+#
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""GLMMapper implementation based on PyMVPA's own mass-univariate OLS."""
+
+__docformat__ = 'restructuredtext'
+
+from mvpa2.base import externals
+if externals.exists('scipy', raise_=True):
+    from mvpa2.misc.ols import ols_fit
+
+import numpy as np
+
+from mvpa2.datasets import Dataset
+from mvpa2.mappers.glm import GLMMapper
+
+class OLSGLMMapper(GLMMapper):
+    """GLMMapper implementation fitting all features at once
+
+    The design matrix is factorized only once, and parameter estimates and
+    t- or F-contrasts are computed for all features with a few matrix
+    operations (see :func:`~mvpa2.misc.ols.ols_fit`). Optionally, the fit
+    accounts for AR(1) autocorrelation of the residuals of each feature.
+    """
+    def __init__(self, regs, results='params', weights=None, ar1=False,
+                 ar1_bins=100, **kwargs):
+        """
+        Parameters
+        ----------
+        regs : list
+          Names of sample attributes to be extracted from an input dataset and
+          used as design matrix columns.
+        results : str or array, optional
+          Name of an attribute of :class:`~mvpa2.misc.ols.OLSResults`
+          (e.g. 'params', 'tvalues', 'pvalues'), a 1d array with a
+          t-contrast, or a 2d array with an F-contrast. For contrasts, the
+          samples of the mapped dataset are the respective statistics,
+          labeled in the ``descr`` sample attribute. By default parameter
+          estimates are returned.
+        weights : array, optional
+          Weights of the samples for a weighted least squares fit.
+        ar1 : bool, optional
+          If True, data and design are prewhitened according to the AR(1)
+          coefficient of the residuals of each feature and fitted again.
+        ar1_bins : int, optional
+          Features with AR(1) coefficients rounded to the same multiple of
+          1/ar1_bins get prewhitened and fitted together.
+        """
+        GLMMapper.__init__(self, regs, **kwargs)
+        self.result_expr = results
+        self.weights = weights
+        self.ar1 = ar1
+        self.ar1_bins = ar1_bins
+
+    def _fit_model(self, ds, X, reg_names):
+        model = ols_fit(X, ds.samples, weights=self.weights, ar1=self.ar1,
+                        ar1_bins=self.ar1_bins)
+        res = self.result_expr
+        if isinstance(res, basestring):
+            out = Dataset(np.atleast_2d(getattr(model, res)))
+            if len(out) == len(reg_names):
+                out.sa[self.get_space()] = reg_names
+            return model, out
+        res = np.asanyarray(res)
+        if len(res.shape) == 1:
+            stats, descr = model.t_test(res), model.t_test_stats
+        elif len(res.shape) == 2:
+            stats, descr = model.f_test(res), model.f_test_stats
+        else:
+            raise ValueError("Test specification (via `results`) has to be "
+                             "1d or 2d array")
+        out = Dataset(np.array([stats[k] for k in descr]),
+                      sa={'descr': list(descr)})
+        return model, out
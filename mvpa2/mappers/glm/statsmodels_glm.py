@@ -39,7 +39,7 @@ class StatsmodelsGLMMapper(GLMMapper):
         model_gen : callable, optional
           See UnivariateStatsModels documentation for details on the
           specification of the model fitting procedure. By default an
-          OLS model is used.
+          OLS model is fitted to all features at once.
         results : str or array, optional
           See UnivariateStatsModels documentation for details on the
           specification of model fit results. By default parameter
@@ -47,8 +47,6 @@ class StatsmodelsGLMMapper(GLMMapper):
         """
         GLMMapper.__init__(self, regs, **kwargs)
         self.result_expr = results
-        if model_gen is None:
-            model_gen=lambda y, x: sm.OLS(y, x)
         self.model_gen = model_gen
 
     def _fit_model(self, ds, X, reg_names):
@@ -14,7 +14,9 @@ import numpy as np
 #import scipy.linalg as spl
 
 from mvpa2.base.dochelpers import borrowdoc
+from mvpa2.base.dataset import is_datasetlike
 from mvpa2.mappers.base import accepts_dataset_as_samples
+from mvpa2.misc.support import get_rng
 from mvpa2.mappers.projection import ProjectionMapper
 from mvpa2.featsel.helpers import ElementSelector
 
@@ -84,3 +86,186 @@ class SVDMapper(ProjectionMapper):
 
 
     sv = property(fget=lambda self: self._sv, doc="Singular values")
+
+
+class TruncatedSVDMapper(SVDMapper):
+    """Mapper to project data onto the first SVD components of some dataset.
+
+    Only `n_components` components are estimated, without ever decomposing
+    (or even demeaning) the whole training matrix, so it is usable for
+    datasets which do not fit in memory as a whole, e.g. with memory-mapped
+    samples or for group-level reductions over concatenated subjects.
+
+    Two methods are available.  'randomized' estimates the components with
+    the randomized algorithm of Halko, Martinsson & Tropp (2011) from a few
+    passes over the training data, processed in blocks of samples.
+    'incremental' updates the decomposition with one block of samples at a
+    time (Ross et al., 2008), which could also be done explicitly with blocks
+    coming from any generator::
+
+      mapper = TruncatedSVDMapper(50, method='incremental')
+      for block in blocks:
+          mapper.partial_train(block)
+
+    Projection and reconstruction work as for any `ProjectionMapper`.
+    """
+
+    def __init__(self, n_components, method='randomized', block_size=None,
+                 n_iter=4, oversamples=10, rng=None, **kwargs):
+        """
+        Parameters
+        ----------
+        n_components : int
+          Number of SVD components to estimate.
+        method : {'randomized', 'incremental'}
+          How to estimate the components during `train()`.
+        block_size : int or None
+          Number of samples processed at once during `train()`.  If None,
+          all of them for the 'randomized' method, and ``5 * n_components``
+          for the 'incremental' one.
+        n_iter : int
+          Number of power iterations of the 'randomized' method.  More
+          iterations improve the precision for slowly decaying singular
+          values, each of them takes two passes over the training data.
+        oversamples : int
+          Number of additional random projections of the 'randomized' method.
+        rng : int or RandomState, optional
+          Seed or random number generator for the 'randomized' method.
+        **kwargs:
+          All keyword arguments are passed to the ProjectionMapper
+          constructor.
+        """
+        SVDMapper.__init__(self, **kwargs)
+        if not method in ('randomized', 'incremental'):
+            raise ValueError("Unknown method %r of %s"
+                             % (method, self.__class__.__name__))
+        self.n_components = n_components
+        self.method = method
+        self.block_size = block_size
+        self.n_iter = n_iter
+        self.oversamples = oversamples
+        self.rng = rng
+        self._nsamples_seen = 0
+        """Number of samples the incremental decomposition is based on"""
+
+
+    def _untrain(self):
+        self._proj = None
+        self._recon = None
+        self._sv = None
+        self._offset_in = None
+        self._nsamples_seen = 0
+        super(TruncatedSVDMapper, self)._untrain()
+
+
+    @accepts_dataset_as_samples
+    def _pretrain(self, samples):
+        # the incremental method keeps track of the mean by itself
+        if self.method != 'incremental':
+            super(TruncatedSVDMapper, self)._pretrain(samples)
+
+
+    def _get_blocks(self, samples, block_size):
+        """Slices of consecutive blocks of samples"""
+        return [slice(i, i + block_size)
+                for i in xrange(0, len(samples), max(block_size, 1))]
+
+
+    @accepts_dataset_as_samples
+    def _train(self, samples):
+        """Estimate the first SVD components of a 2D samples x features
+        matrix
+        """
+        if self.method == 'incremental':
+            self._nsamples_seen = 0
+            block_size = self.block_size or 5 * self.n_components
+            for block in self._get_blocks(samples, block_size):
+                self._update(samples[block])
+        else:
+            self._train_randomized(samples)
+
+        if __debug__:
+            debug("MAP", "%s SVD was done on %s and obtained %d SVs "
+                  "(max=%f)" % (self.method.capitalize(), samples,
+                                len(self._sv), self._sv[0]))
+
+
+    def _train_randomized(self, samples):
+        nsamples, nfeatures = samples.shape
+        blocks = self._get_blocks(samples, self.block_size or nsamples)
+        rng = get_rng(self.rng)
+
+        def dot(M):
+            # demeaned samples times M, one block of samples at a time
+            return np.vstack([np.dot(self._demean_data(samples[b]), M)
+                              for b in blocks])
+
+        def tdot(M):
+            # transposed demeaned samples times M
+            return sum(np.dot(self._demean_data(samples[b]).T, M[b])
+                       for b in blocks)
+
+        nrandom = min(self.n_components + self.oversamples,
+                      nsamples, nfeatures)
+        Q = np.linalg.qr(dot(rng.normal(size=(nfeatures, nrandom))))[0]
+        for i in xrange(self.n_iter):
+            Q = np.linalg.qr(tdot(Q))[0]
+            Q = np.linalg.qr(dot(Q))[0]
+        # decompose the projection of samples onto the found subspace
+        U, SV, Vh = np.linalg.svd(tdot(Q).T, full_matrices=0)
+        self._set_components(SV, Vh)
+        # could be updated incrementally from here on
+        self._nsamples_seen = nsamples
+
+
+    def _update(self, samples):
+        """Update the decomposition with a block of samples"""
+        X = np.asarray(samples, dtype=float)
+        nseen, nnew = self._nsamples_seen, len(X)
+        if not nnew:
+            return
+        if self._demean:
+            mean = X.mean(axis=0)
+            stack = [X - mean]
+            if nseen:
+                # account for the shift of the mean
+                stack.append(np.sqrt(float(nseen * nnew) / (nseen + nnew))
+                             * (self._offset_in - mean)[np.newaxis])
+                mean = self._offset_in + (mean - self._offset_in) \
+                       * (float(nnew) / (nseen + nnew))
+            self._offset_in = mean
+        else:
+            stack = [X]
+        if nseen:
+            stack.insert(0, self._sv[:, np.newaxis] * self._proj.T.A)
+        U, SV, Vh = np.linalg.svd(np.vstack(stack), full_matrices=0)
+        self._set_components(SV, Vh)
+        self._nsamples_seen = nseen + nnew
+
+
+    def _set_components(self, SV, Vh):
+        ncomp = min(self.n_components, len(SV))
+        # store the first basis vectors the same way as SVDMapper
+        self._proj = np.asmatrix(Vh[:ncomp]).H
+        self._sv = SV[:ncomp]
+        self._recon = None
+
+
+    def partial_train(self, ds):
+        """Update the decomposition with another block of samples
+
+        The mapper is trained afterwards, and could be updated further.
+        Regardless of `method`, the incremental algorithm is used.
+
+        Parameters
+        ----------
+        ds : Dataset or array
+          Block of samples.
+        """
+        samples = ds.samples if is_datasetlike(ds) else ds
+        self._update(samples)
+        self._set_trained()
+
+
+    nsamples_seen = property(fget=lambda self: self._nsamples_seen,
+                             doc="Number of samples of incremental training")
@@ -20,6 +20,7 @@ from mvpa2.measures.searchlight import BaseSearchlight
 from mvpa2.base import externals, warning
 from mvpa2.base.dochelpers import borrowkwargs, _repr_attrs
 from mvpa2.generators.splitters import Splitter
+from mvpa2.generators.partition import Partitioner
 
 #from mvpa2.base.param import Parameter
 #from mvpa2.base.state import ConditionalAttribute
@@ -361,33 +362,40 @@ class SimpleStatBaseSearchlight(BaseSearchlight):
                   'Phase 1. Initializing partitions using %s on %s'
                   % (generator, dataset))
 
-        # Lets just create a dummy ds which will store for us actual sample
-        # indicies
-        # XXX we could make it even more lightweight I guess...
-        dataset_indicies = Dataset(np.arange(nsamples), sa=dataset.sa)
+        # ATM we need to keep the splits instead since they are used
+        # in two places in the code: step 2 and 5
+        # We care only about training and testing partitions (i.e. first
+        # two), which are represented by indices of their samples
+        if isinstance(generator, Partitioner) and self._splitter is None:
+            # partitioners could provide those directly
+            splits = generator.get_partition_indices(dataset, values=(1, 2))
+        else:
+            # Lets just create a dummy ds which will store for us actual sample
+            # indicies
+            # XXX we could make it even more lightweight I guess...
+            dataset_indicies = Dataset(np.arange(nsamples), sa=dataset.sa)
 
-        splitter = Splitter(attr=generator.get_space(), attr_values=[1, 2]) \
-            if self._splitter is None \
-            else self._splitter
+            splitter = Splitter(attr=generator.get_space(), attr_values=[1, 2]) \
+                if self._splitter is None \
+                else self._splitter
 
-        partitions = list(generator.generate(dataset_indicies)) \
-            if generator \
-            else [dataset_indicies]
+            partitions = list(generator.generate(dataset_indicies)) \
+                if generator \
+                else [dataset_indicies]
 
-        if __debug__:
-            for p in partitions:
-                assert(p.shape[1] == 1)
-                if not (np.all(p.sa[targets_sa_name].value == labels[p.samples[:, 0]])):
-                    raise NotImplementedError(
-                        "%s does not yet support partitioners altering the targets "
-                        "(e.g. permutators)" % self.__class__)
-
-        nsplits = len(partitions)
-        # ATM we need to keep the splits instead since they are used
-        # in two places in the code: step 2 and 5
-        # We care only about training and testing partitions (i.e. first two)
-        splits = list(tuple(splitter.generate(ds_))[:2] for ds_ in partitions)
-        del partitions                    # not used any longer
+            if __debug__:
+                for p in partitions:
+                    assert(p.shape[1] == 1)
+                    if not (np.all(p.sa[targets_sa_name].value == labels[p.samples[:, 0]])):
+                        raise NotImplementedError(
+                            "%s does not yet support partitioners altering the targets "
+                            "(e.g. permutators)" % self.__class__)
+
+            splits = [tuple(split.samples[:, 0]
+                            for split in tuple(splitter.generate(ds_))[:2])
+                      for ds_ in partitions]
+            del partitions                    # not used any longer
+        nsplits = len(splits)
 
         # 2. Figure out the new 'chunks x labels' blocks of combinations
         #    of samples
@@ -402,11 +410,11 @@ class SimpleStatBaseSearchlight(BaseSearchlight):
         # labels
         combinations[:, 0] = labels_numeric
         for ipartition, (split1, split2) in enumerate(splits):
-            combinations[split1.samples[:, 0], 1+ipartition] = 1
-            combinations[split2.samples[:, 0], 1+ipartition] = 2
+            combinations[split1, 1+ipartition] = 1
+            combinations[split2, 1+ipartition] = 2
             # Check for over-sampling, i.e. no same sample used twice here
-            if not (len(np.unique(split1.samples[:, 0])) == len(split1) and
-                    len(np.unique(split2.samples[:, 0])) == len(split2)):
+            if not (len(np.unique(split1)) == len(split1) and
+                    len(np.unique(split2)) == len(split2)):
                 raise RuntimeError(
                     "%s needs a partitioner which does not reuse "
                     "the same the same samples more than once"
@@ -519,8 +527,7 @@ class SimpleStatBaseSearchlight(BaseSearchlight):
             # figure out for a given splits the blocks we want to work
             # with
             # sample_indicies
-            training_sis = split[0].samples[:, 0]
-            testing_sis = split[1].samples[:, 0]
+            training_sis, testing_sis = split
 
             # That is the GNB specificity
             targets, predictions = self._sl_call_on_a_split(
@@ -106,18 +106,23 @@ class Measure(Learner):
 
 
     def _precall(self, ds):
-        # estimate the NULL distribution when functor is given
-        if self.__null_dist is not None:
-            if __debug__:
-                debug("STAT", "Estimating NULL distribution using %s"
-                      % self.__null_dist)
+        # estimate the NULL distribution when functor is given, unless it
+        # needs the result on the original data (see _postcall)
+        if self.__null_dist is not None and not self.__fit_null_dist_late:
+            self.__fit_null_dist(ds)
+
+
+    def __fit_null_dist(self, ds, **kwargs):
+        if __debug__:
+            debug("STAT", "Estimating NULL distribution using %s"
+                  % self.__null_dist)
 
-            # we need a matching measure instance, but we have to disable
-            # the estimation of the null distribution in that child to prevent
-            # infinite looping.
-            measure = copy.copy(self)
-            measure.__null_dist = None
-            self.__null_dist.fit(measure, ds)
+        # we need a matching measure instance, but we have to disable
+        # the estimation of the null distribution in that child to prevent
+        # infinite looping.
+        measure = copy.copy(self)
+        measure.__null_dist = None
+        self.__null_dist.fit(measure, ds, **kwargs)
 
 
     def _postcall(self, dataset, result):
@@ -133,6 +138,17 @@ class Measure(Learner):
             # a Node's 'pass_attr' to pick up ca.null_prob
             result = self._apply_postproc(dataset, result)
 
+            if self.__fit_null_dist_late:
+                # sequential permutation testing compares against the result.
+                # The measure copy shares the conditional attributes, so
+                # restore those of this call afterwards
+                ca_set = dict([(k, self.ca[k].value)
+                               for k in self.ca.which_set()])
+                self.__fit_null_dist(dataset, observed=result)
+                self.ca.reset()
+                for k, v in ca_set.iteritems():
+                    self.ca[k].value = v
+
             if self.ca.is_enabled('null_t'):
                 # get probability under NULL hyp, but also request
                 # either it belong to the right tail
@@ -183,6 +199,10 @@ class Measure(Learner):
         """Return Null Distribution estimator"""
         return self.__null_dist
 
+    __fit_null_dist_late = property(
+        fget=lambda self: getattr(self.__null_dist, 'sequential_stop',
+                                  None) is not None)
+
 
 class ProxyMeasure(Measure):
     """Wrapper to allow for alternative post-processing of a shared measure.
@@ -314,11 +334,13 @@ class RepeatedMeasure(Measure):
         space = self.get_space()
         concat_as = self._concat_as
 
-        if self.ca.is_enabled("stats") and (not 'stats' in node.ca or
-                                            not node.ca.is_enabled("stats")):
+        store_datasets = ca.is_enabled("datasets")
+        harvest_stats = ca.is_enabled("stats")
+        if harvest_stats and not node.ca.is_enabled("stats"):
             warning("'stats' conditional attribute was enabled, but "
                     "the assigned node '%s' either doesn't support it, "
                     "or it is disabled" % node)
+            harvest_stats = False
         # precharge conditional attributes
         ca.datasets = []
 
@@ -330,7 +352,7 @@ class RepeatedMeasure(Measure):
             if __debug__:
                 debug('REPM', "%d-th iteration of %s on %s",
                       (i, self, sds))
-            if ca.is_enabled("datasets"):
+            if store_datasets:
                 # store dataset in ca
                 ca.datasets.append(sds)
             # run the beast
@@ -349,8 +371,7 @@ class RepeatedMeasure(Measure):
             # store
             results.append(result)
 
-            if ca.is_enabled("stats") and 'stats' in node.ca \
-               and node.ca.is_enabled("stats"):
+            if harvest_stats:
                 if not ca.is_set('stats'):
                     # create empty stats container of matching type
                     ca.stats = node.ca['stats'].value.__class__()
@@ -15,6 +15,7 @@ import numpy as np
 
 from mvpa2.base.dochelpers import borrowkwargs, _repr_attrs
 from mvpa2.misc.neighborhood import IndexQueryEngine, Sphere
+from mvpa2.clfs.gnb import _log_likelihoods
 
 from mvpa2.measures.adhocsearchlightbase import \
      SimpleStatBaseSearchlight, _STATS
@@ -136,25 +137,18 @@ class GNBSearchlight(SimpleStatBaseSearchlight):
         # Now it is time to "classify" our samples.
         # and for that we first need to compute corresponding
         # probabilities (or may be un
-        data = X[split[1].samples[:, 0]]
+        data = X[testing_sis]
 
-        # argument of exponentiation
-        scaled_distances = \
-             -0.5 * (((data - pl.means[:, np.newaxis, ...])**2) \
-                     / pl.variances[:, np.newaxis, ...])
-
-        # incorporate the normalization from normals
-        lprob_csfs = norm_weight[:, np.newaxis, ...] + scaled_distances
-
-        ## First we need to reshape to get class x samples x features
-        lprob_csf = lprob_csfs.reshape(lprob_csfs.shape[:2] + (-1,))
+        ## class x samples x features
+        lprob_csf = _log_likelihoods(data, pl.means, pl.variances,
+                                     norm_weight)
 
         ## Now we come to naive part which requires looping
         ## through all spheres
         if __debug__:
             debug('SLC', "  Doing 'Searchlight'")
         # resultant logprobs for each class x sample x roi
-        lprob_cs_sl = np.zeros(lprob_csfs.shape[:2] + (nroi_fids,))
+        lprob_cs_sl = np.zeros(lprob_csf.shape[:2] + (nroi_fids,))
         indexsum_fx(lprob_csf, roi_fids, out=lprob_cs_sl)
 
         lprob_cs_sl += logpriors
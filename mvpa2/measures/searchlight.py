@@ -26,7 +26,9 @@ from mvpa2.base.progress import ProgressBar
 if externals.exists('h5py'):
     # Is optionally required for passing searchlight
     # results via storing/reloading hdf5 files
-    from mvpa2.base.hdf5 import h5save, h5load
+    import h5py
+    from mvpa2.base.hdf5 import h5save, h5load, obj2hdf, hdf2obj, \
+         LazyHDF5Array
 
 from mvpa2.datasets import hstack, Dataset
 from mvpa2.support import copy
@@ -93,11 +95,7 @@ class BaseSearchlight(Measure):
                                % nproc)
 
         self._queryengine = queryengine
-        if roi_ids is not None and not isinstance(roi_ids, str) \
-                and not len(roi_ids):
-            raise ValueError, \
-                  "Cannot run searchlight on an empty list of roi_ids"
-        self.__roi_ids = roi_ids
+        self._set_roi_ids(roi_ids)
         self.nproc = nproc
 
 
@@ -202,7 +200,14 @@ class BaseSearchlight(Measure):
         raise NotImplementedError("Must be implemented in the derived classes")
 
     queryengine = property(fget=lambda self: self._queryengine)
-    roi_ids = property(fget=lambda self: self.__roi_ids)
+    def _set_roi_ids(self, roi_ids):
+        if roi_ids is not None and not isinstance(roi_ids, str) \
+                and not len(roi_ids):
+            raise ValueError("Cannot run searchlight on an empty list of "
+                             "roi_ids")
+        self.__roi_ids = roi_ids
+
+    roi_ids = property(fget=lambda self: self.__roi_ids, fset=_set_roi_ids)
 
 
 class Searchlight(BaseSearchlight):
@@ -286,6 +291,7 @@ class Searchlight(BaseSearchlight):
                  tmp_prefix='tmpsl',
                  nblocks=None,
                  preallocate_output=False,
+                 results_file=None,
                  **kwargs):
         """
         Parameters
@@ -328,6 +334,17 @@ class Searchlight(BaseSearchlight):
           datameasure is computed. The user should verify the correct
           assignment of sample attributes and feature attributes, since no
           hstacking is performed within each computing block.
+          With results_backend == 'hdf5' (and no results_postproc_fx), each
+          computing block writes its results directly into a preallocated,
+          chunked and compressed HDF5 dataset in a file of its own, and the
+          block files are combined into the output via a virtual dataset.
+          Results of the datameasure must then be numeric.
+        results_file : str, optional
+          If specified, output samples combined from the blocks' HDF5 files
+          (see preallocate_output) are kept in this file as a virtual dataset
+          and are read only when accessed.  Block files are stored next to
+          it, named after it.  By default the samples are read into memory
+          and all files are removed.
         **kwargs
           In addition this class supports all keyword arguments of its
           base-class :class:`~mvpa2.measures.searchlight.BaseSearchlight`.
@@ -340,6 +357,7 @@ class Searchlight(BaseSearchlight):
             # Assure having hdf5
             externals.exists('h5py', raise_=True)
         self.preallocate_output = preallocate_output
+        self.results_file = results_file
         self.results_fx = Searchlight._concat_results \
                               if results_fx is None else results_fx
         self.tmp_prefix = tmp_prefix
@@ -361,6 +379,7 @@ class Searchlight(BaseSearchlight):
             + _repr_attrs(self, ['results_postproc_fx'])
             + _repr_attrs(self, ['results_backend'], default='native')
             + _repr_attrs(self, ['results_fx', 'nblocks'])
+            + _repr_attrs(self, ['results_file'])
             )
 
 
@@ -403,10 +422,18 @@ class Searchlight(BaseSearchlight):
         # p_results here is either a generator from pprocess.Map or a list.
         # In case of a generator it allows to process results as they become
         # available
+        if self._store_output:
+            p_results = list(p_results)
+        if self._store_output and self.__are_stored_blocks(p_results):
+            # blocks were written into files -- combine them without
+            # passing any samples through this process
+            results = [[self.__combine_stored_results(p_results)]]
+        else:
+            results = self.__handle_all_results(p_results)
         result_ds = self.results_fx(sl=self,
                                     dataset=dataset,
                                     roi_ids=roi_ids,
-                                    results=self.__handle_all_results(p_results))
+                                    results=results)
 
         # Assure having a dataset (for paranoid ones)
         if not is_datasetlike(result_ds):
@@ -477,12 +504,17 @@ class Searchlight(BaseSearchlight):
                 debug('SLC', "Post-processing %d results in proc_block using %s"
                       % (len(results), self.results_postproc_fx))
             results = self.results_postproc_fx(results)
+        return self.__store_results(results, iblock)
+
+    def __store_results(self, results, iblock):
+        """Prepare results of a block for passing them back"""
         if self.results_backend == 'native':
             pass                        # nothing special
         elif self.results_backend == 'hdf5':
             # store results in a temporary file and return a filename
-            results_file = tempfile.mktemp(prefix=self.tmp_prefix,
-                                           suffix='-%s.hdf5' % iblock)
+            fd, results_file = tempfile.mkstemp(prefix=self.tmp_prefix,
+                                                suffix='-%s.hdf5' % iblock)
+            os.close(fd)
             if __debug__:
                 debug('SLC', "Storing results into %s" % results_file)
             h5save(results_file, results)
@@ -574,8 +606,16 @@ class Searchlight(BaseSearchlight):
         first_res, roi = self.__process_roi(ds, block[0], measure,
                                             assure_dataset)
         nsamples, nfeatures = first_res.shape
-        results = np.empty((nsamples, nfeatures * len(block)),
-                           dtype=first_res.samples.dtype)
+        # object arrays cannot be stored in HDF5 datasets
+        store_output = self._store_output \
+                       and not first_res.samples.dtype.hasobject
+        if store_output:
+            results_file, hdf, results = self.__create_block_store(
+                iblock, (nsamples, nfeatures * len(block)),
+                first_res.samples.dtype)
+        else:
+            results = np.empty((nsamples, nfeatures * len(block)),
+                               dtype=first_res.samples.dtype)
         if __debug__:
             debug('SLC', "Preallocated ouput of shape %s" % str(results.shape))
         results[:, :nfeatures] = first_res.samples
@@ -628,6 +668,12 @@ class Searchlight(BaseSearchlight):
         if __debug__:
             # just to get to new line
             debug('SLC', '')
+        if store_output:
+            # samples are in the file already, store the attributes alongside
+            sa = dict([(k, first_res.sa[k].value) for k in first_res.sa])
+            obj2hdf(hdf, dict(sa=sa, fa=dict(fa), a=dict(a)), 'attrs')
+            hdf.close()
+            return results_file
         # now make it a dataset and a list to make it compatible with the rest
         results = [Dataset(results, sa=first_res.sa, a=dict(a), fa=dict(fa))]
 
@@ -636,21 +682,115 @@ class Searchlight(BaseSearchlight):
                 debug('SLC', "Post-processing %d results in proc_block using %s"
                       % (len(results), self.results_postproc_fx))
             results = self.results_postproc_fx(results)
-        if self.results_backend == 'native':
-            pass                        # nothing special
-        elif self.results_backend == 'hdf5':
-            # store results in a temporary file and return a filename
-            results_file = tempfile.mktemp(prefix=self.tmp_prefix,
-                                           suffix='-%s.hdf5' % iblock)
-            if __debug__:
-                debug('SLC', "Storing results into %s" % results_file)
-            h5save(results_file, results)
-            if __debug__:
-                debug('SLC_', "Results stored")
-            results = results_file
+        return self.__store_results(results, iblock)
+
+    _store_output = property(
+        fget=lambda self: self.results_backend == 'hdf5'
+                          and self.preallocate_output
+                          and not self.results_postproc_fx,
+        doc="Whether blocks write their output directly into HDF5 files")
+
+    def __block_filename(self, iblock):
+        """Name of the file to store the output of a block in"""
+        if self.results_file:
+            return '%s-%s.hdf5' % (os.path.splitext(self.results_file)[0],
+                                   iblock)
+        fd, filename = tempfile.mkstemp(prefix=self.tmp_prefix,
+                                        suffix='-%s.hdf5' % iblock)
+        os.close(fd)
+        return filename
+
+    def __create_block_store(self, iblock, shape, dtype):
+        """Preallocate the output of a block in a file of its own
+
+        Chunks span all samples of a range of features, so results of
+        subsequent ROIs go into the same chunk, which is kept in the chunk
+        cache until it is complete.
+        """
+        nsamples, nfeatures = shape
+        itemsize = np.dtype(dtype).itemsize
+        chunk_features = max(1, min(nfeatures,
+                                    2 ** 18 // max(1, nsamples * itemsize)))
+        chunk_nbytes = nsamples * chunk_features * itemsize
+        results_file = self.__block_filename(iblock)
+        if __debug__:
+            debug('SLC', "Storing results into %s" % results_file)
+        hdf = h5py.File(results_file, 'w',
+                        rdcc_nbytes=max(2 ** 20, 2 * chunk_nbytes))
+        results = hdf.create_dataset('samples', shape=shape, dtype=dtype,
+                                     chunks=(nsamples, chunk_features),
+                                     compression='gzip')
+        return results_file, hdf, results
+
+    @staticmethod
+    def __are_stored_blocks(results_files):
+        """Whether blocks stored their samples directly (see h5save otherwise)
+        """
+        for results_file in results_files:
+            hdf = h5py.File(results_file, 'r')
+            try:
+                if not 'samples' in hdf:
+                    return False
+            finally:
+                hdf.close()
+        return True
+
+    def __combine_stored_results(self, results_files):
+        """Combine output files of all blocks into a single dataset
+
+        Samples of the blocks are mapped into a virtual HDF5 dataset, which
+        is either read at once or kept on disk (see results_file).
+        """
+        shapes = []
+        fa = defaultdict(list)
+        a = defaultdict(list)
+        for results_file in results_files:
+            hdf = h5py.File(results_file, 'r')
+            try:
+                shapes.append(hdf['samples'].shape)
+                dtype = hdf['samples'].dtype
+                attrs = hdf2obj(hdf['attrs'])
+            finally:
+                hdf.close()
+            if len(shapes) == 1:
+                sa = attrs['sa']
+            for k, v in attrs['fa'].iteritems():
+                fa[k].extend(v)
+            for k, v in attrs['a'].iteritems():
+                a[k].extend(v)
+        layout = h5py.VirtualLayout(
+            shape=(shapes[0][0], sum([shape[1] for shape in shapes])),
+            dtype=dtype)
+        if self.results_file:
+            output_file = self.results_file
         else:
-            raise RuntimeError("Must not reach this point")
-        return results
+            fd, output_file = tempfile.mkstemp(prefix=self.tmp_prefix,
+                                               suffix='-output.hdf5')
+            os.close(fd)
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        start = 0
+        for results_file, shape in zip(results_files, shapes):
+            end = start + shape[1]
+            # refer to the block files relative to the output file, so they
+            # can be moved together
+            layout[:, start:end] = h5py.VirtualSource(
+                os.path.relpath(results_file, output_dir), 'samples',
+                shape=shape)
+            start = end
+        if __debug__:
+            debug('SLC', "Combining %d blocks into %s of shape %s"
+                  % (len(results_files), output_file, layout.shape))
+        hdf = h5py.File(output_file, 'w')
+        hdf.create_virtual_dataset('samples', layout)
+        if self.results_file:
+            # the proxy keeps the file open for as long as it is needed
+            samples = LazyHDF5Array(hdf['samples'])
+        else:
+            samples = hdf['samples'][()]
+            hdf.close()
+            for filename in results_files + [output_file]:
+                os.unlink(filename)
+        return Dataset(samples, sa=sa, fa=dict(fa), a=dict(a))
 
     def __set_datameasure(self, datameasure):
         """Set the datameasure"""
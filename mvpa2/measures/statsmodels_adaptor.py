@@ -24,6 +24,7 @@ if externals.exists('statsmodels', raise_=True):
 
 from mvpa2.measures.base import FeaturewiseMeasure
 from mvpa2.datasets.base import Dataset
+from mvpa2.misc.ols import ols_fit, OLSResults
 
 __all__ = [ 'UnivariateStatsModels', 'GLM' ]
 
@@ -54,7 +55,8 @@ class UnivariateStatsModels(FeaturewiseMeasure):
 
     Set up a model generator -- it yields an instance of an OLS model for
     a particular design and feature vector. The generator will be called
-    internally for each feature in the dataset.
+    internally for each feature in the dataset.  Without a model generator
+    OLS models are fitted to all features at once, which is a lot faster.
 
     >>> model_gen = lambda y, x: sm.OLS(y, x)
 
@@ -125,16 +127,23 @@ class UnivariateStatsModels(FeaturewiseMeasure):
 
     is_trained = True
 
-    def __init__(self, exog, model_gen, res='params', add_constant=True,
+    _native_results = ('params', 'bse', 'tvalues', 'pvalues', 'scale', 'ssr')
+    """Results available without fitting a statsmodels model per feature"""
+
+    def __init__(self, exog, model_gen=None, res='params', add_constant=True,
                  **kwargs):
         """
         Parameters
         ----------
         exog : array-like
           Column ordered (observations in rows) design matrix.
-        model_gen : callable
+        model_gen : callable or None
           Callable that returns a StatsModels model when called like
-          ``model_gen(endog, exog)``.
+          ``model_gen(endog, exog)``.  If None, an OLS model is fitted to
+          all features at once by :func:`~mvpa2.misc.ols.ols_fit`, unless
+          ``res`` requires a statsmodels results instance (i.e. a callable
+          or an attribute other than 'params', 'bse', 'tvalues', 'pvalues',
+          'scale' or 'ssr').
         res : {'params', 'tvalues', ...} or 1d array or 2d array or callable
           Variable of interest that should be reported as feature-wise
           measure. If a str, the corresponding attribute of the model fit result
@@ -164,7 +173,10 @@ class UnivariateStatsModels(FeaturewiseMeasure):
     def __fitmodel1d(self, Y):
         """Helper for apply_along_axis()"""
         res = self._res
-        results = self._model_gen(Y, self._exog).fit()
+        model_gen = self._model_gen
+        if model_gen is None:
+            model_gen = sm.OLS
+        results = model_gen(Y, self._exog).fit()
         t_to_z = lambda t, df: stats.norm.ppf(stats.t.cdf(t, df))
         if isinstance(res, np.ndarray):
             if len(res.shape) == 1:
@@ -190,17 +202,38 @@ class UnivariateStatsModels(FeaturewiseMeasure):
             return res(results)
 
 
+    def __fitmodels(self, Y):
+        """Fit an OLS model to all features at once"""
+        res = self._res
+        results = ols_fit(self._exog, Y)
+        if isinstance(res, np.ndarray):
+            if len(res.shape) == 1:
+                tstats = results.t_test(res)
+                return np.array([tstats[k] for k in OLSResults.t_test_stats])
+            elif len(res.shape) == 2:
+                fstats = results.f_test(res)
+                return np.array([fstats[k] for k in OLSResults.f_test_stats])
+            else:
+                raise ValueError("Test specification (via `res`) has to be 1d or 2d array")
+        return np.atleast_2d(getattr(results, res))
+
+
     def _call(self, dataset):
-        # compute the regression once per feature
-        results = np.apply_along_axis(self.__fitmodel1d, 0, dataset.samples)
+        res = self._res
+        if self._model_gen is None and (isinstance(res, np.ndarray)
+                                        or res in self._native_results):
+            results = self.__fitmodels(dataset.samples)
+        else:
+            # compute the regression once per feature
+            results = np.apply_along_axis(self.__fitmodel1d, 0,
+                                          dataset.samples)
         # figure out potential description of the results
         sa = None
-        res = self._res
         if isinstance(res, np.ndarray):
             if len(res.shape) == 1:
-                sa = ['tvalue', 'pvalue', 'effect', 'sd', 'df', 'zvalue']
+                sa = list(OLSResults.t_test_stats)
             elif len(res.shape) == 2:
-                sa = ['fvalue', 'pvalue', 'df_num', 'df_denom']
+                sa = list(OLSResults.f_test_stats)
         elif isinstance(res, str):
             sa = [res] * len(results)
         if sa is not None:
@@ -226,5 +259,5 @@ class GLM(UnivariateStatsModels):
                               design,
                               res=voi,
                               add_constant=False,
-                              model_gen=lambda y, x: sm.OLS(y, x),
+                              model_gen=None,
                               **kwargs)
@@ -0,0 +1,235 @@
+# emacs: -*- mode: python; py-indent-offset: 4; indent-tabs-mode: nil -*-
+# vi: set ft=python sts=4 ts=4 sw=4 et:
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the PyMVPA package for the
+#   copyright and license terms.
+#
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Mass-univariate least squares fits of a common design to many features.
+
+The design matrix is factorized once and the model is fitted to all
+features (columns of the data) with a single matrix product.  Tests of
+t-contrasts and F-contrasts are computed for all features at once as well.
+"""
+
+__docformat__ = 'restructuredtext'
+
+from mvpa2.base import externals
+
+if externals.exists('scipy', raise_=True):
+    import scipy.stats as st
+
+import numpy as np
+
+if __debug__:
+    from mvpa2.base import debug
+
+__all__ = ['ols_fit', 'OLSResults']
+
+
+def _lstsq(X, Y):
+    """Least squares fit of all columns of Y
+
+    Returns parameter estimates, sum of squared residuals and the
+    normalized covariance of the parameter estimates.
+    """
+    pinv_X = np.linalg.pinv(X)
+    params = np.dot(pinv_X, Y)
+    resid = Y - np.dot(X, params)
+    ssr = np.sum(resid * resid, axis=0)
+    return params, ssr, np.dot(pinv_X, pinv_X.T)
+
+
+def _ar1_whiten(A, rho):
+    """Prais-Winsten transformation for an AR(1) process with coefficient rho
+    """
+    out = A.copy()
+    out[1:] -= rho * A[:-1]
+    out[0] *= np.sqrt(1 - rho ** 2)
+    return out
+
+
+def ols_fit(X, Y, weights=None, ar1=False, ar1_bins=100):
+    """Fit a linear model with a common design to all features at once
+
+    Parameters
+    ----------
+    X : array (nsamples x nregressors)
+      Design matrix.
+    Y : array (nsamples x nfeatures)
+      Data to be modeled, one feature per column.
+    weights : array (nsamples,), optional
+      Weights of the samples for a weighted least squares fit (inversely
+      proportional to the variance of the samples).
+    ar1 : bool, optional
+      If True, the fit is followed by a second one on data and design
+      prewhitened according to the AR(1) coefficient of the residuals of
+      each feature.  Features with similar coefficients get fitted together.
+    ar1_bins : int, optional
+      AR(1) coefficients are rounded to multiples of 1/ar1_bins to group
+      features for prewhitening.
+
+    Returns
+    -------
+    OLSResults
+    """
+    X = np.asanyarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, np.newaxis]
+    Y = np.asanyarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, np.newaxis]
+    if len(X) != len(Y):
+        raise ValueError("Design matrix has %d rows, but there are %d samples"
+                         % (len(X), len(Y)))
+    if weights is not None:
+        sw = np.sqrt(np.asanyarray(weights, dtype=float))[:, np.newaxis]
+        X = X * sw
+        Y = Y * sw
+
+    df_resid = len(X) - np.linalg.matrix_rank(X)
+    params, ssr, cov = _lstsq(X, Y)
+    nfeatures = Y.shape[1]
+    groups = np.zeros(nfeatures, dtype=int)
+    rho = None
+
+    if ar1:
+        resid = Y - np.dot(X, params)
+        rho = np.sum(resid[1:] * resid[:-1], axis=0) \
+              / np.sum(resid * resid, axis=0)
+        del resid
+        # keep it stationary
+        rho = np.clip(np.round(np.nan_to_num(rho) * ar1_bins) / ar1_bins,
+                      -0.99, 0.99)
+        urho, groups = np.unique(rho, return_inverse=True)
+        if __debug__:
+            debug('STAT', "Fitting AR(1) model with %d groups of features",
+                  (len(urho),))
+        cov = np.empty((len(urho),) + cov.shape)
+        for i, r in enumerate(urho):
+            ids = np.where(groups == i)[0]
+            params[:, ids], ssr[ids], cov[i] = \
+                _lstsq(_ar1_whiten(X, r), _ar1_whiten(Y[:, ids], r))
+    else:
+        cov = cov[np.newaxis]
+
+    return OLSResults(params, ssr, cov, groups, df_resid, rho=rho)
+
+
+class OLSResults(object):
+    """Results of a least squares fit of a linear model to many features
+
+    Attributes mimic the ones of a statsmodels ``RegressionResults``, but
+    have a trailing features axis.
+    """
+
+    t_test_stats = ('tvalue', 'pvalue', 'effect', 'sd', 'df', 'zvalue')
+    """Statistics returned by `t_test`, in the order to report them"""
+    f_test_stats = ('fvalue', 'pvalue', 'df_num', 'df_denom')
+    """Statistics returned by `f_test`, in the order to report them"""
+
+    def __init__(self, params, ssr, normalized_cov_params, groups, df_resid,
+                 rho=None):
+        """
+        Parameters
+        ----------
+        params : array (nregressors x nfeatures)
+          Parameter estimates.
+        ssr : array (nfeatures,)
+          Sum of squared residuals.
+        normalized_cov_params : array (ngroups x nregressors x nregressors)
+          Normalized covariance of the parameter estimates for each group
+          of features fitted together.
+        groups : array (nfeatures,)
+          Index of the group of each feature.
+        df_resid : int
+          Residual degrees of freedom.
+        rho : array (nfeatures,), optional
+          AR(1) coefficients used for prewhitening.
+        """
+        self.params = params
+        self.ssr = ssr
+        self.normalized_cov_params = normalized_cov_params
+        self.groups = groups
+        self.df_resid = df_resid
+        self.rho = rho
+
+    @property
+    def scale(self):
+        """Estimate of the residual variance"""
+        return self.ssr / self.df_resid
+
+    @property
+    def bse(self):
+        """Standard errors of the parameter estimates"""
+        diag = np.diagonal(self.normalized_cov_params, axis1=1, axis2=2)
+        return np.sqrt(diag[self.groups].T * self.scale)
+
+    @property
+    def tvalues(self):
+        """t-statistics of the parameter estimates"""
+        return self.params / self.bse
+
+    @property
+    def pvalues(self):
+        """Two-sided p-values of the t-statistics of the parameter estimates
+        """
+        return 2 * st.t.sf(np.abs(self.tvalues), self.df_resid)
+
+    def t_test(self, contrast):
+        """Test a t-contrast of the parameter estimates for all features
+
+        Parameters
+        ----------
+        contrast : array (nregressors,)
+
+        Returns
+        -------
+        dict
+          With arrays (nfeatures,) of 'tvalue', 'pvalue' (two-sided),
+          'effect', 'sd', 'df' and 'zvalue'.
+        """
+        c = np.asanyarray(contrast, dtype=float)
+        effect = np.dot(c, self.params)
+        var = np.einsum('i,gij,j->g', c, self.normalized_cov_params, c)
+        sd = np.sqrt(var[self.groups] * self.scale)
+        t = effect / sd
+        df = self.df_resid
+        # z-values matching the tails of the t-distribution, taking the
+        # smaller tail for precision
+        z = np.where(t > 0,
+                     -st.norm.ppf(st.t.sf(t, df)),
+                     st.norm.ppf(st.t.cdf(t, df)))
+        return dict(tvalue=t,
+                    pvalue=2 * st.t.sf(np.abs(t), df),
+                    effect=effect,
+                    sd=sd,
+                    df=np.repeat(float(df), len(t)),
+                    zvalue=z)
+
+    def f_test(self, contrasts):
+        """Test an F-contrast of the parameter estimates for all features
+
+        Parameters
+        ----------
+        contrasts : array (ncontrasts x nregressors)
+
+        Returns
+        -------
+        dict
+          With arrays (nfeatures,) of 'fvalue', 'pvalue', 'df_num' and
+          'df_denom'.
+        """
+        R = np.atleast_2d(np.asanyarray(contrasts, dtype=float))
+        q = len(R)
+        Rb = np.dot(R, self.params)
+        invcov = np.linalg.inv(
+            np.einsum('ij,gjk,lk->gil', R, self.normalized_cov_params, R))
+        f = np.einsum('in,nij,jn->n', Rb, invcov[self.groups], Rb) \
+            / (q * self.scale)
+        nfeatures = len(f)
+        return dict(fvalue=f,
+                    pvalue=st.f.sf(f, q, self.df_resid),
+                    df_num=np.repeat(float(q), nfeatures),
+                    df_denom=np.repeat(float(self.df_resid), nfeatures))
@@ -723,7 +723,8 @@ def mask2slice(mask):
     Parameters
     ----------
     mask: boolean array
-      The mask.
+      The mask.  An ascending sequence of integer indices is accepted as
+      well.
 
     Returns
     -------
@@ -731,12 +732,16 @@ def mask2slice(mask):
       If possible the boolean mask is converted into a `slice`. If this is not
       possible the unmodified boolean mask is returned.
     """
-    # the filter should be a boolean array
-    # TODO Could be easily extended to also accept index arrays
     if not len(mask):
         raise ValueError("Got an empty mask.")
-    # get indices of non-zero filter elements
-    idx = mask.nonzero()[0]
+    mask = np.asanyarray(mask)
+    if mask.dtype == np.bool_:
+        # get indices of non-zero filter elements
+        idx = mask.nonzero()[0]
+    elif np.issubdtype(mask.dtype, np.integer) and mask.min() >= 0:
+        idx = mask
+    else:
+        return mask
     if not len(idx):
         return slice(0)
     idx_start = idx[0]
@@ -746,9 +751,9 @@ def mask2slice(mask):
         # we need to figure out if there is a regular step-size
         # between elements
         stepsizes = np.unique(idx[1:] - idx[:-1])
-        if len(stepsizes) > 1:
-            # multiple step-sizes -> slicing is not possible -> return
-            # orginal filter
+        if len(stepsizes) > 1 or stepsizes[0] <= 0:
+            # multiple (or non-ascending) step-sizes -> slicing is not
+            # possible -> return orginal filter
             return mask
         else:
             idx_step = stepsizes[0]
@@ -74,7 +74,7 @@ class SurfaceQueryEngine(QueryEngineInterface):
 
         if self.distance_metric == 'dijkstra':
             # Pre-compute neighbor information (and ignore the output).
-            surface.neighbors
+            surface.edge_length_matrix
 
     def __repr__(self, prefixes=None):
         if prefixes is None:
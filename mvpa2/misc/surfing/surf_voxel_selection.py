@@ -27,6 +27,7 @@ __docformat__ = 'restructuredtext'
 
 import time
 import collections
+import itertools
 import operator
 import datetime
 import math
@@ -109,6 +110,7 @@ class VoxelSelector(object):
         self._distance_metric = distance_metric # }
         self._surf = distance_surf                     # } save input
         self._n2v = n2v                       # }
+        self._n2v_arrays = None # sparse version of n2v; computed lazily
         self._outside_node_margin = outside_node_margin
 
     def _select_approx(self, voxprops, count=None):
@@ -147,9 +149,7 @@ class VoxelSelector(object):
         if not distkey in voxprops:
             raise KeyError("No distance key %s in it - cannot select voxels" %
                            distkey)
-        allds = voxprops[distkey]
-
-        #assert sorted(allds)==allds #that's what voxprops should give us
+        allds = np.asarray(voxprops[distkey])
 
         n = len(allds)
 
@@ -158,46 +158,39 @@ class VoxelSelector(object):
 
         # here, a 'chunk' is a set of voxels at the same distance. voxels are
         # selected in chunks with increasing distance. either all voxels in a
-        # chunk are selected or none.
-        curchunk = []
-        prevd = allds[0]
-        chunkcount = 1
-        for i in xrange(n):
-            d = allds[i] # distance
-            if i > 0 and prevd != d:
-                if i >= count: # we're done, use the chunk we have now
-                    break
-                curchunk = [i] # start a new chunk
-                chunkcount += 1
-            else:
-                curchunk.append(i)
+        # chunk are selected or none. The chunk to consider is the one
+        # containing the count-th nearest voxel; find its distance without
+        # sorting all distances.
+        kth = max(count - 1, 0)
+        d = allds[np.argpartition(allds, kth)[kth]]
 
-            prevd = d
-
-        # see if the last chunk should be added or not to be as close as
-        # possible to count
-        firstpos = curchunk[0]
-        lastpos = curchunk[-1]
+        firstpos = np.sum(allds < d)
+        lastpos = np.sum(allds <= d) - 1
+        chunkcount = len(np.unique(allds[allds <= d]))
 
         # difference in distance between desired count and positions
         delta = (count - firstpos) - (lastpos - count)
         if delta > 0:
             # lastpos is closer to count
-            cutpos = lastpos + 1
+            keep = allds <= d
         elif delta < 0:
             # firstpos is closer to count
-            cutpos = firstpos
+            keep = allds < d
         else:
             # it's a tie, choose quasi-randomly based on chunkcount
-            cutpos = firstpos if chunkcount % 2 == 0 else (lastpos + 1)
+            keep = allds < d if chunkcount % 2 == 0 else allds <= d
+
+        # selected voxels, sorted by distance
+        idxs = np.nonzero(keep)[0]
+        idxs = idxs[np.argsort(allds[idxs], kind='mergesort')]
 
         for k in voxprops.keys():
-            voxprops[k] = voxprops[k][:cutpos]
+            voxprops[k] = np.asarray(voxprops[k])[idxs]
 
         return voxprops
 
 
-    def disc_voxel_attributes(self, src):
+    def disc_voxel_attributes(self, src, initial_n2d=None):
         '''
         Voxel selection for single center node
 
@@ -205,6 +198,9 @@ class VoxelSelector(object):
         ----------
         src: int
             Index of center node to be used as searchlight center
+        initial_n2d: dict or None
+            Distances from src to surrounding nodes up to the initial radius,
+            as returned by circlearound_n2d. If None, these are computed.
 
         Returns
         -------
@@ -265,7 +261,9 @@ class VoxelSelector(object):
 
         maxiter = 100
         for counter in xrange(maxiter):
-            if radius_mm == 0:
+            if counter == 0 and initial_n2d is not None:
+                around_n2d = initial_n2d
+            elif radius_mm == 0:
                 # only the node itself.
                 # this should work except for very strange surfaces where
                 # multiple nodes occupy exactly the same spatial location
@@ -304,10 +302,10 @@ class VoxelSelector(object):
 
         return voxel_attributes
 
-    def disc_voxel_indices_and_attributes(self, src):
+    def disc_voxel_indices_and_attributes(self, src, initial_n2d=None):
         ''' For now this is a wrapper
         TODO integrate with calling function'''
-        attrs = self.disc_voxel_attributes(src)
+        attrs = self.disc_voxel_attributes(src, initial_n2d=initial_n2d)
 
         if not attrs:
             return None, None
@@ -315,6 +313,45 @@ class VoxelSelector(object):
         idxs = attrs.pop(LINEAR_VOXEL_INDICES)
         return idxs, attrs
 
+    def disc_voxel_indices_and_attributes_many(self, srcs, batch_size=64):
+        '''Voxel selection for multiple center nodes
+
+        Parameters
+        ----------
+        srcs: list of int
+            Indices of center nodes to be used as searchlight center
+        batch_size: int
+            Number of center nodes for which Dijkstra distances are
+            computed at once.
+
+        Returns
+        -------
+        idxs_attrs: generator
+            Yields, for each node in srcs, the output from
+            disc_voxel_indices_and_attributes.
+        '''
+        n2v = self._n2v
+        batched = self._distance_metric.lower()[0] == 'd' and \
+                        self._initradius_mm > 0
+
+        for start in xrange(0, len(srcs), batch_size):
+            batch = srcs[start:start + batch_size]
+
+            initial_n2ds = dict()
+            if batched:
+                # nodes outside the volume are often skipped altogether,
+                # so only compute their distances when needed
+                in_vol = [src for src in batch
+                          if src in n2v and n2v[src] is not None]
+                n2ds = self._surf.dijkstra_distances(in_vol,
+                                                     self._initradius_mm,
+                                                     batch_size=batch_size)
+                initial_n2ds = dict(zip(in_vol, n2ds))
+
+            for src in batch:
+                yield self.disc_voxel_indices_and_attributes(src,
+                                            initial_n2d=initial_n2ds.get(src))
+
 
     def nodes2voxel_attributes(self, n2d, n2v, distancesummary=min):
         '''
@@ -350,6 +387,8 @@ class VoxelSelector(object):
             the gray matter)
 
         '''
+        if distancesummary is min:
+            return self._nodes2voxel_attributes_min(n2d, n2v)
 
         # mapping from voxel indices to all distances
         v2dps = collections.defaultdict(set)
@@ -390,11 +429,88 @@ class VoxelSelector(object):
 
         return voxel_attributes
 
+    def _node2voxels_arrays(self, n2v):
+        '''Sparse (CSR) representation of a node to voxels mapping
+
+        Returns
+        -------
+        indptr_vox_pos: tuple of numpy.ndarray
+            (indptr, voxels, positions), so that node i is associated with
+            voxels[indptr[i]:indptr[i+1]], with relative positions in the
+            grey matter positions[indptr[i]:indptr[i+1]].
+        '''
+        if n2v is self._n2v and self._n2v_arrays is not None:
+            return self._n2v_arrays
+
+        nodes = sorted(nd for nd, vps in n2v.iteritems() if vps)
+        nnodes = nodes[-1] + 1 if nodes else 0
+
+        counts = np.zeros((nnodes,), dtype=np.int_)
+        voxels = []
+        positions = []
+        for nd in nodes:
+            vps = n2v[nd]
+            counts[nd] = len(vps)
+            voxels.append(np.fromiter(vps.iterkeys(), dtype=np.int_,
+                                      count=len(vps)))
+            positions.append(np.fromiter(vps.itervalues(), dtype=np.float_,
+                                         count=len(vps)))
+
+        indptr = np.hstack(([0], np.cumsum(counts))).astype(np.int_)
+        if nodes:
+            voxels = np.hstack(voxels)
+            positions = np.hstack(positions)
+        else:
+            voxels = np.zeros((0,), dtype=np.int_)
+            positions = np.zeros((0,), dtype=np.float_)
+
+        arrays = indptr, voxels, positions
+        if n2v is self._n2v:
+            self._n2v_arrays = arrays
+        return arrays
+
+    def _nodes2voxel_attributes_min(self, n2d, n2v):
+        '''Vectorized implementation of nodes2voxel_attributes
+        with distancesummary=min'''
+        indptr, voxels, positions = self._node2voxels_arrays(n2v)
+        nnodes = len(indptr) - 1
+
+        nodes = np.fromiter(n2d.iterkeys(), dtype=np.int_, count=len(n2d))
+        ds = np.fromiter(n2d.itervalues(), dtype=np.float_, count=len(n2d))
+
+        inside = (nodes >= 0) & (nodes < nnodes)
+        nodes, ds = nodes[inside], ds[inside]
+
+        # gather the voxels of all nodes
+        starts = indptr[nodes]
+        counts = indptr[nodes + 1] - starts
+        offsets = np.cumsum(counts) - counts
+        idxs = np.arange(np.sum(counts)) - np.repeat(offsets - starts, counts)
+
+        vx = voxels[idxs]
+        ps = positions[idxs]
+        ds = np.repeat(ds, counts)
+
+        # for each voxel, keep the minimum (distance, position) tuple
+        order = np.lexsort((ps, ds, vx))
+        vx, ds, ps = vx[order], ds[order], ps[order]
+        first = np.ones(vx.shape, dtype=np.bool_)
+        first[1:] = vx[1:] != vx[:-1]
+        vx, ds, ps = vx[first], ds[first], ps[first]
+
+        # sort by distance to center node; ties by voxel index
+        order = np.argsort(ds, kind='mergesort')
+
+        return {LINEAR_VOXEL_INDICES: vx[order].astype(np.int32),
+                CENTER_DISTANCES: ds[order].astype(np.float32),
+                GREY_MATTER_POSITION: ps[order].astype(np.float32)}
+
 def voxel_selection(vol_surf_mapping, radius, source_surf=None, source_surf_nodes=None,
                     distance_metric='dijkstra',
                     eta_step=10, nproc=None,
                     outside_node_margin=None,
-                    results_backend=None, tmp_prefix='tmpvoxsel'):
+                    results_backend=None, tmp_prefix='tmpvoxsel',
+                    storage='dict'):
 
     """
     Voxel selection for multiple center nodes on the surface
@@ -437,6 +553,12 @@ def voxel_selection(vol_surf_mapping, radius, source_surf=None, source_surf_node
         If specified -- serves as a prefix for temporary files storage
         if results_backend == 'hdf5'.  Thus can specify the directory to use
         (trailing file path separator is not added automagically).
+    storage: 'dict' or 'csr'
+        How the selected voxels are stored. 'dict' (default) gives a
+        volume_mask_dict.VolumeMaskDictionary; 'csr' gives a
+        volume_mask_dict.CSRVolumeMaskDictionary, which stores all masks
+        in a few arrays and is faster to merge, store and load for many
+        center nodes.
 
     Returns
     -------
@@ -510,7 +632,7 @@ def voxel_selection(vol_surf_mapping, radius, source_surf=None, source_surf_node
     # make a sparse_attributes instance when we know what the attributes are
     node2volume_attributes = None
 
-    attribute_mapper = voxel_selector.disc_voxel_indices_and_attributes
+    attribute_mapper = voxel_selector.disc_voxel_indices_and_attributes_many
 
     srcs_order = [source_surf_nodes[node] for node in visitorder]
     src_trg_nodes = [(src, src2intermediate[src]) for src in srcs_order]
@@ -546,7 +668,12 @@ def voxel_selection(vol_surf_mapping, radius, source_surf=None, source_surf_node
                                source_nvertices=source_surf.nvertices)
 
 
-    init_output = lambda: volume_mask_dict.VolumeMaskDictionary(
+    storage_classes = dict(dict=volume_mask_dict.VolumeMaskDictionary,
+                           csr=volume_mask_dict.CSRVolumeMaskDictionary)
+    if not storage in storage_classes:
+        raise ValueError('Illegal storage %r' % storage)
+
+    init_output = lambda: storage_classes[storage](
                                     vol_surf_mapping.volgeom,
                                     intermediate_surf,
                                     meta=parameter_dict)
@@ -664,6 +791,8 @@ def _reduce_mapper(node2volume_attributes, attribute_mapper,
                    results_backend='native', tmp_prefix='tmpvoxsel'):
     '''applies voxel selection to a list of src_trg_indices
     results are added to node2volume_attributes.
+    attribute_mapper maps a list of target nodes to an iterable with
+    (voxel indices, attributes) for each target node.
     '''
 
     if not src_trg_indices:
@@ -692,8 +821,11 @@ def _reduce_mapper(node2volume_attributes, attribute_mapper,
     bar = ProgressBar()
     n = len(src_trg_indices)
 
-    for i, (src, trg) in enumerate(src_trg_indices):
-        idxs, misc_attrs = attribute_mapper(trg)
+    trgs = [trg for _, trg in src_trg_indices]
+    idxs_attrs = attribute_mapper(trgs)
+
+    for i, ((src, trg), (idxs, misc_attrs)) in \
+                    enumerate(itertools.izip(src_trg_indices, idxs_attrs)):
 
         if idxs is not None:
             node2volume_attributes.add(int(src), idxs, misc_attrs)
@@ -725,7 +857,7 @@ def run_voxel_selection(radius, volume, white_surf, pial_surf,
                          nsteps=10, eta_step=1, nproc=None,
                          outside_node_margin=None,
                          results_backend=None, tmp_prefix='tmpvoxsel',
-                         node_voxel_mapping='maximal'):
+                         node_voxel_mapping='maximal', storage='dict'):
 
     """
     Voxel selection wrapper for multiple center nodes on the surface
@@ -799,7 +931,12 @@ def run_voxel_selection(radius, volume, white_surf, pial_surf,
         If 'minimal_lowres' then each voxel is associated with at most one
         node, and each node that is mapped onto has a corresponding node
         (at the same spatial location) in source_surf.
-
+    storage: 'dict' or 'csr'
+        How the selected voxels are stored. 'dict' (default) gives a
+        volume_mask_dict.VolumeMaskDictionary; 'csr' gives a
+        volume_mask_dict.CSRVolumeMaskDictionary, which stores all masks
+        in a few arrays and is faster to merge, store and load for many
+        center nodes.
 
     Returns
     -------
@@ -827,7 +964,8 @@ def run_voxel_selection(radius, volume, white_surf, pial_surf,
                           eta_step=eta_step, nproc=nproc,
                           outside_node_margin=outside_node_margin,
                           results_backend=results_backend,
-                          tmp_prefix=tmp_prefix)
+                          tmp_prefix=tmp_prefix,
+                          storage=storage)
 
     return sel
 
@@ -33,6 +33,7 @@ if externals.exists('nibabel'):
 
 from mvpa2.misc.neighborhood import Sphere
 from mvpa2.mappers.base import ChainMapper
+from mvpa2.support.nibabel.surf import _SpatialIndex
 
 class VolGeom(object):
     '''Defines a mapping between sub and linear indices and world coordinate
@@ -178,6 +179,23 @@ class VolGeom(object):
     def __reduce__(self):
         return (self.__class__, (self._shape, self._affine, self._mask))
 
+    @property
+    def spatial_index(self):
+        '''KD-tree over the world coordinates of all voxels
+
+        Returns
+        -------
+        index : surf._SpatialIndex
+            Index for nearest neighbour and radius queries, where the i-th
+            indexed coordinate is the center of the voxel with linear
+            index i. It is computed on the first call and cached afterwards.
+        '''
+        if not hasattr(self, '_spatial_index'):
+            xyz = self.lin2xyz(np.arange(self.nvoxels))
+            self._spatial_index = _SpatialIndex(xyz)
+
+        return self._spatial_index
+
     @property
     def mask(self):
         '''
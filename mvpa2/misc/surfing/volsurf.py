@@ -869,63 +869,17 @@ class VolumeBasedSurface(surf.Surface):
             return False
         return self._vg == other._vg
 
+    @property
+    def spatial_index(self):
+        # vertices are voxel centers, so share the index of the volume
+        return self._vg.spatial_index
+
     def circlearound_n2d(self, src, radius, metric='euclidean'):
         shortmetric = metric[0].lower()
 
         if shortmetric == 'e':
-            v = self.vertices
-
-            # make sure src is a 1x3 array
-            if type(src) is tuple and len(src) == 3:
-                src = np.asarray(src)
-
-            if isinstance(src, np.ndarray):
-                if src.shape not in ((1, 3), (3,), (3, 1)):
-                    raise ValueError("Illegal shape: should have 3 elements")
-
-                src_coord = src if src.shape == (1, 3) else np.reshape(src, (1, 3))
-            else:
-                src_coord = np.reshape(v[src, :], (1, 3))
-
-            # ensure it is a float
-            src_coord = np.asanyarray(src_coord, dtype=np.float)
-
-            # make a mask around center
-            voxel2world = self._vg.affine
-            world2voxel = np.linalg.inv(voxel2world)
-
-            nrm = np.linalg.norm(voxel2world, 2)
-
-            max_extent = np.ceil(radius / nrm + 1)
-
-            src_ijk = self._vg.xyz2ijk(src_coord)
-
-            # min and max ijk coordinates
-            mn = (src_ijk.ravel() - max_extent).astype(np.int_)
-            mx = (src_ijk.ravel() + max_extent).astype(np.int_)
-
-
-            # set boundaries properly
-            mn[mn < 0] = 0
-
-            sh = np.asarray(self._vg.shape[:3])
-            mx[mx > sh] = sh[mx > sh]
-
-            msk_ijk = np.zeros(self._vg.shape[:3], np.int)
-            msk_ijk[mn[0]:mx[0], mn[1]:mx[1], mn[2]:mx[2]] = 1
-
-            msk_lin = msk_ijk.ravel()
-
-            # indices of voxels around the mask
-            idxs = np.nonzero(msk_lin)[0]
-
-            d = volgeom.distance(src_coord, v[idxs])[0, :]
-
-            n = d.size
-            node2dist = dict((idxs[i], d[i]) for i in np.arange(n)
-                                    if d[i] <= radius)
-
-            return node2dist
+            return super(VolumeBasedSurface, self).circlearound_n2d(src,
+                                                        radius, metric)
 
         elif shortmetric == 'd':
             return {src:0.}
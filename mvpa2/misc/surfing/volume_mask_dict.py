@@ -21,12 +21,15 @@ and __getstate__ - have to flag somehow whether this mapping was present.
 
 __docformat__ = 'restructuredtext'
 
+import json
 from collections import Mapping
 
 import numpy as np
 
 from mvpa2.base import externals
 from mvpa2.misc.surfing import volgeom
+from mvpa2.support.nibabel import surf
+from mvpa2.support.nibabel.surf import _SpatialIndex
 
 from mvpa2.support.utils import deprecated
 
@@ -712,7 +715,7 @@ class VolumeMaskDictionary(Mapping):
             True iff the other instance has the same volume geometry
             and source as the current instance
         '''
-        if not isinstance(other, self.__class__):
+        if not isinstance(other, VolumeMaskDictionary):
             return False
 
         return self.volgeom == other.volgeom and self.source == other.source
@@ -882,7 +885,11 @@ class VolumeMaskDictionary(Mapping):
 
         if not flat_srcs:
             if fallback_euclidean_distance:
-                flat_srcs = self.keys()
+                # nearest over all mask centers
+                keys, index = self._source_spatial_index()
+                ds, idxs = index.nearest(xyz_trg)
+                ds[np.isnan(ds)] = np.inf
+                return keys[idxs[np.argmin(ds)]]
             else:
                 return None
 
@@ -896,6 +903,20 @@ class VolumeMaskDictionary(Mapping):
 
         return source
 
+    def _source_spatial_index(self):
+        '''Helper function that returns the keys and a KD-tree over the
+        coordinates of their mask centers'''
+        keys = self.keys()
+        cached = getattr(self, '_lazy_source_index', None)
+
+        # masks cannot be removed, so a change in the number of masks
+        # means the index is outdated
+        if cached is None or len(cached[0]) != len(keys):
+            cached = (keys, _SpatialIndex(self.xyz_source(keys)))
+            self._lazy_source_index = cached
+
+        return cached
+
     def source2nearest_target(self, source):
         """Find the voxel nearest to a mask center
 
@@ -921,6 +942,696 @@ class VolumeMaskDictionary(Mapping):
         return trgs[i / src_xyz.shape[0]]
 
 
+class CSRVolumeMaskDictionary(VolumeMaskDictionary):
+    """Collection of 3D volume masks stored in compressed sparse row format.
+
+    This class provides the same interface as VolumeMaskDictionary, but
+    rather than storing a separate array for each mask, the voxel indices
+    of all masks are stored in a single array (as in
+    scipy.sparse.csr_matrix), together with an array of row pointers. The
+    same holds for auxiliary properties. As a result, lookups over many
+    masks (get_mask, get_targets, target2sources) are vectorized, and
+    instances can be stored and loaded efficiently (see to_npz, from_npz,
+    to_hdf5 and from_hdf5), optionally memory-mapping the arrays.
+
+    Masks added with add(...) are kept in a small buffer, which is
+    appended to the arrays upon the first access.
+    """
+    def __init__(self, vg, source, meta=None, keys=None, indptr=None,
+                 indices=None, aux=None):
+        """Initialize a CSRVolumeMaskDictionary
+
+        Parameters
+        ----------
+        vg: volgeom.VolGeom or fmri_dataset-like or str
+            data structure that contains volume geometry information.
+        source: Surface.surf or numpy.ndarray or None
+            structure that contains the geometric information of
+            (the centers of) each mask.
+        meta: dict or None
+            Optional meta data stored with this instance.
+        keys: list or None
+            Keys of the masks; the i-th key refers to the i-th row.
+        indptr: numpy.ndarray or None
+            Row pointers with len(keys)+1 values, so that the voxel indices
+            of the i-th mask are indices[indptr[i]:indptr[i+1]].
+        indices: numpy.ndarray or None
+            Linear voxel indices of all masks.
+        aux: dict or None
+            Mapping from auxiliary labels to (indptr, data) tuples, with
+            the same layout as (indptr, indices).
+        """
+        self._volgeom = volgeom.from_any(vg)
+        self._source = source
+        self._meta = meta
+
+        self._set_arrays(keys, indptr, indices, aux)
+
+    def _set_arrays(self, keys, indptr, indices, aux):
+        '''Helper function to set the CSR storage'''
+        if keys is None:
+            keys = []
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        keys = list(keys)
+
+        if indptr is None:
+            indptr = np.zeros((1,), dtype=np.int_)
+        if indices is None:
+            indices = np.zeros((0,), dtype=np.int_)
+
+        key2row = dict((key, i) for i, key in enumerate(keys))
+        if len(key2row) != len(keys):
+            raise ValueError('Keys are not unique')
+        if len(indptr) != len(keys) + 1 or indptr[-1] != len(indices):
+            raise ValueError('Size mismatch between keys, indptr and '
+                             'indices')
+
+        if aux is None:
+            aux = dict()
+        for label, (aux_indptr, aux_data) in aux.iteritems():
+            if len(aux_indptr) != len(keys) + 1 or \
+                            aux_indptr[-1] != len(aux_data):
+                raise ValueError('Size mismatch for auxiliary label %r' %
+                                 label)
+
+        self._keys = keys
+        self._key2row = key2row
+        self._indptr = indptr
+        self._indices = indices
+        self._aux = dict(aux)
+        self._aux_dtypes = dict((label, data.dtype)
+                                for label, (_, data) in aux.iteritems())
+
+        # masks added but not yet appended to the arrays
+        self._pending = []
+
+        # inverse mapping (targets, target_indptr, rows); computed lazily
+        self._lazy_nbr2src = None
+
+    @classmethod
+    def from_mask_dictionary(cls, vmd):
+        """Convert a VolumeMaskDictionary to CSR storage
+
+        Parameters
+        ----------
+        vmd: VolumeMaskDictionary
+            instance to convert.
+
+        Returns
+        -------
+        csr: CSRVolumeMaskDictionary
+            instance with the same masks and auxiliary information
+            as vmd.
+        """
+        csr = cls(vmd.volgeom, vmd.source, meta=vmd._meta)
+        csr.merge(vmd)
+        return csr
+
+    def __repr__(self, prefixes=None):
+        if prefixes is None:
+            prefixes = []
+        prefixes_ = ['vg=%r' % self._volgeom,
+                    'source=%r' % self._source] + prefixes
+
+        if self._meta is not None:
+            prefixes_.append('meta=%r' % self._meta)
+
+        # only list the keys and not any values, as those can be huge
+        prefixes_.append('keys=<%d>' % len(self))
+        dict_summary = ', '.join('%s=<...>' % k for k in self.aux_keys())
+        prefixes_.append('aux=dict(%s)' % dict_summary)
+
+        return "%s(%s)" % (self.__class__.__name__, ','.join(prefixes_))
+
+    def __str__(self):
+        return '%s(%d centers, volgeom=%s)' % (self.__class__.__name__,
+                                               len(self),
+                                               self._volgeom)
+
+    def add(self, src, nbrs, aux=None):
+        """Add a volume mask
+
+        Parameters
+        ----------
+        src: int or str
+            index or name of volume mask. src should not be already
+            present in this dictionary
+        nbrs: list of int
+            linear voxel indices of the voxels in the mask
+        aux: dict or None
+            auxiliary properties associated with (the voxels in) the volume
+            mask. If the current dictionary instance alraedy has stored
+            auxiliary properties for other masks, then the set of keys in
+            the current mask should be the same as for other masks. In
+            addition, the length of each value in aux should be either
+            the number of elements in nbrs or one.
+        """
+        if not type(src) in [int, basestring]:
+            # for now to avoid unhasbable type
+            raise TypeError("src should be int or str")
+
+        if src in self._key2row:
+            raise ValueError('%s already in %s' % (src, self))
+
+        nbrs = np.asarray(nbrs, dtype=np.int_).ravel()
+        n = len(nbrs)
+
+        aux_arrs = dict()
+        if aux:
+            expected_keys = set(self.aux_keys())
+            if expected_keys and (set(aux) != expected_keys):
+                raise ValueError("aux label mismatch: %s != %s" %
+                                (set(aux), expected_keys))
+            for k, v in aux.iteritems():
+                # ensure that values have the same datatype for different keys
+                v_dtype = self._aux_dtypes.get(k)
+
+                if isinstance(v, (list, tuple, int, float, np.ndarray)):
+                    v_arr = np.asanyarray(v, dtype=v_dtype).ravel()
+                else:
+                    raise ValueError('illegal type %s for %s' % (type(v), v))
+
+                if len(v_arr) not in (n, 1):
+                    raise ValueError('size mismatch: size %d != %d or 1' %
+                                        (len(v_arr), n))
+
+                self._aux_dtypes.setdefault(k, v_arr.dtype)
+                aux_arrs[k] = v_arr
+
+        self._key2row[src] = len(self._keys)
+        self._keys.append(src)
+        self._pending.append((nbrs, aux_arrs))
+        self._lazy_nbr2src = None
+
+    def _consolidate(self):
+        '''Helper function to append masks added by add(...) to the arrays'''
+        pending = self._pending
+        if not pending:
+            return
+
+        self._pending = []
+        nrows = len(self._indptr) - 1
+
+        self._indptr, self._indices = _append_csr_rows(
+                                        (self._indptr, self._indices),
+                                        [nbrs for nbrs, _ in pending],
+                                        np.int_)
+
+        for label, dtype in self._aux_dtypes.iteritems():
+            if label in self._aux:
+                indptr_data = self._aux[label]
+            else:
+                # new label; no values for masks added earlier
+                indptr_data = (np.zeros((nrows + 1,), dtype=np.int_),
+                               np.zeros((0,), dtype=dtype))
+
+            empty = np.zeros((0,), dtype=dtype)
+            rows = [aux_arrs.get(label, empty) for _, aux_arrs in pending]
+            self._aux[label] = _append_csr_rows(indptr_data, rows, dtype)
+
+    def _rows(self, keys):
+        '''Helper function to get the row indices of keys'''
+        return np.asarray([self._key2row[key] for key in keys],
+                          dtype=np.int_)
+
+    def _selected_indices(self, keys=None):
+        '''Helper function that returns voxel indices in masks for keys'''
+        self._check_has_keys(keys)
+        self._consolidate()
+
+        if keys is None:
+            return self._indices
+
+        row_mask = np.zeros((len(self._keys),), dtype=np.bool_)
+        row_mask[self._rows(keys)] = True
+        return self._indices[np.repeat(row_mask, np.diff(self._indptr))]
+
+    def get(self, src):
+        """Return the linear voxel indices of a mask
+
+        Parameters
+        ----------
+        src: int
+            index of mask
+
+        Returns
+        -------
+        idxs: list of int
+            linear voxel indices indexed by src
+        """
+        self._consolidate()
+        i = self._key2row[src]
+        return self._indices[self._indptr[i]:self._indptr[i + 1]].tolist()
+
+    def get_aux(self, src, label):
+        '''Auxiliary information of a mask
+
+        Parameters
+        ----------
+        src: int
+            index of mask
+        label: str
+            label of auxiliary information
+
+        Returns
+        -------
+        vals: list
+            auxiliary information labelled label for mask src
+        '''
+        labels = self.aux_keys()
+        if not label in labels:
+            raise ValueError("%s not in %r" % (label, labels))
+        if not src in self._key2row:
+            raise ValueError('Unknown key %r, label %r' % (src, label))
+
+        self._consolidate()
+        i = self._key2row[src]
+        aux_indptr, aux_data = self._aux[label]
+        return aux_data[aux_indptr[i]:aux_indptr[i + 1]].tolist()
+
+    def aux_keys(self):
+        '''Names of auxiliary labels
+
+        Returns
+        -------
+        keys: list of str
+            Names of auxiliary labels that are supported by get_aux
+        '''
+        return self._aux_dtypes.keys()
+
+    def _ensure_has_target2sources(self):
+        '''Helper function to ensure that inverse mapping is set properly'''
+        if self._lazy_nbr2src is None:
+            self._consolidate()
+            indices = self._indices
+
+            contains = self.volgeom.contains_lin(np.asarray(indices))
+            if not np.all(contains):
+                raise ValueError("Target not in volume: %s" %
+                                 indices[np.logical_not(contains)][0])
+
+            # row of each element in indices
+            rows = np.repeat(np.arange(len(self._keys)),
+                             np.diff(self._indptr))
+
+            # stable sort, so that sources are ordered by row for each target
+            order = np.argsort(indices, kind='mergesort')
+            targets, starts = np.unique(indices[order], return_index=True)
+            target_indptr = np.append(starts, len(order))
+
+            self._lazy_nbr2src = (targets, target_indptr, rows[order])
+
+    def target2sources(self, nbr):
+        """Find the indices of masks that map to a linear voxel index
+
+        Parameters
+        ----------
+        nbr: int
+            Linear voxel index
+
+        Returns
+        -------
+        srcs: list of int
+            Indices i for which get(i) contains nbr
+        """
+        if type(nbr) in (list, tuple):
+            return map(self.target2sources, nbr)
+
+        self._ensure_has_target2sources()
+        targets, target_indptr, rows = self._lazy_nbr2src
+
+        i = np.searchsorted(targets, nbr)
+        if i == len(targets) or targets[i] != nbr:
+            return None
+
+        keys = self._keys
+        return set(keys[row] for row in
+                   rows[target_indptr[i]:target_indptr[i + 1]])
+
+    def get_targets(self):
+        """Return list of voxels that are in one or more masks
+
+        Returns
+        -------
+        idxs: list of int
+            Linear indices of voxels in one or more masks
+        """
+        self._ensure_has_target2sources()
+
+        return self._lazy_nbr2src[0].tolist()
+
+    def get_mask(self, keys=None):
+        """Return a mask for voxels that are included in one or more masks
+
+        Parameters
+        ----------
+        keys: list or None
+            Indices of center ids for which the associated masks must be
+            used. If None, all keys are used.
+
+        Returns
+        -------
+        msk: np.ndarray
+            Three-dimensional array with True for voxels that are
+            included in one or more masks, and False elsewhere
+        """
+        self._check_has_keys(keys)
+        self._ensure_has_target2sources()
+        m_lin = np.zeros((self.volgeom.nvoxels,), dtype=np.int8)
+        m_lin[self._selected_indices(keys)] = 1
+
+        return np.reshape(m_lin, self.volgeom.shape[:3])
+
+    def get_voxel_indices(self, keys=None):
+        """Returns voxel indices at least once selected
+
+        Parameters
+        ----------
+        keys: list or None
+            Indices of center ids for which the associated masks must be
+            used. If None, all keys are used.
+
+        Returns
+        -------
+        voxel_indices: list of tuple
+            List of triples with sub-voxel indices that were selected
+            at least once since the initalization of this class.
+        """
+        lin_vox_arr = np.unique(self._selected_indices(keys))
+
+        return map(tuple, self.volgeom.lin2ijk(lin_vox_arr))
+
+    def __keys__(self):
+        return list(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key2row
+
+    def __reduce__(self):
+        return (self.__class__,
+                (self._volgeom, self._source),
+                self.__getstate__())
+
+    def __getstate__(self):
+        self._consolidate()
+        return (self._volgeom, self._source, self._meta,
+                np.asarray(self._keys), self._indptr, self._indices,
+                dict(self._aux))
+
+    def __setstate__(self, s):
+        self._volgeom, self._source, self._meta = s[:3]
+        self._set_arrays(*s[3:])
+
+    def merge(self, other):
+        """Add masks from another instance
+
+        Parameters
+        ----------
+        other: VolumeMaskDictionary
+            The instance from which masks are added to the current one. The
+            keys in the current and other instance should be disjoint, and
+            auxiliary properties (if present) should have the same labels.
+            If other is a CSRVolumeMaskDictionary its arrays are appended
+            at once.
+        """
+        if not isinstance(other, CSRVolumeMaskDictionary):
+            super(CSRVolumeMaskDictionary, self).merge(other)
+            return
+
+        if not self.is_same_layout(other):
+            raise ValueError("Cannot merge %s with %s" % (self, other))
+
+        if not other:
+            # nothing to add, so we're done
+            return
+
+        if len(self) and set(self.aux_keys()) != set(other.aux_keys()):
+            raise ValueError('Different keys in merge: %s != %s' %
+                                (self.aux_keys(), other.aux_keys()))
+
+        overlap = set(self._key2row).intersection(other._key2row)
+        if overlap:
+            raise ValueError('%s already in %s' % (overlap.pop(), self))
+
+        self._consolidate()
+        other._consolidate()
+
+        indptr, indices = _append_csr_rows((self._indptr, self._indices),
+                                           [(other._indptr, other._indices)],
+                                           np.int_)
+        aux = dict()
+        for label, (o_indptr, o_data) in other._aux.iteritems():
+            dtype = self._aux_dtypes.get(label, o_data.dtype)
+            indptr_data = self._aux.get(label,
+                                   (np.zeros((len(self) + 1,), dtype=np.int_),
+                                    np.zeros((0,), dtype=dtype)))
+            aux[label] = _append_csr_rows(indptr_data, [(o_indptr, o_data)],
+                                          dtype)
+
+        self._set_arrays(self._keys + other._keys, indptr, indices, aux)
+
+    def _to_arrays(self):
+        """Plain arrays representing this instance (see _from_arrays)
+
+        Volume geometry, source, meta data and keys are stored as arrays
+        of numbers or strings, so that loading them requires no pickling.
+        """
+        self._consolidate()
+
+        keys = np.asarray(self._keys)
+        if not len(keys):
+            keys = np.zeros((0,), dtype=np.int_)
+        if keys.dtype.hasobject:
+            raise ValueError("Only keys of a single type (e.g. int or str) "
+                             "can be stored")
+
+        entries = _volgeom_to_arrays(self._volgeom, 'volgeom.')
+        entries.update(keys=keys, indptr=self._indptr, indices=self._indices)
+
+        source = self._source
+        if isinstance(source, surf.Surface):
+            entries['source.vertices'] = source.vertices
+            entries['source.faces'] = source.faces
+        elif source is not None:
+            entries['source'] = np.asarray(source)
+
+        if self._meta is not None:
+            # volume geometries (e.g. from voxel selection) are stored as
+            # arrays, anything else must be JSON serializable
+            meta = dict()
+            for key, value in self._meta.iteritems():
+                if isinstance(value, volgeom.VolGeom):
+                    entries.update(_volgeom_to_arrays(value,
+                                                      'meta.%s.' % key))
+                else:
+                    meta[key] = value
+            entries['meta'] = np.asarray(json.dumps(meta,
+                                                    default=_json_default))
+
+        for label, (aux_indptr, aux_data) in self._aux.iteritems():
+            entries['aux.%s.indptr' % label] = aux_indptr
+            entries['aux.%s.data' % label] = aux_data
+        return entries
+
+    @classmethod
+    def _from_arrays(cls, names, get):
+        """Create an instance from arrays as stored by _to_arrays
+
+        Parameters
+        ----------
+        names: list of str
+          Names of all stored arrays.
+        get: callable
+          Returns the stored array given its name.
+        """
+        vg = _volgeom_from_arrays(names, get, 'volgeom.')
+
+        if 'source.vertices' in names:
+            source = surf.Surface(get('source.vertices'),
+                                  get('source.faces'))
+        elif 'source' in names:
+            source = get('source')
+        else:
+            source = None
+
+        if 'meta' in names:
+            meta = json.loads(str(get('meta')))
+            for name in names:
+                if name.startswith('meta.') and name.endswith('.shape'):
+                    prefix = name[:-5]
+                    meta[prefix[5:-1]] = _volgeom_from_arrays(names, get,
+                                                              prefix)
+        else:
+            meta = None
+
+        aux = dict()
+        for name in names:
+            if name.startswith('aux.') and name.endswith('.indptr'):
+                label = name[4:-7]
+                aux[label] = (get(name), get('aux.%s.data' % label))
+
+        return cls(vg, source, meta=meta, keys=get('keys'),
+                   indptr=get('indptr'), indices=get('indices'), aux=aux)
+
+    def to_npz(self, filename, compress=False):
+        """Save to a .npz file
+
+        Nothing is pickled, so that the file can be loaded with
+        allow_pickle=False.  Apart from volume geometries, values of the meta
+        data must be JSON serializable.
+
+        Parameters
+        ----------
+        filename : str
+        compress : bool, optional
+          If True, savez_compressed is used. Files stored with compression
+          cannot be memory-mapped by from_npz.
+        """
+        savez = np.savez_compressed if compress else np.savez
+        if not filename.endswith('.npz'):
+            filename += '.npz'
+        return savez(filename, **self._to_arrays())
+
+    @classmethod
+    def from_npz(cls, filename, mmap_mode=None):
+        """Load from a .npz file, as stored by to_npz
+
+        Parameters
+        ----------
+        filename: str
+          Filename for the .npz file.
+        mmap_mode: {None, 'r', 'r+', 'c'}, optional
+          If not None, the voxel indices and auxiliary values are not loaded
+          into memory, but memory-mapped from the file using the given mode
+          (see `numpy.memmap`). Requires the file to be stored without
+          compression.
+        """
+        from mvpa2.base.dataset import _npz_memmap
+
+        entries = np.load(filename, allow_pickle=False)
+        try:
+            def get(name):
+                if mmap_mode is None or not _is_csr_data(name):
+                    return entries[name]
+                return _npz_memmap(filename, name, mmap_mode)
+
+            return cls._from_arrays(entries.files, get)
+        finally:
+            entries.close()
+
+    def to_hdf5(self, filename):
+        """Save to an HDF5 file
+
+        Arrays are stored uncompressed, so that they can be memory-mapped by
+        from_hdf5.  Use h5save() to store an instance with compression.
+
+        Parameters
+        ----------
+        filename : str
+        """
+        externals.exists('h5py', raise_=True)
+        import h5py
+
+        hdf = h5py.File(filename, 'w')
+        try:
+            for name, value in self._to_arrays().iteritems():
+                hdf.create_dataset(name, data=value)
+        finally:
+            hdf.close()
+
+    @classmethod
+    def from_hdf5(cls, filename, mmap_mode=None):
+        """Load from an HDF5 file, as stored by to_hdf5
+
+        Parameters
+        ----------
+        filename: str
+          Filename for the HDF5 file.
+        mmap_mode: {None, 'r', 'r+', 'c'}, optional
+          If not None, the voxel indices and auxiliary values are not loaded
+          into memory, but memory-mapped from the file using the given mode
+          (see `numpy.memmap`).  Empty arrays are always loaded.
+        """
+        externals.exists('h5py', raise_=True)
+        import h5py
+        from mvpa2.base.hdf5 import _hdf_to_memmap
+
+        hdf = h5py.File(filename, 'r')
+        try:
+            def get(name):
+                value = None
+                if mmap_mode is not None and _is_csr_data(name):
+                    value = _hdf_to_memmap(hdf[name], mode=mmap_mode)
+                if value is None:
+                    value = hdf[name][()]
+                return value
+
+            return cls._from_arrays(list(hdf), get)
+        finally:
+            hdf.close()
+
+
+def _volgeom_to_arrays(vg, prefix):
+    '''Helper: arrays representing a volume geometry, names starting
+    with prefix'''
+    entries = {prefix + 'shape': np.asarray(vg.shape),
+               prefix + 'affine': vg.affine}
+    if vg.mask is not None:
+        entries[prefix + 'mask'] = vg.mask
+    return entries
+
+
+def _volgeom_from_arrays(names, get, prefix):
+    '''Helper: volume geometry from arrays stored by _volgeom_to_arrays'''
+    mask = get(prefix + 'mask') if prefix + 'mask' in names else None
+    return volgeom.VolGeom(tuple(get(prefix + 'shape')),
+                           get(prefix + 'affine'), mask=mask)
+
+
+def _json_default(obj):
+    '''Helper: JSON representation of numpy values in meta data'''
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError('%r is not JSON serializable' % (obj,))
+
+
+def _is_csr_data(name):
+    '''Helper: whether a stored array holds voxel indices or aux values'''
+    return name == 'indices' or (name.startswith('aux.')
+                                 and name.endswith('.data'))
+
+
+def _append_csr_rows(indptr_data, rows, dtype):
+    '''Helper: appends rows to a CSR (indptr, data) tuple
+
+    Each element in rows is either an array (a single row) or an
+    (indptr, data) tuple (multiple rows). Returns a new (indptr, data) tuple.
+    '''
+    indptr, data = indptr_data
+    indptrs = [np.asarray(indptr, dtype=np.int_)]
+    datas = [data]
+
+    offset = indptrs[0][-1]
+    for row in rows:
+        if type(row) is tuple:
+            row_indptr, row_data = row
+            row_indptr = np.asarray(row_indptr[1:], dtype=np.int_)
+        else:
+            row_data = row
+            row_indptr = np.asarray([len(row)], dtype=np.int_)
+
+        indptrs.append(row_indptr + offset)
+        datas.append(row_data)
+        offset += len(row_data)
+
+    return (np.hstack(indptrs),
+            np.concatenate([np.asarray(d, dtype=dtype) for d in datas]))
+
+
 def _dict_with_arrays2array_tuple(d):
     '''Helper: converts to a more efficient tuple-based representation
 
@@ -30,6 +30,59 @@ else:
     __sdebug = lambda *args: None
 __sdebug.__doc__ = "Shortcut to output debug messages for suite imports"
 
+# Callables importing groups of names into the suite namespace only upon
+# first access to a name not provided otherwise (see _SuiteModule), along
+# with the content of the namespace at the time they were registered
+_deferred_imports = []
+# Names the running deferred import must leave alone, since they got
+# imported after it was registered
+_shadowed_names = set()
+
+def _defer_import(loader):
+    """Register a deferred import at the current position in the suite"""
+    _deferred_imports.append((loader, globals().copy()))
+
+def _defer_names(modname, names=None, requires=None):
+    """Register a deferred import of names from a module
+
+    Names get imported only if the `requires` externals are present.
+    """
+    def loader():
+        if requires is None or externals.exists(requires):
+            _import_names(modname, names)
+    loader.__doc__ = "%s -- requires %s" % (modname, requires)
+    _defer_import(loader)
+
+def _import_names(modname, names=None):
+    """Import names from a module into the suite namespace
+
+    Mimics ``from modname import *`` (or of the given names) as if done
+    at the position the running deferred import was registered at.
+    """
+    mod = __import__(modname, fromlist=names or ['*'])
+    if names is None:
+        names = getattr(mod, '__all__',
+                        [n for n in mod.__dict__ if not n.startswith('_')])
+    scope = globals()
+    for n in names:
+        if not n in _shadowed_names:
+            scope[n] = getattr(mod, n)
+
+def _load_deferred_imports():
+    """Complete all deferred imports"""
+    unset = object()
+    while _deferred_imports:
+        loader, registered_scope = _deferred_imports.pop(0)
+        __sdebug("deferred %s" % loader.__doc__.split(' --')[0])
+        _shadowed_names.update(
+            [n for n, v in _eager_scope.iteritems()
+             if registered_scope.get(n, unset) is not v])
+        try:
+            loader()
+        finally:
+            _shadowed_names.clear()
+
+
 __sdebug('base')
 from mvpa2.base import *
 from mvpa2.base.attributes import *
@@ -46,10 +99,10 @@ from mvpa2.base.state import *
 from mvpa2.base.node import *
 from mvpa2.base.learner import *
 from mvpa2.base.progress import *
+from mvpa2.base.profiling import *
 
-__sdebug('h5py')
-if externals.exists('h5py'):
-    from mvpa2.base.hdf5 import *
+__sdebug('h5py (deferred)')
+_defer_names('mvpa2.base.hdf5', requires='h5py')
 
 __sdebug('reportlab')
 if externals.exists('reportlab'):
@@ -59,11 +112,11 @@ else:
 
 __sdebug('algorithms')
 from mvpa2.algorithms.hyperalignment import *
-if externals.exists('scipy'):
-    # Some pieces do not demand scipy, but for now let's just do this way
-    from mvpa2.algorithms.searchlight_hyperalignment import *
-    from mvpa2.algorithms.connectivity_hyperalignment import *
-    from mvpa2.algorithms.group_clusterthr import *
+# Some pieces do not demand scipy, but for now let's just do this way
+for __modname in ('mvpa2.algorithms.searchlight_hyperalignment',
+                  'mvpa2.algorithms.connectivity_hyperalignment',
+                  'mvpa2.algorithms.group_clusterthr'):
+    _defer_names(__modname, requires='scipy')
 
 __sdebug('clfs')
 from mvpa2 import clfs
@@ -84,34 +137,43 @@ if externals.exists('elasticnet'):
 __sdebug('clfs glmnet')
 if externals.exists('glmnet'):
     from mvpa2.clfs.glmnet import *
-__sdebug('clfs skl')
-if externals.exists('skl'):
+__sdebug('clfs skl (deferred)')
+def __import_skl():
+    """scikit-learn wrappers -- sklearn is expensive to import"""
+    if not externals.exists('skl'):
+        return
     if externals.versions['skl'] >= '0.9':
         import sklearn as skl
     else:
         import scikits.learn as skl
-    from mvpa2.clfs.skl import *
+    globals()['skl'] = skl
+    _import_names('mvpa2.clfs.skl')
+
+_defer_import(__import_skl)
 __sdebug('clfs smlr')
 from mvpa2.clfs.smlr import *
 from mvpa2.clfs.blr import *
 from mvpa2.clfs.gnb import *
 from mvpa2.clfs.stats import *
 from mvpa2.clfs.similarity import *
-if externals.exists('libsvm') or externals.exists('shogun'):
-    __sdebug('clfs svm')
-    from mvpa2.clfs.svm import *
+__sdebug('clfs svm (deferred)')
+def __import_svm():
+    """SVMs -- shogun is expensive to import"""
+    if externals.exists('libsvm') or externals.exists('shogun'):
+        _import_names('mvpa2.clfs.svm')
+
+_defer_import(__import_svm)
 from mvpa2.clfs.transerror import *
-__sdebug('clfs warehouse')
-from mvpa2.clfs.warehouse import *
+__sdebug('clfs warehouse (deferred)')
+# probes for (and imports) all the classifier backends
+_defer_names('mvpa2.clfs.warehouse')
 
 __sdebug('kernels')
 from mvpa2 import kernels
 from mvpa2.kernels.base import *
 from mvpa2.kernels.np import *
-if externals.exists('libsvm'):
-    from mvpa2.kernels.libsvm import *
-if externals.exists('shogun'):
-    from mvpa2.kernels.sg import *
+_defer_names('mvpa2.kernels.libsvm', requires='libsvm')
+_defer_names('mvpa2.kernels.sg', requires='shogun')
 
 __sdebug('datasets')
 from mvpa2 import datasets
@@ -122,9 +184,9 @@ from mvpa2.datasets.formats import *
 from mvpa2.datasets.miscfx import *
 from mvpa2.datasets.eep import *
 from mvpa2.datasets.eventrelated import *
-if externals.exists('nibabel') :
-    from mvpa2.datasets.mri import *
-    from mvpa2.datasets.gifti import map2gifti, gifti_dataset
+_defer_names('mvpa2.datasets.mri', requires='nibabel')
+_defer_names('mvpa2.datasets.gifti', ['map2gifti', 'gifti_dataset'],
+             requires='nibabel')
 from mvpa2.datasets.sources import *
 from mvpa2.datasets.sources.native import *
 from mvpa2.datasets.sources.bids import *
@@ -133,10 +195,10 @@ from mvpa2.datasets import niml
 from mvpa2.datasets.niml import from_niml, to_niml
 from mvpa2.datasets import eeglab
 from mvpa2.datasets.eeglab import eeglab_dataset
-if externals.exists('scipy') :
-    from mvpa2.datasets import cosmo
-    from mvpa2.datasets.cosmo import map2cosmo, cosmo_dataset, \
-                                     CosmoQueryEngine, CosmoSearchlight
+_defer_names('mvpa2.datasets', ['cosmo'], requires='scipy')
+_defer_names('mvpa2.datasets.cosmo',
+             ['map2cosmo', 'cosmo_dataset', 'CosmoQueryEngine',
+              'CosmoSearchlight'], requires='scipy')
 
 
 __sdebug('generators')
@@ -170,9 +232,8 @@ from mvpa2.mappers.fx import *
 from mvpa2.mappers.fxy import *
 from mvpa2.mappers.som import *
 from mvpa2.mappers.zscore import *
-if externals.exists('scipy'):
-    from mvpa2.mappers.detrend import *
-    from mvpa2.mappers.filters import *
+_defer_names('mvpa2.mappers.detrend', requires='scipy')
+_defer_names('mvpa2.mappers.filters', requires='scipy')
 if externals.exists('mdp'):
     from mvpa2.mappers.mdp_adaptor import *
 if externals.exists('mdp ge 2.4'):
@@ -215,72 +276,64 @@ from mvpa2.misc.support import *
 from mvpa2.misc.transformers import *
 from mvpa2.misc.dcov import dCOV, dcorcoef
 
-__sdebug("nibabel")
-if externals.exists("nibabel"):
-    from mvpa2.misc.fsl.melodic import *
+__sdebug("nibabel (deferred)")
+_defer_names('mvpa2.misc.fsl.melodic', requires='nibabel')
 
-if externals.exists("pylab"):
-    from mvpa2.viz import *
-    from mvpa2.misc.plot import *
-    from mvpa2.misc.plot.base import *
-    from mvpa2.misc.plot.erp import *
-    from mvpa2.misc.plot.scatter import *
+__sdebug("plotting (deferred)")
+def __import_plotting():
+    """Plotting helpers -- pylab is expensive to import, so deferred"""
+    if not externals.exists("pylab"):
+        return
+    import pylab as pl
+    globals().setdefault('pl', pl)
+    for modname in ('mvpa2.viz', 'mvpa2.misc.plot', 'mvpa2.misc.plot.base',
+                    'mvpa2.misc.plot.erp', 'mvpa2.misc.plot.scatter'):
+        _import_names(modname)
     if externals.exists(['griddata', 'scipy']):
-        from mvpa2.misc.plot.topo import *
-    from mvpa2.misc.plot.lightbox import plot_lightbox
-
+        _import_names('mvpa2.misc.plot.topo')
+    _import_names('mvpa2.misc.plot.lightbox', ['plot_lightbox'])
     if externals.exists(['matplotlib', 'griddata']):
-        from mvpa2.misc.plot.flat_surf import \
-                FlatSurfacePlotter, curvature_from_any
-
-__sdebug("scipy dependents")
-if externals.exists("scipy"):
-    from mvpa2.support.scipy.stats import scipy
-    from mvpa2.measures.corrcoef import *
-    from mvpa2.measures.rsa import *
-    from mvpa2.clfs.ridge import *
-    from mvpa2.clfs.plr import *
-    from mvpa2.misc.stats import *
-    from mvpa2.clfs.gpr import *
-    from mvpa2.support.nipy import *
+        _import_names('mvpa2.misc.plot.flat_surf',
+                      ['FlatSurfacePlotter', 'curvature_from_any'])
+
+_defer_import(__import_plotting)
+
+__sdebug("scipy dependents (deferred)")
+_defer_names('mvpa2.support.scipy.stats', ['scipy'], requires='scipy')
+for __modname in ('mvpa2.measures.corrcoef', 'mvpa2.measures.rsa',
+                  'mvpa2.clfs.ridge', 'mvpa2.clfs.plr', 'mvpa2.misc.stats',
+                  'mvpa2.clfs.gpr', 'mvpa2.support.nipy'):
+    _defer_names(__modname, requires='scipy')
 
 __sdebug("mappers wavelet")
 if externals.exists("pywt"):
     from mvpa2.mappers.wavelet import *
 
-__sdebug("pylab")
-if externals.exists("pylab"):
-    import pylab as pl
-
-__sdebug("atlases")
-if externals.exists("lxml") and externals.exists("nibabel"):
-    from mvpa2.atlases import *
+__sdebug("atlases (deferred)")
+_defer_names('mvpa2.atlases', requires=['lxml', 'nibabel'])
 
-__sdebug("surface searchlight")
-from mvpa2.misc.surfing.queryengine import SurfaceVerticesQueryEngine, \
-                                           SurfaceVoxelsQueryEngine, \
-                                           SurfaceQueryEngine, \
-                                           disc_surface_queryengine
-
-from mvpa2.misc.surfing import surf_voxel_selection, volgeom, \
-                                volsurf, volume_mask_dict
-
-from mvpa2.misc.surfing.volume_mask_dict import VolumeMaskDictionary
+__sdebug("surface searchlight (deferred)")
+# imports nibabel, if available
+_defer_names('mvpa2.misc.surfing.queryengine',
+             ['SurfaceVerticesQueryEngine', 'SurfaceVoxelsQueryEngine',
+              'SurfaceQueryEngine', 'disc_surface_queryengine'])
+_defer_names('mvpa2.misc.surfing',
+             ['surf_voxel_selection', 'volgeom', 'volsurf',
+              'volume_mask_dict'])
+_defer_names('mvpa2.misc.surfing.volume_mask_dict', ['VolumeMaskDictionary'])
+_defer_names('mvpa2.misc', ['surfing'])
 
 __sdebug("nibabel afni")
 from mvpa2.support.nibabel import afni_niml_dset, afni_suma_1d, \
                                   afni_suma_spec, surf_fs_asc, surf, \
 				                  surf_caret, \
                                   afni_niml_roi, afni_niml_annot
-if externals.exists('nibabel'):
-    from mvpa2.support.nibabel import surf_gifti
+_defer_names('mvpa2.support.nibabel', ['surf_gifti'], requires='nibabel')
 
 
-__sdebug("cmdline")
-if externals.exists("nibabel") and externals.exists("scipy") \
-        and externals.exists('ctypes') \
-        and externals.exists('h5py'):
-    from mvpa2.cmdline.cmd_ttest import *
+__sdebug("cmdline (deferred)")
+_defer_names('mvpa2.cmdline.cmd_ttest',
+             requires=['nibabel', 'scipy', 'ctypes', 'h5py'])
 
 
 __sdebug("ipython goodies")
@@ -296,6 +349,7 @@ def suite_stats(scope_dict=None):
     """
     if scope_dict is None:
         scope_dict = {}
+        _load_deferred_imports()
 
     scope_dict = scope_dict or globals()
     import types
@@ -389,4 +443,46 @@ def suite_stats(scope_dict=None):
 
     return EnvironmentStatistics(scope_dict)
 
+
+# what got imported right away -- taking precedence over deferred imports
+# registered before
+_eager_scope = globals().copy()
+
+import sys as _sys
+from types import ModuleType as _ModuleType
+
+class _SuiteModule(_ModuleType):
+    """Module type of mvpa2.suite, completing deferred imports on demand
+
+    ``from mvpa2.suite import *`` and any access to a name which is not
+    (yet) provided trigger the deferred imports, so they stay transparent
+    while plain ``import mvpa2.suite`` remains cheap.
+    """
+    def __init__(self, module):
+        """Wrap the namespace of the original suite module"""
+        _ModuleType.__init__(self, module.__name__, module.__doc__)
+        # keep the original module alive -- otherwise its namespace,
+        # still used by the functions defined in it, gets wiped
+        self._module = module
+        self.__dict__.update(module.__dict__)
+
+    def __getattr__(self, name):
+        # only invoked if the name was not found
+        if name.startswith('__') or not _deferred_imports:
+            raise AttributeError(name)
+        _load_deferred_imports()
+        self.__dict__.update(self._module.__dict__)
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def __all__(self):
+        _load_deferred_imports()
+        self.__dict__.update(self._module.__dict__)
+        return [n for n in self.__dict__ if not n.startswith('_')]
+
+_sys.modules[__name__] = _SuiteModule(_sys.modules[__name__])
+
 __sdebug("THE END of mvpa2.suite imports")
@@ -17,6 +17,10 @@ This function reads a NIML file and returns a dict that contains all
 NIML information in a tree-like structure (dicts for which some values
 are dicts themselves). Branches are stored in a 'nodes' field.
 
+Files are parsed and written incrementally: binary data is read
+directly into preallocated arrays, and a subset of columns can be read
+without converting the other columns.
+
 For specific types of data, consider afni_niml_dset or afni_niml_annot
 files which provide easier access to the data.
 
@@ -36,7 +40,6 @@ _RE_FLAGS = re.DOTALL  # regular expression matching spans across new lines
 from mvpa2.base import warning
 
 from mvpa2.base import debug
-from mvpa2.misc.io import safe_write
 
 if __debug__:
     if not "NIML" in debug.registered:
@@ -45,6 +48,11 @@ if __debug__:
 _TEXT_ROWSEP = "\n"
 _TEXT_COLSEP = " "
 
+# number of bytes read at once when scanning for headers and end markers
+_READ_CHUNK_SIZE = 1 << 16
+# approximate number of bytes of array data converted at once
+_DATA_BLOCK_SIZE = 1 << 22
+
 # define NIML specific escape characters
 _ESCAPE = {'&lt;': '<',
            '&gt;': '>',
@@ -157,15 +165,12 @@ def _datastring2rawniml(s, niml):
     niform = niml.get('ni_form', None)
 
     if not niform or niform == 'text':
-        data = np.zeros((nrows, ncols), dtype=tp)  # allocate space for data
-        convertor = types.code2python_convertor(onetype)  # string to type convertor
-
-        vals = s.split(None)  # split by whitespace seperator
-        if len(vals) != ncols * nrows:
+        # any whitespace separates values
+        data_1d = np.fromstring(s, dtype=tp, sep=_TEXT_COLSEP)
+        if len(data_1d) != ncols * nrows:
             raise ValueError("unexpected number of elements")
 
-        for i, val in enumerate(vals):
-            data[i // ncols, i % ncols] = convertor(val)
+        data = np.reshape(data_1d, (nrows, ncols))
 
     else:
         dtype = np.dtype(tp)
@@ -179,7 +184,8 @@ def _datastring2rawniml(s, niml):
         elif not 'binary' in niform:
             raise ValueError('Illegal niform %s' % niform)
 
-        data_1d = np.fromstring(s, dtype=tp)
+        # copy, so that the data is writable
+        data_1d = np.frombuffer(s, dtype=tp).copy()
 
         debug('NIML', 'data vector has %d elements, reshape to %d x %d = %d',
               (np.size(data_1d), nrows, ncols, nrows * ncols))
@@ -257,6 +263,8 @@ def find_attribute_node(niml_dict, key, value, just_one=True):
     return r
 
 
+
+
 def rawniml2string(p, form='text'):
     '''Converts a raw NIML element to string representation
 
@@ -272,23 +280,35 @@ def rawniml2string(p, form='text'):
     s: bytearray
         String representation of niml in output form 'form'.
     '''
+    f = BytesIO()
+    _write_rawniml(f, p, form)
+    return f.getvalue()
+
+
+def _write_rawniml(f, p, form):
+    '''Writes a raw NIML element to a binary file-like object
+
+    Data bodies are written in blocks, so that the full string
+    representation of the element is never held in memory.'''
     if type(p) is list:
-        nb = '\n'.encode()
-        return nb.join(rawniml2string(v, form) for v in p)
+        for i, v in enumerate(p):
+            if i > 0:
+                f.write(b'\n')
+            _write_rawniml(f, v, form)
+        return
 
     if not form in ['text', 'binary', 'base64']:
         raise ValueError("Illegal form %s" % form)
 
     q = p.copy()  # make a shallow copy
 
-    has_body = True
+    nodes = q.pop('nodes', None)
+    has_nodes = 'nodes' in p
+    has_data = not has_nodes and 'data' in q
 
-    if 'nodes' in q:
-        s_body = rawniml2string(q.pop('nodes'), form)  # recursion
-    elif 'data' in q:
+    if has_data:
         data = q.pop('data')
         data = types.nimldataassupporteddtype(data)  # ensure the data format is supported by NIML
-        s_body = _data2string(data, form)
 
         if form == 'text':
             q.pop('ni_form', None)  # defaults to text, remove if already there
@@ -298,62 +318,85 @@ def rawniml2string(p, form='text'):
                 q['ni_form'] = byteorder
 
         # remove some unncessary fields
-        for f in ['vec_typ', 'vec_len', 'vec_num']:
-            q.pop(f, None)
-    else:
-        has_body = False
+        for k in ['vec_typ', 'vec_len', 'vec_num']:
+            q.pop(k, None)
 
     s_name = q.pop('name', None).encode()
-    s_header = _header2string(q)
 
-    if has_body:
-        delim = ['<', '\n', ' >', '</', '>']
-        values = [s_name, s_header, s_body, s_name]
+    f.write(b'<' + s_name + b'\n')
+    f.write(_header2string(q))
+
+    if has_nodes:
+        f.write(b' >')
+        _write_rawniml(f, nodes, form)  # recursion
+    elif has_data:
+        f.write(b' >')
+        _write_data(f, data, form)
     else:
-        delim = ['<', '\n', '/>']
-        values = [s_name, s_header]
+        f.write(b'/>')
+        return
+
+    f.write(b'</' + s_name + b'>')
 
-    delim_enc = map(lambda x: x.encode(), delim)
 
-    n_delim = len(delim_enc)
-    assert (n_delim == len(values) + 1)
+def _numpy_data2format(data):
+    '''Returns a %-format for numeric data, or None if there is none'''
+    if types.numpy_data_isint(data):
+        return '%d'
+    elif types.numpy_data_isfloat(data) and \
+            not types.numpy_data_isdouble(data):
+        return '%f'
+    return None
 
-    # zip with unequal length
-    elems = []
-    for i in xrange(n_delim):
-        elems.append(delim_enc[i])
-        if i + 1 < n_delim:
-            # one element less than the number of delimeters
-            elems.append(values[i])
 
-    return b''.join(elems)
+def _rows_per_block(data, multiple_of=1):
+    '''Number of rows of data that fit in approximately one data block'''
+    nbytes_per_row = max(1, data.itemsize * int(np.prod(data.shape[1:])))
+    n = max(1, _DATA_BLOCK_SIZE // nbytes_per_row)
+    return max(multiple_of, n - n % multiple_of)
 
 
-def _data2string(data, form):
-    '''Converts a data element to binary, text or base64 representation'''
+def _write_data(f, data, form):
+    '''Writes a data element in binary, text or base64 representation'''
     if isinstance(data, basestring):
-        return ('"%s"' % encode_escape(data)).encode()
+        f.write(('"%s"' % encode_escape(data)).encode())
 
     elif type(data) is np.ndarray:
+        nrows, ncols = data.shape
+
         if form == 'text' or types.numpy_data_isstring(data):
-            f = types.numpy_data2printer(data)
-            nrows, ncols = data.shape
-            return _TEXT_ROWSEP.join([_TEXT_COLSEP.join([f(data[row, col])
-                                                         for col in xrange(ncols)])
-                                      for row in xrange(nrows)]).encode()
-        elif form == 'binary':
-            data_reshaped = data.reshape((data.shape[1], data.shape[0]))
-            r = data_reshaped.tostring()
-            debug('NIML', 'Binary encoding (len %d -> %d): [%s]' %
-                  (data_reshaped.size, len(r), _partial_string(r, 0)))
-            return r
-        elif form == 'base64':
-            data_reshaped = data.reshape((data.shape[1], data.shape[0]))
-            r = base64.b64encode(data_reshaped.tostring())
-            debug('NIML', 'Encoding ok: [%s]', _partial_string(r, 0))
-            return r
+            fmt = _numpy_data2format(data)
+            if fmt is None:
+                printer = types.numpy_data2printer(data)
+                row2string = lambda row: _TEXT_COLSEP.join(map(printer, row))
+            else:
+                # format whole rows at once from python scalars
+                row_fmt = _TEXT_COLSEP.join([fmt] * ncols)
+                row2string = lambda row: row_fmt % tuple(row)
+
+            step = _rows_per_block(data)
+            for i in xrange(0, nrows, step):
+                block = data[i:(i + step)]
+                if fmt is not None:
+                    block = block.tolist()
+                if i > 0:
+                    f.write(_TEXT_ROWSEP.encode())
+                f.write(_TEXT_ROWSEP.join(map(row2string, block)).encode())
+
+        elif form in ('binary', 'base64'):
+            # base64 blocks must be a multiple of 3 bytes, so that
+            # concatenating the encoded blocks gives a valid encoding
+            is_base64 = form == 'base64'
+            step = _rows_per_block(data, 3 if is_base64 else 1)
+            for i in xrange(0, nrows, step):
+                r = data[i:(i + step)].tostring()
+                if is_base64:
+                    r = base64.b64encode(r)
+                f.write(r)
+            debug('NIML', '%s encoding of %d x %d values', (form, nrows, ncols))
+
         else:
-            raise ValueError("illegal format %s" % format)
+            raise ValueError("illegal format %s" % form)
 
     elif type(data) is list:
         # mixed types, each column in its own container
@@ -361,7 +404,7 @@ def _data2string(data, form):
 
         ncols = len(data)
         if ncols == 0:
-            return "".encode()
+            return
         else:
             nrows = len(data[0])
 
@@ -370,9 +413,9 @@ def _data2string(data, form):
             # else use the entire np array to get a numeric formatter
             fs = [types.numpy_data2printer(d[0] if type(d) is list else d) for d in data]
 
-            return _TEXT_ROWSEP.join([_TEXT_COLSEP.join([fs[col](data[col][row])
-                                                         for col in xrange(ncols)])
-                                      for row in xrange(nrows)]).encode()
+            f.write(_TEXT_ROWSEP.join([_TEXT_COLSEP.join([fs[col](data[col][row])
+                                                          for col in xrange(ncols)])
+                                       for row in xrange(nrows)]).encode())
 
     else:
         raise TypeError("Unknown type %r" % type(data))
@@ -399,7 +442,7 @@ def _header2string(p, keyfirst=None, keylast=None):
     return ("\n".join(rs)).encode()
 
 
-def read(fn, itemifsingletonlist=True, postfunction=None):
+def read(fn, itemifsingletonlist=True, postfunction=None, columns=None):
     '''Reads a NIML dataset
 
     Parameters
@@ -412,6 +455,10 @@ def read(fn, itemifsingletonlist=True, postfunction=None):
     postfunction: None or callable
         If not None then postfunction is applied to the result from reading
         the NIML dataset.
+    columns: None or dict
+        If not None, a mapping from element names to column indices.
+        For elements with these names only the given columns are kept;
+        binary data in other columns is skipped without being converted.
 
     Returns
     -------
@@ -421,10 +468,9 @@ def read(fn, itemifsingletonlist=True, postfunction=None):
 
     import io
 
-    with io.FileIO(fn) as f:
-        s = f.read()
+    with io.open(fn, 'rb') as f:
+        r = _NIMLStreamReader(f).parse(columns=columns)
 
-    r = string2rawniml(s)
     if postfunction is not None:
         r = postfunction(r)
 
@@ -456,7 +502,7 @@ def _partial_string(s, i, maxlen=100):
     return '%s%s%s' % (s[i:(i + startsize)], infix, s[-stopsize:])
 
 
-def string2rawniml(s, i=None):
+def string2rawniml(s, i=None, columns=None):
     '''Parses a NIML string to a raw NIML tree-like structure
 
     Parameters
@@ -467,6 +513,8 @@ def string2rawniml(s, i=None):
         Starting position in the string.
         By default None is used, which means that the entire string is
         converted.
+    columns: None or dict
+        Mapping from element names to column indices to keep (see read).
 
     Returns
     -------
@@ -483,74 +531,169 @@ def string2rawniml(s, i=None):
         i = 0
 
     debug('NIML', 'Parsing at %d, total length %d', (i, len(s)))
-    # start parsing from header
-    #
-    # the tricky part is that binary data can contain characters that also
-    # indicate the end of a data segment, so 'typical' parsing with start
-    # and end markers cannot be done. Instead the header of each part is
-    # read first, then the number of elements is computed based on the
-    # header information, and the required number of bytes is converted.
-    # From then on the remainder of the string is parsed as above.
-
-
-    headerpat = b'\W*<(?P<name>\w+)\W(?P<header>.*?)>'
 
-    nimls = []  # here all found parts are stored
+    f = BytesIO(s)
+    f.seek(i)
+    reader = _NIMLStreamReader(f)
+    nimls = reader.parse(columns=columns)
 
+    if return_pos:
+        return reader.tell(), nimls
+    else:
+        return nimls
 
-    # Keep on reading new parts
-    while True:
-        # ignore any xml tags
-        if s.startswith(b'<?xml', i):
-            i = s.index(b'>', i) + 1
 
-        # try to read a name and header part
-        m = re.match(headerpat, s[i:], _RE_FLAGS)
+class _NIMLStreamReader(object):
+    '''Incremental parser for NIML data in a binary file-like object
 
-        if m is None:
-            # no header - was it the end of a section?
-            m = re.match(b'\W*</\w+>\s*', s[i:], _RE_FLAGS)
+    Headers and text bodies are scanned for markers in chunks. The
+    tricky part is that binary data can contain characters that also
+    indicate the end of a data segment, so 'typical' parsing with start
+    and end markers cannot be done for them. Instead the header of each
+    part is read first, the number of bytes is computed based on the
+    header information, and these bytes are read directly into a
+    preallocated array.
+    '''
 
-            if m is None:
-                if len(s[i:].strip()) == 0:
-                    if return_pos:
-                        return i, nimls
-                    else:
-                        return nimls
-                else:
-                    raise ValueError("No match towards end of header end: [%s] " % _partial_string(s, i))
+    def __init__(self, f):
+        self._f = f
+        self._buf = b''  # read-ahead, not yet parsed
+        self._pos = f.tell()  # position in f of the start of _buf
+
+    def tell(self):
+        '''Position in the underlying file up to which data was parsed'''
+        return self._pos
+
+    def _fill(self, n):
+        '''Reads ahead until at least n bytes are buffered, or at the end'''
+        if len(self._buf) < n:
+            parts = [self._buf]
+            count = len(self._buf)
+            while count < n:
+                chunk = self._f.read(max(n - count, _READ_CHUNK_SIZE))
+                if not chunk:
+                    break
+                parts.append(chunk)
+                count += len(chunk)
+            self._buf = b''.join(parts)
+        return self._buf[:n]
+
+    def _consume(self, n):
+        r = self._fill(n)
+        self._buf = self._buf[len(r):]
+        self._pos += len(r)
+        return r
 
+    def _skip_blank(self):
+        '''Skips whitespace (and null bytes, which can be left over in
+        NIFTI extensions). Returns False if the end was reached.'''
+        while True:
+            stripped = self._buf.lstrip(b' \t\r\n\0')
+            self._pos += len(self._buf) - len(stripped)
+            self._buf = stripped
+            if stripped:
+                return True
+            chunk = self._f.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                return False
+            self._buf = chunk
+
+    def _read_until(self, marker):
+        '''Reads up to marker, which is consumed but not returned'''
+        parts = []
+        buf = self._buf
+        keep = len(marker) - 1  # marker may straddle two chunks
+        while True:
+            j = buf.find(marker)
+            if j >= 0:
+                parts.append(buf[:j])
+                self._buf = buf[(j + len(marker)):]
+                r = b''.join(parts)
+                self._pos += len(r) + len(marker)
+                return r
+
+            if len(buf) > keep:
+                parts.append(buf[:(len(buf) - keep)])
+                buf = buf[(len(buf) - keep):]
+
+            chunk = self._f.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                raise ValueError("Not found expected string %s after "
+                                 "position %d" % (marker, self._pos))
+            buf += chunk
+
+    def _readinto(self, arr):
+        '''Fills a contiguous array with bytes from the input'''
+        flat = arr.reshape(-1).view(np.uint8)
+        n = len(flat)
+
+        # first use what is left in the read-ahead buffer
+        m = min(n, len(self._buf))
+        flat[:m] = np.frombuffer(self._buf[:m], dtype=np.uint8)
+        self._buf = self._buf[m:]
+
+        readinto = getattr(self._f, 'readinto', None)
+        while m < n:
+            if readinto is not None:
+                k = readinto(memoryview(flat[m:]))
             else:
-                # for NIFTI extensions there can be some null bytes left
-                # so get rid of them here
-                remaining = s[i + m.end():].replace(chr(0).encode(), b'').strip()
-
-                if len(remaining) > 0:
-                    # there is more stuff to parse
-                    i += m.end()
-                    continue
-
-
-                # entire file was parsed - we are done
-                debug('NIML', 'Completed parsing, length %d (%d elements)', (len(s), len(nimls)))
-                if return_pos:
-                    return i, nimls
-                else:
-                    return nimls
+                chunk = self._f.read(n - m)
+                k = len(chunk)
+                flat[m:(m + k)] = np.frombuffer(chunk, dtype=np.uint8)
+            if not k:
+                raise ValueError("Expected %d bytes of binary data, but "
+                                 "found only %d" % (n, m))
+            m += k
+
+        self._pos += n
+
+    def parse(self, columns=None, _in_group=False):
+        '''Parses elements until the end of the input or of a group
+
+        Parameters
+        ----------
+        columns: None or dict
+            Mapping from element names to column indices to keep.
+
+        Returns
+        -------
+        nimls: list
+            Parsed NIML elements.
+        '''
+        nimls = []  # here all found parts are stored
+
+        # Keep on reading new parts
+        while self._skip_blank():
+            head = self._fill(5)
+
+            # ignore any xml tags
+            if head == b'<?xml':
+                self._read_until(b'>')
+                continue
 
+            if head.startswith(b'</'):
+                # end of a section
+                self._read_until(b'>')
+                if _in_group:
+                    break
+                continue
 
+            if not head.startswith(b'<'):
+                raise ValueError("No match towards end of header end "
+                                 "at position %d: [%s] " %
+                                 (self._pos,
+                                  _partial_string(self._fill(100), 0)))
 
-        else:
-            # get values from header
-            d = m.groupdict()
-            name, header = d['name'], d['header']
+            self._consume(1)
+            m = re.match(b'(?P<name>\w+)(?P<header>.*)$',
+                         self._read_until(b'>'), _RE_FLAGS)
+            if m is None:
+                raise ValueError("Illegal element header at position %d" %
+                                 self._pos)
 
-            # update current position
-            i += m.end()
+            name, header = m.group('name'), m.group('header')
 
             # parse the keys and values in the header
-            debug('NIML', 'Parsing header %s, header end position %d',
-                  (name, i + m.end()))
             niml = _parse_keyvalues(header)
 
             debug('NIML', 'Found keys %s.', (", ".join(niml.keys())))
@@ -560,122 +703,163 @@ def string2rawniml(s, i=None):
             if niml.get('ni_form', None) == 'ni_group':
                 # it's a group. Parse the group using recursion
                 debug("NIML", "Starting a group %s >>>", niml['name'])
-                i, niml['nodes'] = string2rawniml(s, i)
+                niml['nodes'] = self.parse(columns, _in_group=True)
                 debug("NIML", "<<< ending a group %s", niml['name'])
 
-            elif not 'ni_type' in niml.keys():
+            elif not 'ni_type' in niml:
                 warning('Empty NIML element %s found, skipping' % name)
                 debug('NIML', 'Empty element, skipping')
+                if not header.rstrip().endswith(b'/'):
+                    self._read_until(('</%s>' % niml['name']).encode())
                 continue
 
             else:
                 # it's a normal element with data
-                debug('NIML', 'Parsing element %s from position %d, total '
-                              'length %d', (niml['name'], i, len(s)))
-
-                # set a few data elements
-                datatypes = niml['ni_type']
-                niml['vec_typ'] = types.str2codes(datatypes)
-                niml['vec_len'] = int(niml['ni_dimen'])
-                niml['vec_num'] = len(niml['vec_typ'])
-
-                debug('NIML', 'Element of type %s' % niml['vec_typ'])
-
-                # data can be in string form, binary or base64.
-                is_string = niml['ni_type'] == 'String' or \
-                            not 'ni_form' in niml
-                if is_string:
-                    # string form is handled separately. It's easy to parse
-                    # because it cannot contain any end markers in the data
-
-                    debug("NIML", "Parsing string body for %s", name)
-
-                    vec_typ = niml['vec_typ']
-                    is_mixed_data = len(set(vec_typ)) > 1
-                    is_multiple_string_data = len(vec_typ) > 1 and types._one_str2code('String') == types.findonetype(
-                        vec_typ)
-
-                    if is_mixed_data or is_multiple_string_data:
-                        debug("NIML", "Data is mixed type (string=%s)" % is_multiple_string_data)
-                        # strpat = ('\s*(?P<data>.*)\s*</%s>' % \
-                        #                        (name.decode())).encode()
-                        strpat = ('\s*(?P<data>.*?)\s*</%s>' % \
-                                  (name.decode())).encode()
-
-                        m = re.match(strpat, s[i:], _RE_FLAGS)
-                        is_string_data = is_multiple_string_data
-                    else:
-                        # If the data type is string, it is surrounded by quotes
-                        # Otherwise (numeric data) there are no quotes
-                        is_string_data = niml['ni_type'] == 'String'
-                        quote = '"' if is_string_data else ''
-
-                        # construct the regular pattern for this string
-                        strpat = ('\s*%s(?P<data>[^"]*)[^"]*%s\s*</%s>' % \
-                                  (quote, quote, name.decode())).encode()
-
-                        m = re.match(strpat, s[i:], _RE_FLAGS)
-
-                    if m is None:
-                        # something went wrong
-                        raise ValueError("Could not parse string data from "
-                                         "pos %d: %s" %
-                                         (i, _partial_string(s, i)))
-
-                    # parse successful - get the parsed data
-                    data = m.groupdict()['data']
-
-                    # convert data to raw NIML
-                    data = _datastring2rawniml(data, niml)
-
-                    # if string data, replace escape characters
-                    if is_multiple_string_data or is_string_data:
-                        data = decode_escape(data)
-
-                    # store data
-                    niml['data'] = data
-
-                    # update position
-                    i += m.end()
-
-                    debug('NIML', 'Completed %s, now at %d', (name, i))
-
-                else:
-                    # see how many bytes (characters) to read
-
-                    # convert this part of the string
-                    if 'base64' in niml['ni_form']:
-                        # base 64 has no '<' character - so we should be fine
-                        endpos = s.index(b'<', i + 1)
-                        datastring = s[i:endpos]
-                        nbytes = len(datastring)
-                    else:
-                        # hardcode binary data - see how many bytes we need
-                        nbytes = _binary_data_bytecount(niml)
-                        debug('NIML', 'Raw data with %d bytes - total length '
-                                      '%d, starting at %d', (nbytes, len(s), i))
-                        datastring = s[i:(i + nbytes)]
-
-                    niml['data'] = _datastring2rawniml(datastring, niml)
-
-                    # update position
-                    i += nbytes
-
-                    # ensure that immediately after this segment there is an
-                    # end-part marker
-                    endstr = '</%s>' % name.decode()
-                    if s[i:(i + len(endstr))].decode() != endstr:
-                        raise ValueError("Not found expected end string %s"
-                                         "  (found %s...)" %
-                                         (endstr, _partial_string(s, i)))
-                    i += len(endstr)
+                debug('NIML', 'Parsing element %s from position %d',
+                      (niml['name'], self._pos))
+                self._parse_data(niml, columns)
 
             debug('NIML', "Adding element '%s' with keys %r" % (niml['name'], niml.keys()))
             nimls.append(niml)
 
+        return nimls
+
+    def _parse_data(self, niml, columns):
+        '''Reads the body of a data element and sets its 'data' field'''
+        name = niml['name']
+
+        # set a few data elements
+        niml['vec_typ'] = types.str2codes(niml['ni_type'])
+        niml['vec_len'] = int(niml['ni_dimen'])
+        niml['vec_num'] = len(niml['vec_typ'])
+
+        debug('NIML', 'Element of type %s' % niml['vec_typ'])
+
+        endstr = ('</%s>' % name).encode()
+        cols = None if columns is None else columns.get(name, None)
+
+        # data can be in string form, binary or base64.
+        is_string = niml['ni_type'] == 'String' or \
+                    not 'ni_form' in niml
+        if is_string:
+            # string form is handled separately. It's easy to parse
+            # because it cannot contain any end markers in the data
+            debug("NIML", "Parsing string body for %s", name)
+            data = _stringbody2rawniml(self._read_until(endstr), niml)
+
+        elif 'base64' in niml['ni_form']:
+            # base 64 has no '<' character - so we should be fine
+            datastring = self._read_until(b'<')
+            if self._consume(len(endstr) - 1) != endstr[1:]:
+                raise ValueError("Not found expected end string %s" % endstr)
+            data = _datastring2rawniml(datastring, niml)
+
+        else:
+            data = self._read_binary_data(niml, cols)
+            cols = None  # already selected
+
+            # ensure that immediately after this segment there is an
+            # end-part marker
+            found = self._consume(len(endstr))
+            if found != endstr:
+                raise ValueError("Not found expected end string %s"
+                                 "  (found %s...)" %
+                                 (endstr, _partial_string(found, 0)))
+
+        if cols is not None:
+            data = _select_columns(data, cols)
+
+        if columns is not None and name in columns:
+            vec_typ = [niml['vec_typ'][c] for c in columns[name]]
+            niml['vec_typ'] = vec_typ
+            niml['vec_num'] = len(vec_typ)
+            niml['ni_type'] = types.codes2str(vec_typ)
+
+        niml['data'] = data
+        debug('NIML', 'Completed %s, now at %d', (name, self._pos))
+
+    def _read_binary_data(self, niml, cols=None):
+        '''Reads binary data directly into a (nrows, ncols) array'''
+        nbytes = _binary_data_bytecount(niml)
+        if nbytes is None:
+            raise ValueError("Binary data must have a single type")
+
+        ncols = niml['vec_num']
+        nrows = niml['vec_len']
+        dtype = _niform2dtype(niml['ni_form'],
+                              types.code2numpy_type(niml['vec_typ'][0]))
+
+        debug('NIML', 'Raw data with %d bytes, starting at %d',
+              (nbytes, self._pos))
+
+        if cols is None:
+            data = np.empty((nrows, ncols), dtype=dtype)
+            self._readinto(data)
+        else:
+            # read blocks of rows and keep only the requested columns
+            cols = np.asarray(cols, dtype=np.int_)
+            data = np.empty((nrows, len(cols)), dtype=dtype)
+            step = max(1, _DATA_BLOCK_SIZE // max(1, dtype.itemsize * ncols))
+            block = np.empty((min(step, nrows), ncols), dtype=dtype)
+            for i in xrange(0, nrows, step):
+                n = min(step, nrows - i)
+                self._readinto(block[:n])
+                data[i:(i + n)] = block[:n, cols]
+
+        if not dtype.isnative:
+            data = data.astype(dtype.newbyteorder('='))
+
+        return data
+
+
+def _niform2dtype(niform, tp):
+    '''Data type with the byte order set explicitly in niform, if any'''
+    dtype = np.dtype(tp)
+    if '.' in niform:
+        dtype = types.byteorder_from_niform(str(niform), dtype) or dtype
+    return dtype
+
+
+def _select_columns(data, cols):
+    '''Selects columns from raw NIML data'''
+    if isinstance(data, np.ndarray):
+        return data[:, cols]
+    elif type(data) is list:
+        return [data[c] for c in cols]
+    else:
+        raise ValueError("Cannot select columns from %r" % type(data))
+
+
+def _stringbody2rawniml(s, niml):
+    '''Converts the body of an element in string form to raw NIML'''
+    vec_typ = niml['vec_typ']
+    is_mixed_data = len(set(vec_typ)) > 1
+    is_multiple_string_data = len(vec_typ) > 1 and \
+                    types._one_str2code('String') == types.findonetype(vec_typ)
 
-    # we should never end up here.
-    raise ValueError("this should never happen")
+    s = s.strip()
+    if is_mixed_data or is_multiple_string_data:
+        debug("NIML", "Data is mixed type (string=%s)" % is_multiple_string_data)
+        is_string_data = is_multiple_string_data
+    else:
+        # If the data type is string, it is surrounded by quotes
+        # Otherwise (numeric data) there are no quotes
+        is_string_data = niml['ni_type'] == 'String'
+        if is_string_data:
+            if len(s) < 2 or s[:1] != b'"' or s[-1:] != b'"':
+                raise ValueError("Could not parse string data: %s" %
+                                 _partial_string(s, 0))
+            s = s[1:]
+        s = s.split(b'"', 1)[0]
+
+    # convert data to raw NIML
+    data = _datastring2rawniml(s, niml)
+
+    # if string data, replace escape characters
+    if is_multiple_string_data or is_string_data:
+        data = decode_escape(data)
+
+    return data
 
 
 def _binary_data_bytecount(niml):
@@ -710,8 +894,27 @@ def _binary_data_bytecount(niml):
 
 
 def write(fnout, niml, form='binary', prefunction=None):
+    '''Writes a NIML dataset
+
+    Parameters
+    ----------
+    fnout: str
+        Output filename
+    niml: list or dict
+        (list of) NIML element(s)
+    form: 'text', 'binary', 'base64'
+        Output form of data
+    prefunction: None or callable
+        If not None then prefunction is applied to niml before writing it.
+    '''
     if prefunction is not None:
         niml = prefunction(niml)
 
-    s = rawniml2string(niml, form=form)
-    safe_write(fnout, s)
+    with open(fnout, 'wb') as f:
+        _write_rawniml(f, niml, form)
+        n_written = f.tell()
+
+    n = os.stat(fnout).st_size
+    if n != n_written:
+        raise ValueError("%d bytes out of %d were not written to %s"
+                         % (n_written - n, n_written, fnout))
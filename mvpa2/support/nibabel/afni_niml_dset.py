@@ -358,8 +358,40 @@ def dset2rawniml(s):
     r['nodes'] = nodes + more_nodes
     return r
 
-def read(fn, itemifsingletonlist=True):
-    return niml.read(fn, itemifsingletonlist, rawniml2dset)
+def read(fn, itemifsingletonlist=True, columns=None):
+    '''Reads a NIML dataset
+
+    Parameters
+    ----------
+    fn: str
+        Filename of NIML dataset
+    itemifsingletonlist: boolean
+        If True and the file contains a single dataset, then that dataset
+        is returned. Otherwise a list of datasets is returned.
+    columns: None or list of int
+        If not None, only these columns of the data are read; labels and
+        stats are selected accordingly.
+
+    Returns
+    -------
+    dset: dict or list of dict
+        (list of) afni_niml_dset-like dictionaries
+    '''
+    if columns is None:
+        return niml.read(fn, itemifsingletonlist, rawniml2dset)
+
+    columns = list(columns)
+
+    def select_columns(p):
+        dsets = rawniml2dset(p)
+        for dset in dsets if type(dsets) is list else [dsets]:
+            for key in ('labels', 'stats'):
+                if key in dset:
+                    dset[key] = [dset[key][c] for c in columns]
+        return dsets
+
+    return niml.read(fn, itemifsingletonlist, select_columns,
+                     columns=dict(SPARSE_DATA=columns))
 
 def write(fnout, dset, form='binary'):
     fn = os.path.split(fnout)[1]
@@ -21,6 +21,90 @@ import numpy as np
 _COORD_EPS = 1e-14  # maximum allowed difference between coordinates
 # in order to be considered equal
 
+class _SpatialIndex(object):
+    '''KD-tree over a set of coordinates for nearest neighbour and radius
+    queries.
+
+    Coordinates that are not finite (e.g. NaN) are not indexed, and are
+    never returned by any query.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        Px3 array with coordinates.
+    '''
+
+    def __init__(self, coords):
+        from scipy.spatial import cKDTree
+
+        coords = np.asarray(coords, dtype=np.float_)
+        self._idxs = np.nonzero(np.all(np.isfinite(coords), 1))[0]
+        self._tree = cKDTree(coords[self._idxs]) if len(self._idxs) else None
+
+    def nearest(self, xyz):
+        '''Finds the nearest indexed coordinate
+
+        Parameters
+        ----------
+        xyz : numpy.ndarray
+            Qx3 array with coordinates.
+
+        Returns
+        -------
+        ds_idxs : tuple of numpy.ndarray
+            Two Q-valued vectors (ds, idxs), so that idxs[i] is the index of
+            the nearest indexed coordinate to xyz[i], at distance ds[i]. If
+            there is no such coordinate (e.g. xyz[i] is not finite) then
+            ds[i] is NaN and idxs[i] is -1.
+        '''
+        xyz = np.reshape(np.asarray(xyz, dtype=np.float_), (-1, 3))
+        n = xyz.shape[0]
+
+        ds = np.zeros((n,)) + np.nan
+        idxs = np.zeros((n,), dtype=np.int_) - 1
+
+        finite = np.nonzero(np.all(np.isfinite(xyz), 1))[0]
+        if self._tree is not None and len(finite):
+            d, i = self._tree.query(xyz[finite])
+            ds[finite] = d
+            idxs[finite] = self._idxs[i]
+
+        return ds, idxs
+
+    def within(self, xyz, radius):
+        '''Finds the indexed coordinates within a distance
+
+        Parameters
+        ----------
+        xyz : numpy.ndarray
+            Coordinates of a single center (3 values).
+        radius : float
+            Maximum distance.
+
+        Returns
+        -------
+        idxs_ds : tuple of numpy.ndarray
+            Two vectors (idxs, ds), with the indices of all indexed
+            coordinates at most at distance radius from xyz (in ascending
+            order), and their distances to xyz.
+        '''
+        xyz = np.reshape(np.asarray(xyz, dtype=np.float_), (3,))
+        if self._tree is None or not np.all(np.isfinite(xyz)):
+            return np.zeros((0,), dtype=np.int_), np.zeros((0,))
+
+        # allow for rounding differences in the tree; the exact distances
+        # are applied below
+        i = np.sort(np.asarray(self._tree.query_ball_point(xyz,
+                                                radius * (1 + 1e-9)),
+                               dtype=np.int_))
+        idxs = self._idxs[i]
+        ds = self._tree.data[i] - xyz
+        ds = np.sum(ds * ds, 1) ** .5
+
+        keep = ds <= radius
+        return idxs[keep], ds[keep]
+
+
 class Surface(object):
     '''Cortical surface mesh
 
@@ -208,6 +292,63 @@ class Surface(object):
 
         return dict(self._e2f)  # make a copy
 
+    @property
+    def spatial_index(self):
+        '''KD-tree over the vertex coordinates
+
+        Returns
+        -------
+        index : _SpatialIndex
+            Index for nearest neighbour and radius queries over the
+            vertices of this surface. It is computed on the first call and
+            cached afterwards.
+        '''
+        if not hasattr(self, '_spatial_index'):
+            self._spatial_index = _SpatialIndex(self._v)
+
+        return self._spatial_index
+
+    @property
+    def edge_length_matrix(self):
+        '''Sparse matrix with the (Euclidean) length of each edge.
+
+        Returns
+        -------
+        e2l : scipy.sparse.csr_matrix
+            Symmetric PxP matrix, where P==self.nvertices, so that
+            e2l[i,j]==d means that nodes i and j are connected by an edge
+            of length d.
+
+        Note
+        ----
+        This matrix is computed on the first call and cached afterwards.
+        It should not be modified.
+        '''
+
+        if not hasattr(self, '_nbrs_csr'):
+            from scipy.sparse import coo_matrix
+
+            nv, f, v = self._nv, self._f, self._v
+
+            # all directed edges, in both directions
+            p = f.ravel()
+            q = f[:, [1, 2, 0]].ravel()
+            pq = np.hstack((p, q))
+            qp = np.hstack((q, p))
+
+            # each edge is shared by (up to) two faces; keep it only once
+            keys = np.unique(pq.astype(np.int64) * nv + qp)
+            rows, cols = keys // nv, keys % nv
+
+            d = v[rows] - v[cols]
+            dist = np.sum(d * d, 1) ** .5
+
+            e2l = coo_matrix((dist, (rows, cols)), shape=(nv, nv)).tocsr()
+            e2l.sort_indices()
+            self._nbrs_csr = e2l
+
+        return self._nbrs_csr
+
     @property
     def neighbors(self):
         '''Finds the neighbours for each node and their (Euclidean) distance.
@@ -224,40 +365,24 @@ class Surface(object):
         Note
         ----
         This function computes nbrs if called for the first time, otherwise
-        it caches the results and returns these immediately on the next call'''
+        it caches the results and returns these immediately on the next call.
+        The returned dict is shared between calls and should not be
+        modified. For large surfaces edge_length_matrix is a more
+        efficient representation.'''
 
         if not hasattr(self, '_nbrs'):
-            nbrs = dict()
-            for i in xrange(self._nf):
-                fi = self._f[i]
-
-                for j in xrange(3):
-                    p = fi[j]
-                    q = fi[(j + 1) % 3]
-
-                    if p in nbrs and q in nbrs[p]:
-                        continue
+            e2l = self.edge_length_matrix
+            indptr, indices, data = e2l.indptr, e2l.indices, e2l.data
 
-                    pv = self._v[p]
-                    qv = self._v[q]
-
-                    # writing this out seems a bit quicker - but have to test
-                    sqdist = ((pv[0] - qv[0]) * (pv[0] - qv[0])
-                              + (pv[1] - qv[1]) * (pv[1] - qv[1])
-                              + (pv[2] - qv[2]) * (pv[2] - qv[2]))
-
-                    dist = math.sqrt(sqdist)
-                    if not p in nbrs:
-                        nbrs[p] = dict()
-                    if not q in nbrs:
-                        nbrs[q] = dict()
-
-                    nbrs[q][p] = dist
-                    nbrs[p][q] = dist
+            nbrs = dict()
+            for i in np.nonzero(np.diff(indptr))[0].tolist():
+                lo, hi = indptr[i], indptr[i + 1]
+                nbrs[i] = dict(zip(indices[lo:hi].tolist(),
+                                   data[lo:hi].tolist()))
 
             self._nbrs = nbrs
 
-        return dict(self._nbrs)  # make a copy
+        return self._nbrs
 
     def circlearound_n2d(self, src, radius, metric='euclidean'):
         '''Finds the distances from a center node to surrounding nodes.
@@ -283,9 +408,12 @@ class Surface(object):
         shortmetric = metric.lower()[0]  # only take first letter - for now
 
         if shortmetric == 'e':
-            ds = self.euclidean_distance(src)
-            c = dict((nd, d) for (nd, d) in zip(xrange(self._nv), ds)
-                     if d <= radius)
+            if type(src) is tuple and len(src) == 3:
+                src = np.asarray(src)
+            src_coord = src if isinstance(src, np.ndarray) else self._v[src]
+
+            idxs, ds = self.spatial_index.within(src_coord, radius)
+            c = dict(zip(idxs.tolist(), ds.tolist()))
 
         elif shortmetric == 'd':
             c = self.dijkstra_distance(src, maxdistance=radius)
@@ -319,40 +447,45 @@ class Surface(object):
         results to geodesic distances (unpublished results, NNO)
         '''
 
-        tdist = {src: 0}  # tentative distances
-        fdist = dict()  # final distances
-        candidates = []
-
-        # queue of candidates, sorted by tentative distance
-        heapq.heappush(candidates, (0, src))
-
-        nbrs = self.neighbors
-
-        # algorithm from wikipedia
-        # (http://en.wikipedia.org/wiki/Dijkstra's_algorithm)
-        while candidates:
-            # distance and index of current candidate
-            d, i = heapq.heappop(candidates)
+        for n2d in self.dijkstra_distances([src], maxdistance=maxdistance):
+            return n2d
 
-            if i in fdist:
-                continue  # we already have a final distance for this node
+    def dijkstra_distances(self, srcs, maxdistance=None, batch_size=64):
+        '''Computes Dijkstra distances from multiple nodes
 
-            nbr = nbrs[i]  # neighbours of current candidate
+        Parameters
+        ----------
+        srcs : list of int
+            Indices of center (source) nodes
+        maxdistance: float (default: None)
+            Maximum distance for a node to qualify as a 'surrounding' node.
+            If 'maxdistance is None' then the distances to all nodes is
+            returned.
+        batch_size: int (default: 64)
+            Number of source nodes for which distances are computed at
+            once. Memory use is proportional to batch_size*self.nvertices.
 
-            for nbr_i, nbr_d in nbr.items():
-                dnew = d + nbr_d
+        Returns:
+        --------
+        n2ds : generator
+            Yields, for each node in srcs, a dict "n2d" so that n2d[j]=d"
+            is the distance "d" from that node to node "j".
+        '''
 
-                if maxdistance is not None and dnew > maxdistance:
-                    continue  # skip if too far away
+        from scipy.sparse.csgraph import dijkstra
 
-                if nbr_i not in tdist or dnew < tdist[nbr_i]:
-                    # set distance and append to queue
-                    tdist[nbr_i] = dnew
-                    heapq.heappush(candidates, (tdist[nbr_i], nbr_i))
+        e2l = self.edge_length_matrix
+        limit = np.inf if maxdistance is None else maxdistance
 
-            fdist[i] = tdist[i]  # set final distance
-
-        return fdist
+        srcs = np.asarray(srcs, dtype=np.int_).ravel()
+        for start in xrange(0, len(srcs), batch_size):
+            batch = srcs[start:start + batch_size]
+            # e2l is symmetric, so directed=True gives the same distances
+            # while avoiding a transposed copy of the graph in each call
+            ds = dijkstra(e2l, directed=True, indices=batch, limit=limit)
+            for row in ds:
+                idxs = np.nonzero(np.isfinite(row))[0]
+                yield dict(zip(idxs.tolist(), row[idxs].tolist()))
 
     def dijkstra_shortest_path(self, src, maxdistance=None):
         '''Computes Dijkstra shortest path from one node to surrounding nodes.
@@ -556,21 +689,23 @@ class Surface(object):
             raise ValueError("Expected Px3 array for src_coords")
 
         use_mask = node_mask_indices is not None
-        # vertices to consider
-        v = self.vertices[node_mask_indices] if use_mask else self.vertices
 
-        # indices of these vertices
+        # indices of vertices to consider
         all_idxs = np.arange(self.nvertices)
         masked_idxs = all_idxs[node_mask_indices] if use_mask else all_idxs
 
-        n = src_coords.shape[0]
-        idxs = np.zeros((n,), dtype=np.int)
-        for i in xrange(n):
-            delta = v - src_coords[i]
-            minidx = np.argmin(np.sum(delta ** 2, 1))
-            idxs[i] = masked_idxs[minidx]
+        if use_mask:
+            index = _SpatialIndex(self.vertices[node_mask_indices])
+        else:
+            index = self.spatial_index
+
+        _, minidxs = index.nearest(src_coords)
+
+        # centers without a nearest node (e.g. NaN coordinates)
+        # are mapped to the first node
+        minidxs[minidxs < 0] = 0
 
-        return idxs
+        return masked_idxs[minidxs]
 
     def nodes_on_border(self, node_indices=None):
         '''Determines which nodes are on the border of the surface
@@ -943,7 +1078,8 @@ class Surface(object):
 
     def __reduce__(self):
         # these are lazily computed on the first call to e.g. node2faces
-        lazy_keys = ('_n2f', '_f2el', '_v2ael', '_e2f', '_nbrs')
+        lazy_keys = ('_n2f', '_f2el', '_v2ael', '_e2f', '_nbrs', '_nbrs_csr',
+                     '_spatial_index')
         lazy_dict = dict()
         # TODO: add in efficient way to translate these dictionaries
         #       to something like a numpy array, and implement the 
@@ -953,6 +1089,8 @@ class Surface(object):
         #       _v2ael: array
         #       _e2f: (int,int) -> int
         #       _nbrs: int -> (int -> float)
+        #       _nbrs_csr: scipy.sparse.csr_matrix
+        #       _spatial_index: _SpatialIndex
         #       
         # For now this this functionaltiy is switched off,
         # because pickling it (also with hdf5) takes a long time
@@ -1329,10 +1467,8 @@ class Surface(object):
         MapIcosahedron, where the lower resolution surface defines centers
         in a searchlight whereas the higher resolution surfaces is used to
         delineate the grey matter for voxel selection.
-        This function implements an optimization which in most cases
-        yields solutions much faster than map_to_high_resolution_surf_exact,
-        but may fail to find the correct solution for larger values
-        of epsilon.
+        This function uses a KD-tree over the vertices of highres, and
+        yields solutions much faster than map_to_high_resolution_surf_slow.
 
         Parameters
         ----------
@@ -1394,80 +1530,24 @@ class Surface(object):
                              "this one (%d)" % (nx, ny))
 
 
-        # use a fast approach
-        # slice up the high and low res in smaller boxes
-        # and index them, so that when finding the nearest coordinates
-        # it only requires to consider a limited number of nodes
-        n_boxes = 20
-        box_size = max(np.max(x, 0) - np.min(x, 0)) / n_boxes
-
-        x_boxed = self.coordinates_to_box_indices(box_size,
-                                                  master=highres) + .5
-        y_boxed = highres.coordinates_to_box_indices(box_size) + .5
-
-        # get indices of nodes that are very near a box boundary
-        delta = epsilon / box_size
-        on_borders = np.nonzero(np.logical_or( \
-            np.floor(y_boxed + delta) - np.floor(y_boxed) > 0,
-            np.floor(y_boxed) - np.floor(y_boxed - delta) > 0))[0]
-
-        # on_borders may have duplicates - so get rid of those.
-        msk = np.zeros((ny,), dtype=np.int)
-        msk[on_borders] = 1
-        on_borders = np.nonzero(msk)[0]
-
-        # convert to tuples with integers for indexing
-        # (tuples are hashable so can be used as keys in dictionary)
-        x_tuples = map(tuple, np.asarray(x_boxed, dtype=np.int))
-        y_tuples = map(tuple, np.asarray(y_boxed, dtype=np.int))
-
-        # maps box indices in low-resolution surface to indices
-        # of potentially nearby nodes in highres surface
-        x_tuple2near_indices = dict()
-
-        # add border nodes to all low-res surface
-        # this is a bit inefficient
-        # TODO optimize to consider neighboorhood
-        for x_tuple in x_tuples:
-            x_tuple2near_indices[x_tuple] = list(on_borders)
-
-        # for non-border nodes in high-res surface, add them to
-        # a single box
-        for i, y_tuple in enumerate(y_tuples):
-            if i in on_borders:
-                continue  # because it was added above
-
-            if not y_tuple in x_tuple2near_indices:
-                x_tuple2near_indices[y_tuple] = list()
-            x_tuple2near_indices[y_tuple].append(i)
-
-        # it now holds that for every node i in low-res surface (which is
-        # identified by t=x_tuples[i]), there is no node j in the high-res surface
-        # within distance epsilon for which j in x_tuple2near_indices[t]
-
-        for i, x_tuple in enumerate(x_tuples):
+        # find nearest nodes in the high resolution surface for all nodes
+        # at once; nodes with NaN coordinates are not mapped
+        ds, idxs = highres.spatial_index.nearest(x)
+        for i in xrange(nx):
             i_xyz = x[i, :]
             if np.any(np.isnan(i_xyz)):
                 continue
 
-            idxs = np.asarray(x_tuple2near_indices[x_tuple])
-
-            ds = np.sum((x[i, :] - y[idxs, :]) ** 2, axis=1)
-
-            not_nan_idxs = np.nonzero(np.logical_not(np.isnan(ds)))[0]
-            if len(not_nan_idxs) == 0:
+            if idxs[i] < 0:
                 raise ValueError("Empty sequence: is center %d (%r)"
                                  " illegal?" % (i, (x[i],)))
 
-            minpos = not_nan_idxs[np.argmin(ds[not_nan_idxs])]
-
-            mind = ds[minpos] ** .5
-
+            mind = ds[i]
             if epsilon is not None and not (mind < epsilon):
                 raise ValueError("Not found for node %i: %s > %s" %
                                  (i, mind, epsilon))
 
-            mapping[i] = idxs[minpos]
+            mapping[i] = idxs[i]
 
         return mapping
 
@@ -105,6 +105,7 @@ def collect_unit_tests(verbosity=1):
         'test_dochelpers',
         'test_som',
         'test_state',
+        'test_profiling',
         'test_params',
         # Misc supporting utilities
         'test_config',
@@ -18,6 +18,7 @@ skip_if_no_external('lxml')
 
 from mvpa2.base import externals
 from mvpa2.atlases import *
+from mvpa2.atlases.transformation import *
 
 from mvpa2 import pymvpa_dataroot
 
@@ -26,8 +27,51 @@ shipped with FSL
 """
 
 def test_transformations():
-    """TODO"""
-    raise SkipTest, "Please test application of transformations"
+    """Transformations of many coordinates match those one at a time"""
+    coords = np.array([[1, 2, 3], [-4, 5.5, -6], [0, 0, 0]])
+    space = SpaceTransformation(voxelSize=(2, 2, 4), origin=(1, 2, 3))
+    for T in (Linear(np.diag([2, 3, 4, 1]) + np.eye(4)[::-1]),
+              space,
+              SpaceTransformation(voxelSize=(2, 2, 4), origin=(1, 2, 3),
+                                  to_real_space=False),
+              MNI2Tal_MatthewBrett(),
+              Tal2MNI_MatthewBrett(),
+              mni_to_tal_meyer_lindenberg98(),
+              mni_to_tal_lancaster07_fsl(previous=space)):
+        assert_array_almost_equal(T.transform_many(coords),
+                                  [T[c] for c in coords])
+        assert_array_almost_equal(T.transform_many(coords[0]), [T[coords[0]]])
+    assert_equal(Linear().transform_many(np.zeros((0, 3))).shape, (0, 3))
+
+
+class _CoordinatesAtlas(object):
+    """Atlas without data, which labels coordinates with themselves"""
+    def label_points(self, coords, levels=None):
+        return [dict(coord_queried=c) for c in coords]
+
+    def label_voxels(self, c, levels=None):
+        return [dict(voxel_queried=c_) for c_ in c]
+
+
+@sweepargs(query_voxel=(False, True))
+def test_labeled_coordinates_iterator(query_voxel):
+    from mvpa2.cmdline.cmd_atlaslabeler import labeled_coordinates_iterator
+    key = query_voxel and 'voxel_queried' or 'coord_queried'
+    coords = [(i, i, 2 * i, 3 * i, 0.) for i in range(5)]
+    for coordT in (None, Linear(np.diag([2, 2, 2, 1]))):
+        # batches smaller than the input, and values below the threshold
+        # are skipped
+        res = list(labeled_coordinates_iterator(
+            _CoordinatesAtlas(), iter(coords), coordT=coordT,
+            query_voxel=query_voxel, lt=1, batch_size=2))
+        assert_equal([r[0] for r in res], [1, 2, 3, 4])
+        for value, coord_orig, t, voxel in res:
+            assert_array_equal(coord_orig, [value, 2 * value, 3 * value])
+            coord = coord_orig if coordT is None else coordT[coord_orig]
+            # rows are arrays as if queried one at a time
+            ok_(isinstance(voxel[key], np.ndarray))
+            assert_array_equal(voxel[key], coord)
+            assert_equal(str(voxel[key]), str(coord))
 
 @sweepargs(name=KNOWN_ATLASES.keys())
 def test_atlases(name):
@@ -126,6 +170,14 @@ def test_fsl_hox_queries():
         list(r_voxel['voxel_queried']) == [138, 51, 91])
     # TODO: unify list/tuple in above -- r_point has lists
 
+    # batch queries give the same as one at a time
+    points = [(-48, -75, 19), (10, 20, 30), (1000, 0, 0)]
+    assert_equal(atl.label_points(points),
+                 [atl.label_point(p) for p in points])
+    voxels = [(138, 51, 91), (0, 0, 0)]
+    assert_equal(atl.label_voxels(voxels),
+                 [atl.label_voxel(v) for v in voxels])
+
     # Test loading of custom atlas
     # for now just on the original file
     atl2 = Atlas(name='HarvardOxford-Cortical',
@@ -188,3 +240,14 @@ def test_pymvpa_talairach():
 
     assert_equal(pl['labels'][4]['label'].text, 'None')
     assert_equal(pld['labels'][4]['label'].text, 'Caudate Tail')
+
+    # batch queries give the same as one at a time
+    points = [p, [10, 20, 30], [-40, 5, 50]]
+    for a in atl, atld:
+        for r, r_batch in zip([a.label_point(p_) for p_ in points],
+                              a.label_points(points)):
+            assert_equal(r['distance'] if 'distance' in r else None,
+                         r_batch['distance'] if 'distance' in r else None)
+            assert_equal([l['label'] for l in r['labels']],
+                         [l['label'] for l in r_batch['labels']])
+            assert_array_equal(r['voxel_queried'], r_batch['voxel_queried'])
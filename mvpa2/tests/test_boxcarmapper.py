@@ -169,3 +169,42 @@ def test_datasetmapping():
     # feature axis should match
     assert_equal(ds.shape[1:], bflatrev.shape[1:])
 
+
+
+def test_stridedboxcar():
+    data = np.arange(120).reshape(20, 3, 2)
+    ds = Dataset(data, sa={'timepoints': np.arange(20)})
+    for sp, boxlength, offset, is_view in (
+            (range(0, 16, 3), 4, 0, True),
+            ([5], 3, -1, True),
+            ([2, 2, 2], 2, 0, True),
+            ([0, 1, 4], 2, 0, False),   # not evenly spaced
+            ([8, 4, 0], 2, 0, False)):  # descending
+        bm = BoxcarMapper(sp, boxlength, offset=offset)
+        bms = BoxcarMapper(sp, boxlength, offset=offset, strided=True)
+        assert_true('strided=True' in repr(bms))
+        assert_false('strided' in repr(bm))
+        if is_view:
+            bm.train(ds)
+            bms.train(ds)
+            mds, mdss = bm.forward(ds), bms.forward(ds)
+            assert_array_equal(mds.samples, mdss.samples)
+            assert_array_equal(mds.sa.timepoints, mdss.sa.timepoints)
+            assert_array_equal(mdss.sa.timepoints[:, 0],
+                               np.asarray(sp) + offset)
+            # shares memory with the input and could not be modified
+            assert_true(np.may_share_memory(mdss.samples, data))
+            assert_false(mdss.samples.flags.writeable)
+            # while attributes could
+            assert_true(mdss.sa.timepoints.flags.writeable)
+            assert_false(np.may_share_memory(mds.samples, data))
+        else:
+            # just a copy, if possible
+            mapped = bms.forward(data)
+            assert_true(mapped.flags.writeable)
+            assert_array_equal(mapped, bm.forward(data))
+            assert_array_equal(mapped,
+                               [data[s:s + boxlength] for s in sp])
+    # last box beyond the data
+    assert_raises(ValueError,
+                  BoxcarMapper(range(0, 20, 3), 4, strided=True).forward, data)
@@ -1058,6 +1058,28 @@ def test_npz_io(dsfile):
     assert_datasets_equal(ds2, ds2_)
 
 
+@with_tempfile(suffix='.npz')
+def test_npz_mmap(dsfile):
+    ds = Dataset(np.random.normal(size=(6, 40)),
+                 sa=dict(targets=np.arange(6)),
+                 fa=dict(roi=np.arange(40) % 3))
+    ds.to_npz(dsfile)
+    # memory-mapping requires uncompressed storage
+    assert_raises(ValueError, Dataset.from_npz, dsfile, mmap_mode='r')
+    ds.to_npz(dsfile, compress=False)
+    ds2 = Dataset.from_npz(dsfile, mmap_mode='r')
+    assert_true(isinstance(ds2.samples, np.memmap))
+    assert_datasets_equal(ds, ds2)
+    # slicing operates on the memory-map
+    ds2_ = ds2[2:5, 10:20]
+    assert_true(isinstance(ds2_.samples, np.memmap))
+    assert_array_equal(ds2_.samples, ds.samples[2:5, 10:20])
+    assert_array_equal(ds2[[1, 3]].samples, ds.samples[[1, 3]])
+    assert_array_equal(ds2[:, ds2.fa.roi == 1].samples,
+                       ds.samples[:, ds.fa.roi == 1])
+    del ds2, ds2_
+
+
 def test_all_equal():
     # all these values are supposed to be different from each other
     # but equal to themselves
@@ -1187,6 +1209,54 @@ def test_dataset_select_getitem():
                        [False, False, False, False, False])
 
 
+def test_lazy_attributes_slicing():
+    ds = Dataset(np.arange(15).reshape((5, -1)),
+                 sa=dict(targets=range(5)),
+                 fa=dict(roi=['x', 'x', 'z']))
+    ds_ = ds[1:3]
+    # collections are not sliced until accessed
+    assert_true('_lazy_sa' in ds_.__dict__)
+    assert_true('_lazy_fa' in ds_.__dict__)
+    assert_false('sa' in ds_.__dict__)
+    # but it is still a dataset
+    assert_true(is_datasetlike(ds_))
+    assert_true('_lazy_sa' in ds_.__dict__)
+    # reassignment in the source has no effect on the slice
+    ds.sa.targets = range(10, 15)
+    assert_array_equal(ds_.targets, [1, 2])
+    assert_false('_lazy_sa' in ds_.__dict__)
+    assert_true(isinstance(ds_.sa, SampleAttributesCollection))
+    # slicing shares the data
+    assert_true(ds_.fa.roi.base is ds.fa.roi.base or ds_.fa.roi.base is ds.fa.roi)
+    assert_array_equal(ds_.fa.roi, ['x', 'x', 'z'])
+    # explicit assignment wins
+    ds_ = ds[[0, 2]]
+    ds_.sa = SampleAttributesCollection(length=2)
+    assert_equal(len(ds_.sa), 0)
+    # and copies/pickles are complete
+    ds_ = ds[[0, 2], 1:]
+    ds__ = copy.deepcopy(ds_)
+    assert_array_equal(ds__.targets, [10, 12])
+    assert_array_equal(ds__.fa.roi, ['x', 'z'])
+    # in-place changes of the source do not leak into fancy-indexed slices
+    for ds_, col in ((ds[[0, 2]], 'sa'), (ds[ds.targets > 11], 'sa'),
+                     (ds[:, [0, 1]], 'fa')):
+        assert_false('_lazy_' + col in ds_.__dict__)
+        targets, roi = ds_.targets.copy(), ds_.fa.roi.copy()
+        ds.sa.targets[:] = 100
+        ds.fa.roi[:] = 'y'
+        if col == 'sa':
+            assert_array_equal(ds_.targets, targets)
+        else:
+            assert_array_equal(ds_.fa.roi, roi)
+        ds.sa.targets = range(10, 15)
+        ds.fa.roi = ['x', 'x', 'z']
+    # attribute extraction works on not yet materialized collections
+    from mvpa2.base.dataset import DAE
+    assert_array_equal(DAE('sa', 'targets')(ds[1:3]), [11, 12])
+    assert_array_equal(DAE('fa', 'roi')(ds[:, 1:]), ['x', 'z'])
+
+
 def test_attributes_match():
     col = FeatureAttributesCollection({'roi': ['a', 'b', 'c', 'a'],
                                        'coord': [[0, 1], [0, 2], [0, 1], [0, 2]]})
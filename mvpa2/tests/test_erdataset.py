@@ -122,6 +122,25 @@ def test_erdataset():
                                         event_duration=1)
     assert_equal(evds.shape, (len(evs), 1 * ds.nfeatures))
     assert_equal(np.unique(evds.samples[1]), 68)
+    # time restarting with each chunk -- first matching sample is used
+    rds = ds.copy()
+    rds.sa['time'] = np.tile(np.arange(len(ds) / nchunks) * tr, nchunks)
+    evds = extract_boxcar_event_samples(rds, [dict(onset=5.4, duration=2.6)],
+                                        time_attr='time')
+    assert_array_equal(evds.sa.event_onsetidx, [2])
+    assert_array_almost_equal(evds.sa.orig_offset, [0.4])
+    assert_array_equal(evds.sa.time[0, :2], [5.0, 7.5])
+    evds = extract_boxcar_event_samples(rds, [dict(onset=5.4, duration=2.6)],
+                                        time_attr='time', match='next')
+    assert_array_equal(evds.sa.event_onsetidx, [3])
+    # evenly spaced events as a view, compressed by the event mapper
+    evs = [dict(onset=o, duration=4) for o in range(0, 60, 5)]
+    evds = extract_boxcar_event_samples(
+        ds, evs, event_mapper=FxMapper('features', np.mean))
+    evds_strided = extract_boxcar_event_samples(
+        ds, evs, event_mapper=FxMapper('features', np.mean), strided=True)
+    assert_datasets_equal(evds, evds_strided, ignore_a={"mapper"})
+    assert_array_equal(evds_strided.samples[:, 0], np.arange(1.5, 60, 5))
 
 def test_hrf_modeling():
     skip_if_no_external('nibabel')
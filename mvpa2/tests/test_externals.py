@@ -8,12 +8,14 @@
 ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Test externals checking"""
 
+import os
+import sys
 import unittest
 
 from mvpa2 import cfg
 from mvpa2.base import externals
 from mvpa2.support import copy
-from mvpa2.testing import SkipTest
+from mvpa2.testing import SkipTest, with_tempfile
 
 class TestExternals(unittest.TestCase):
 
@@ -85,6 +87,71 @@ class TestExternals(unittest.TestCase):
 
         externals._KNOWN.pop('checker2')
 
+    @with_tempfile()
+    def test_externals_probe_cache(self, tempdir):
+        class Checker(object):
+            """Helper class to increment count of actual checks"""
+            def __init__(self): self.checked = 0
+            def check(self):
+                self.checked += 1
+                externals.versions['checker3'] = '1.2'
+
+        checker = Checker()
+        externals._KNOWN['checker3'] = 'checker.check()'
+        externals._CACHEABLE.add('checker3')
+        externals.__dict__['checker'] = checker
+        probe_cache = externals._probe_cache
+        syspath = sys.path[:]
+
+        def new_process():
+            # forget everything which lives only within the process
+            cfg.remove_option('externals', 'have checker3')
+            externals.versions.pop('checker3', None)
+            externals._probe_cache = None
+
+        try:
+            cfg.add_section('externals')
+            cfg.set('externals', 'cache', tempdir)
+            self.assertTrue(externals.exists('checker3'))
+            self.assertEqual(checker.checked, 1)
+            self.assertTrue(os.path.exists(
+                externals._get_probe_cache_filename()))
+
+            new_process()
+            self.assertTrue(externals.exists('checker3'))
+            self.assertEqual(checker.checked, 1)
+            self.assertEqual(externals.versions['checker3'], '1.2')
+            # forced probing ignores the cache
+            self.assertTrue(externals.exists('checker3', force=True))
+            self.assertEqual(checker.checked, 2)
+
+            # the script directory does not matter
+            new_process()
+            sys.path[0] = os.path.join(tempdir, 'script')
+            self.assertTrue(externals.exists('checker3'))
+            self.assertEqual(checker.checked, 2)
+
+            # any other change to sys.path invalidates the cache
+            new_process()
+            sys.path.append(tempdir)
+            self.assertTrue(externals.exists('checker3'))
+            self.assertEqual(checker.checked, 3)
+
+            # and it is disabled by default
+            new_process()
+            cfg.remove_option('externals', 'cache')
+            self.assertEqual(externals._get_probe_cache_filename(), None)
+            self.assertTrue(externals.exists('checker3'))
+            self.assertEqual(checker.checked, 4)
+        finally:
+            cfg.remove_option('externals', 'cache')
+            sys.path[:] = syspath
+            externals._probe_cache = probe_cache
+            externals.__dict__.pop('checker')
+            externals._CACHEABLE.discard('checker3')
+            externals._KNOWN.pop('checker3')
+            externals.versions.pop('checker3', None)
+
     def test_absent_external_version(self):
         # should not blow, just return None
         if externals.exists('shogun'):
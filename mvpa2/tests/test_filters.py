@@ -15,7 +15,8 @@ skip_if_no_external('scipy')
 import numpy as np
 
 from mvpa2.datasets import Dataset, vstack
-from mvpa2.mappers.filters import FFTResampleMapper, iir_filter
+from mvpa2.mappers.filters import FFTResampleMapper, IIRFilterMapper, \
+     iir_filter, _map_blocks
 
 def test_resample():
     time = np.linspace(0, 2*np.pi, 100)
@@ -76,3 +77,62 @@ def test_iirfilter():
     assert_equal(len(ds.fa), len(mds.fa))
     assert_array_equal(ds.fa.fid, mds.fa.fid)
     assert_array_equal(ds.sa.sid, mds.sa.sid)
+
+
+def test_map_blocks():
+    data = np.arange(60.).reshape(3, 4, 5)
+    calls = []
+    def fx(x):
+        calls.append(x.shape)
+        return x.sum(axis=0)[None] * 2
+    for nproc, block_size, nblocks in ((1, None, 1), (1, 2, 3), (3, 1, 5),
+                                       (2, None, 2)):
+        calls = []
+        mapped = _map_blocks(fx, data, axis=0, nproc=nproc,
+                             block_size=block_size)
+        assert_array_equal(mapped, data.sum(axis=0)[None] * 2)
+        assert_equal(len(calls), nblocks)
+    # blocks along the first axis when operating along the last one
+    calls = []
+    mapped = _map_blocks(lambda x: -x, data, axis=-1, block_size=1)
+    assert_array_equal(mapped, -data)
+    # in place
+    out = _map_blocks(lambda x: -x, data, nproc=2, block_size=2, out=data)
+    assert_true(out is data)
+    assert_array_equal(data, -np.arange(60.).reshape(3, 4, 5))
+
+
+def test_filters_blockwise():
+    from scipy import signal
+    rng = np.random.RandomState(1)
+    ds = Dataset(rng.randn(300, 37), sa={'time': np.arange(300) * 0.1})
+    b, a = signal.butter(4, 0.2)
+    sos = signal.butter(4, 0.2, output='sos')
+    target = signal.filtfilt(b, a, ds.samples, axis=0)
+    for kwargs in ({}, dict(nproc=4), dict(nproc=3, block_size=5)):
+        assert_array_almost_equal(iir_filter(ds, b, a, **kwargs).samples,
+                                  target)
+        mds = iir_filter(ds, sos=sos, **kwargs)
+        assert_array_almost_equal(mds.samples, target)
+        mds = iir_filter(ds, b, a, dtype='float32', **kwargs)
+        assert_equal(mds.samples.dtype, np.float32)
+        assert_array_almost_equal(mds.samples, target, decimal=4)
+        rm = FFTResampleMapper(50, position_attr='time', **kwargs)
+        mds = rm.forward(ds)
+        assert_array_almost_equal(mds.samples, signal.resample(ds.samples,
+                                                               50, axis=0))
+        assert_array_almost_equal(mds.sa.time, np.arange(50) * 0.6)
+        mds = FFTResampleMapper(50, dtype='float32', **kwargs).forward(ds)
+        assert_equal(mds.samples.dtype, np.float32)
+
+    # in place
+    ds32 = ds.copy(deep=True)
+    ds32.samples = ds32.samples.astype(np.float32)
+    mds = iir_filter(ds32, sos=sos, in_place=True, nproc=2)
+    assert_true(mds.samples is ds32.samples)
+    assert_array_almost_equal(ds32.samples, target, decimal=4)
+    ds.samples = ds.samples.astype(int)
+    assert_raises(ValueError, iir_filter, ds, b, a, in_place=True)
+
+    assert_raises(ValueError, IIRFilterMapper, b)
+    assert_raises(ValueError, IIRFilterMapper, b, a, sos=sos)
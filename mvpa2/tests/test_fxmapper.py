@@ -112,6 +112,49 @@ def test_samplesgroup_mapper_test_order_occurrence():
     assert_array_equal(mds.samples[:, 0], [2, 1, 6, 5])
 
 
+def test_grouped_reductions():
+    rng = np.random.RandomState(2)
+    ds = Dataset(rng.randint(-100, 100, size=(60, 4)).astype(np.int32),
+                 sa=dict(targets=rng.randint(3, size=60),
+                         chunks=np.repeat(np.arange(6), 10),
+                         labels=asobjarray([(i % 2,) for i in range(60)])))
+    ds.fa['roi'] = [1, 0, 1, 2]
+    dsf = ds.copy()
+    dsf.samples = dsf.samples.astype(np.float32)
+    dsf.samples[0, 0] = np.nan
+    for fx in (np.mean, np.sum, np.median, np.max, np.min):
+        def wrapped(data, axis):
+            # same function, but without the vectorized grouped reduction
+            return fx(data, axis)
+        for d in (ds, dsf):
+            for axis, uattrs in (('samples', ['targets', 'chunks']),
+                                 ('samples', ['labels']),
+                                 ('features', ['roi'])):
+                for order in ('uattrs', 'occurrence'):
+                    mds = FxMapper(axis, fx, uattrs=uattrs,
+                                   order=order)(d)
+                    rds = FxMapper(axis, wrapped, uattrs=uattrs,
+                                   order=order)(d)
+                    assert_equal(mds.samples.dtype, rds.samples.dtype)
+                    assert_array_almost_equal(mds.samples, rds.samples,
+                                              decimal=4)
+                    for col in ('sa', 'fa'):
+                        mcol, rcol = getattr(mds, col), getattr(rds, col)
+                        assert_equal(sorted(mcol.keys()), sorted(rcol.keys()))
+                        for k in mcol.keys():
+                            assert_objectarray_equal(mcol[k].value,
+                                                     rcol[k].value)
+    # groups are ordered
+    mds = mean_group_sample(['targets', 'chunks'])(ds)
+    assert_equal(len(mds), len(set(zip(ds.targets, ds.chunks))))
+    assert_equal(zip(mds.chunks, mds.targets),
+                 sorted(zip(mds.chunks, mds.targets)))
+    mds = mean_group_sample(['targets', 'chunks'], order='occurrence')(ds)
+    first = [np.flatnonzero((ds.targets == t) & (ds.chunks == c))[0]
+             for t, c in zip(mds.targets, mds.chunks)]
+    assert_equal(first, sorted(first))
+
+
 def test_featuregroup_mapper():
     ds = Dataset(np.arange(24).reshape(3, 8))
     ds.fa['roi'] = [0, 1] * 4
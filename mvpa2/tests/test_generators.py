@@ -101,6 +101,40 @@ def test_partitionmapper():
         assert_equal(len(p), len(ds))
 
 
+def test_partitions_plan():
+    ds = give_data()
+    ds.sa['letters'] = np.array(['abcdefghij'[c] for c in ds.sa.chunks])
+    nfp = NFoldPartitioner(cvtype=2, attr='letters')
+    plan = nfp.get_partitions(ds)
+    assert_equal(len(plan), 45)
+    # same layout -- same plan
+    ds2 = ds.copy()
+    ds2.samples[:] = 0
+    ok_(nfp.get_partitions(ds2) is plan)
+    for pds, pattr in zip(nfp.generate(ds), plan):
+        assert_array_equal(pds.sa.partitions, pattr)
+        # generated attributes can be modified without affecting the plan
+        ok_(pds.sa.partitions is not pattr)
+    # but different layout or configuration is not
+    ds2.sa.letters = ds2.sa.letters[::-1]
+    ok_(nfp.get_partitions(ds2) is not plan)
+    nfp.count = 5
+    assert_equal(len(nfp.get_partitions(ds)), 5)
+    # random selections are never cached
+    nfp.selection_strategy = 'random'
+    ok_(nfp.get_partitions(ds) is not nfp.get_partitions(ds))
+
+    # indices of samples in partitions
+    oep = OddEvenPartitioner()
+    indices = oep.get_partition_indices(ds)
+    assert_equal(len(indices), 2)
+    for (train, test), pds in zip(indices, oep.generate(ds)):
+        assert_array_equal(train, np.where(pds.sa.partitions == 1)[0])
+        assert_array_equal(test, np.where(pds.sa.partitions == 2)[0])
+        assert_equal(len(train) + len(test), len(ds))
+    assert_array_equal(indices[0][1], np.where(ds.sa.chunks % 2 == 1)[0])
+
+
 @reseed_rng()
 def test_attrpermute():
 
@@ -219,6 +253,60 @@ def test_attrpermute():
         # at the end we have the same mapping
         assert_equal(set(zip(otargets, oodds)), set(zip(ptargets, podds)))
 
+
+def test_attrpermute_batched():
+    ds = give_data()
+    ds.sa['ids'] = range(len(ds))
+    nperms = 50
+    permutation = AttributePermutator('ids', count=nperms, limit='chunks',
+                                      assure=True, rng=3)
+    perms = permutation.get_permutations(ds)
+    assert_equal(perms.shape, (nperms, len(ds)))
+    # reproducible with a seed
+    assert_array_equal(perms, permutation.get_permutations(ds))
+    for perm in perms:
+        # each is a permutation within chunks, changing something
+        assert_array_equal(np.sort(perm), np.arange(len(ds)))
+        assert_array_equal(ds.chunks[perm], ds.chunks)
+        assert_false(np.all(perm == np.arange(len(ds))))
+    assert_equal(len(set(map(tuple, perms))), nperms)
+
+    # only a selection gets permuted
+    perms = AttributePermutator('ids', limit={'chunks': [3, 4]}).\
+        get_permutations(ds, count=5)
+    assert_equal(len(perms), 5)
+    outside = (ds.chunks != 3) & (ds.chunks != 4)
+    assert_array_equal(perms[:, outside],
+                       np.tile(np.flatnonzero(outside), (5, 1)))
+    assert_true(np.all(np.in1d(perms[:, ~outside], np.flatnonzero(~outside))))
+
+    # implausible assure
+    assert_raises(RuntimeError,
+                  AttributePermutator('targets', limit='ids',
+                                      assure=True).get_permutations, ds)
+    assert_raises(ValueError,
+                  AttributePermutator('targets', limit='chunks',
+                                      strategy='uattrs').get_permutations, ds)
+
+    # generate datasets out of the batch
+    permutation = AttributePermutator(['targets', 'ids'], count=nperms,
+                                      rng=1, batched=True)
+    perms = permutation.get_permutations(ds)
+    pds = list(permutation.generate(ds))
+    assert_equal(len(pds), nperms)
+    for p, perm in zip(pds, perms):
+        assert_true(p.samples.base is ds.samples)
+        assert_array_equal(p.sa.ids, perm)
+        assert_array_equal(p.targets, ds.targets[perm])
+    # original is intact
+    assert_array_equal(ds.sa.ids, np.arange(len(ds)))
+
+    # feature attributes
+    ds.fa['ids'] = range(ds.nfeatures)
+    perms = AttributePermutator('fa.ids', assure=True).get_permutations(ds)
+    assert_equal(perms.shape, (1, ds.nfeatures))
+    assert_array_equal(np.sort(perms[0]), np.arange(ds.nfeatures))
+
 @reseed_rng()
 def test_balancer():
     ds = give_data()
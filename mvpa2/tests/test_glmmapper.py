@@ -6,7 +6,7 @@
 #   copyright and license terms.
 #
 ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
-"""Unit tests for the NiPy GLM mapper (requiring NiPy)."""
+"""Unit tests for the GLM mappers."""
 
 import numpy as np
 
@@ -54,14 +54,12 @@ def test_glm_mapper():
     assert_equal(bold.nfeatures, 2)
     assert('model' in bold.sa)
     reg_names = ['model']
-    implementations = []
+    implementations = [OLSGLMMapper]
     if externals.exists('nipy'):
         implementations.append(NiPyGLMMapper)
     if externals.exists('statsmodels'):
         implementations.append(StatsmodelsGLMMapper)
     results = []
-    if not len(implementations):
-        raise SkipTest
     for klass in implementations:
         pest = klass(reg_names)(bold)
         assert_equal(pest.shape, (len(reg_names), bold.nfeatures))
@@ -102,3 +100,31 @@ def test_glm_mapper():
     # should really have very similar results, independent of actual model fit details
     assert(np.corrcoef(ds1.samples.ravel(), ds2.samples.ravel())[0,1] > 0.99)
 
+
+
+def test_ols_glm_mapper():
+    bold = get_bold()
+    trend = ('trend', np.linspace(-1, 1, len(bold)))
+    glm = OLSGLMMapper(['model'], add_regs=(trend,), add_constant=True)
+    pest = glm(bold)
+    X = np.c_[bold.sa.model, trend[1], np.ones(len(bold))]
+    assert_array_almost_equal(pest.samples,
+                              np.linalg.lstsq(X, bold.samples)[0])
+    tvals = OLSGLMMapper(['model'], add_regs=(trend,), add_constant=True,
+                         results='tvalues')(bold)
+    assert_array_equal(tvals.sa.regressor_names, ['model', 'trend', 'constant'])
+    assert_true(tvals.samples[0, 0] > tvals.samples[0, 1])
+    # contrasts
+    tcon = OLSGLMMapper(['model'], add_constant=True,
+                        results=np.array([1, 0]))(bold)
+    assert_equal(tcon.sa.descr[0], 'tvalue')
+    assert_equal(len(tcon), 6)
+    fcon = OLSGLMMapper(['model'], add_constant=True,
+                        results=np.array([[1, 0]]))(bold)
+    assert_array_equal(fcon.sa.descr, ['fvalue', 'pvalue', 'df_num', 'df_denom'])
+    assert_array_almost_equal(tcon.samples[0] ** 2, fcon.samples[0])
+    # with AR(1) prewhitening
+    ar1 = OLSGLMMapper(['model'], add_constant=True, ar1=True,
+                       return_model=True)(bold)
+    assert_equal(ar1.shape, (2, bold.nfeatures))
+    assert_equal(len(ar1.a.model.rho), bold.nfeatures)
@@ -123,6 +123,26 @@ def test_gnb_sensitivities(logprob):
         assert t1t2sens[i2] > t1t2sens[4]
 
 
+def test_gnb_stats():
+    ds = datasets['uni3small'].copy()
+    # a feature without variance
+    ds.samples[:, 0] = 1
+    gnb = GNB(enable_ca=['estimates'])
+    gnb.train(ds)
+    for il, l in enumerate(ds.UT):
+        samples = ds[ds.targets == l].samples
+        assert_array_almost_equal(gnb.means[il], samples.mean(axis=0))
+        assert_array_almost_equal(gnb.variances[il], samples.var(axis=0))
+    assert_array_equal(gnb.variances[:, 0], 0)
+    # no variance and no distance -- log(1) for that feature, so it has
+    # no effect
+    predictions = gnb.predict(ds)
+    estimates = gnb.ca.estimates
+    gnb.train(ds[:, 1:])
+    assert_array_equal(gnb.predict(ds[:, 1:]), predictions)
+    assert_array_almost_equal(gnb.ca.estimates, estimates)
+
+
 @reseed_rng()
 def test_gnb_overflow():
     # https://github.com/PyMVPA/PyMVPA/issues/581
@@ -531,3 +531,109 @@ def test_regress_fmri_dataset(tempfile=None, testfile=None):
             "with: %s" % (externals.versions['nibabel'],
                           testfile,
                           ds.a.versions['nibabel']))
+
+
+@sweepargs(compression=(None, 'gzip'))
+@with_tempfile(suffix='.hdf5')
+def test_h5load_partial(fname, compression):
+    ds = datasets['3dsmall'].copy()
+    h5save(fname, ds, compression=compression)
+    # plain load still works
+    assert_datasets_equal(h5load(fname), ds)
+
+    sel = ds[2:7, [1, 3, 4]]
+    ds_ = h5load(fname, samples=slice(2, 7), features=[1, 3, 4])
+    assert_equal(type(ds_.samples), np.ndarray)
+    assert_array_equal(ds_.samples, sel.samples)
+    assert_array_equal(ds_.targets, sel.targets)
+    assert_array_equal(ds_.fa.myspace, sel.fa.myspace)
+    # mapper is adjusted as for any other slicing
+    assert_array_equal(ds_.a.mapper.reverse(ds_.samples),
+                       sel.a.mapper.reverse(sel.samples))
+
+    # samples only, unordered and repeated selections
+    ids = [5, 0, 5, 3]
+    ds_ = h5load(fname, samples=ids)
+    assert_array_equal(ds_.samples, ds.samples[ids])
+    assert_array_equal(ds_.chunks, ds.chunks[ids])
+    mask = ds.targets == ds.targets[0]
+    ds_ = h5load(fname, samples=mask, features=[4, 0])
+    assert_array_equal(ds_.samples, ds[mask, [4, 0]].samples)
+
+    # selection is only possible for datasets
+    h5save(fname, {'a': 1})
+    assert_raises(ValueError, h5load, fname, samples=[1])
+
+
+@sweepargs(compression=(None, 'gzip'))
+@with_tempfile(suffix='.hdf5')
+def test_h5load_lazy(fname, compression):
+    from mvpa2.base.hdf5 import LazyHDF5Array
+    ds = datasets['3dsmall'].copy()
+    h5save(fname, ds, compression=compression)
+    ds_ = h5load(fname, lazy=True)
+    if compression is None:
+        # contiguous storage gets memory-mapped
+        assert_true(isinstance(ds_.samples, np.memmap))
+    else:
+        assert_true(isinstance(ds_.samples, LazyHDF5Array))
+    assert_equal(ds_.shape, ds.shape)
+    assert_array_equal(ds_.targets, ds.targets)
+    # slicing does not read anything, but gives the right content
+    sl = ds_[[1, 4, 2], 3:7]
+    assert_equal(sl.shape, (3, 4))
+    assert_array_equal(np.asarray(sl.samples), ds.samples[[1, 4, 2], 3:7])
+    assert_array_equal(np.asarray(ds_.samples), ds.samples)
+    if compression is not None:
+        assert_array_equal(ds_.samples[2], ds.samples[2])
+        assert_array_equal(ds_.samples[1:3, 2], ds.samples[1:3, 2])
+    # deep copies are detached
+    dc = ds_.copy()
+    assert_false(isinstance(dc.samples, LazyHDF5Array))
+    assert_array_equal(dc.samples, ds.samples)
+    if compression is not None:
+        # file is still in use
+        assert_raises(IOError, h5py.File, fname, 'r+')
+        ds_.samples.close()
+    else:
+        # memory-mapped samples do not need the file to be open
+        assert_array_equal(ds_.samples, ds.samples)
+    h5py.File(fname, 'r+').close()
+    del ds_, sl
+
+
+@with_tempfile(suffix='.hdf5')
+def test_h5load_lazy_learning(fname):
+    from mvpa2.base.hdf5 import LazyHDF5Array
+    from mvpa2.clfs.knn import kNN
+    from mvpa2.generators.partition import NFoldPartitioner
+    from mvpa2.measures.base import CrossValidation
+    ds = datasets['uni2small'].copy()
+    h5save(fname, ds, compression='gzip')
+    ds_ = h5load(fname, lazy=True)
+    assert_true(isinstance(ds_.samples, LazyHDF5Array))
+    # behaves like an array
+    assert_array_almost_equal(ds_.samples.mean(axis=0), ds.samples.mean(axis=0))
+    assert_array_equal(ds_.samples * 2, ds.samples * 2)
+    assert_array_equal(ds.samples - ds_.samples, 0)
+    # and is usable by learners
+    clf, clf_ = kNN(k=3), kNN(k=3)
+    clf.train(ds[::2])
+    clf_.train(ds_[::2])
+    assert_array_equal(clf_.predict(ds_[1::2]), clf.predict(ds[1::2]))
+    cv = CrossValidation(kNN(k=3), NFoldPartitioner())
+    assert_array_equal(cv(ds_).samples, cv(ds).samples)
+    del ds_
+
+
+@with_tempfile(suffix='.hdf5')
+def test_h5load_lazy_nested(fname):
+    ds = datasets['3dsmall'].copy()
+    h5save(fname, [ds, {'ds': ds[:3]}, 'some'])
+    loaded = h5load(fname, lazy=True)
+    assert_true(isinstance(loaded[0].samples, np.memmap))
+    assert_true(isinstance(loaded[1]['ds'].samples, np.memmap))
+    assert_datasets_equal(loaded[0], ds)
+    assert_datasets_equal(loaded[1]['ds'], ds[:3])
+    assert_equal(loaded[2], 'some')
+    del loaded
@@ -0,0 +1,85 @@
+# emacs: -*- mode: python; py-indent-offset: 4; indent-tabs-mode: nil -*-
+# vi: set ft=python sts=4 ts=4 sw=4 et:
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the PyMVPA package for the
+#   copyright and license terms.
+#
+### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Unit tests for PyMVPA profiling of nodes"""
+
+import json
+
+from mvpa2.testing import *
+from mvpa2.testing.datasets import datasets
+from mvpa2.base import profiling
+from mvpa2.base.profiling import NodeProfiler
+from mvpa2.clfs.knn import kNN
+from mvpa2.clfs.meta import MappedClassifier
+from mvpa2.generators.partition import NFoldPartitioner
+from mvpa2.mappers.zscore import ZScoreMapper
+from mvpa2.measures.base import CrossValidation
+
+
+def test_node_profiler():
+    ds = datasets['uni2small']
+    nchunks = len(ds.sa['chunks'].unique)
+    cv = CrossValidation(
+        MappedClassifier(kNN(), ZScoreMapper(chunks_attr=None)),
+        NFoldPartitioner())
+    with NodeProfiler() as prof:
+        assert_true(profiling.get_active_profiler() is prof)
+        # only a single one could be active
+        assert_raises(RuntimeError, NodeProfiler().start)
+        cv(ds)
+    assert_true(profiling.get_active_profiler() is None)
+
+    stats = dict((s['path'], s) for s in prof.stats)
+    top = ('CrossValidation._call',)
+    clf_train = top + ('TransferMeasure._call', 'MappedClassifier._train',
+                       'kNN._train')
+    clf_predict = top + ('TransferMeasure._call', 'MappedClassifier._call',
+                         'MappedClassifier._predict', 'kNN._predict')
+    assert_equal(stats[top]['calls'], 1)
+    # aggregated along the chain of nested calls
+    for path in (clf_train, clf_predict, clf_train[:3], clf_predict[:4]):
+        assert_equal(stats[path]['calls'], nchunks)
+    for s in stats.itervalues():
+        assert_true(s['wall'] >= s['self_wall'] >= 0)
+        assert_true(s['cpu'] >= 0)
+        assert_true(s['maxrss'] >= 0)
+    # no time is lost or counted twice
+    assert_true(stats[top]['wall']
+                >= sum(s['wall'] for p, s in stats.iteritems()
+                       if len(p) == 2))
+
+    table = prof.as_table()
+    assert_true('MappedClassifier._train' in table)
+    assert_equal(len(table.strip().split('\n')), len(stats) + 1)
+
+    trace = prof.to_chrome_trace()
+    events = trace['traceEvents']
+    assert_equal(len(events), sum(s['calls'] for s in stats.itervalues()))
+    assert_equal(set(e['name'] for e in events),
+                 set(p[-1] for p in stats))
+    # nested calls are within their callers
+    outer = [e for e in events if e['name'] == 'CrossValidation._call'][0]
+    for e in events:
+        assert_true(outer['ts'] <= e['ts'])
+        assert_true(e['ts'] + e['dur'] <= outer['ts'] + outer['dur'] + 1)
+    # serializable
+    assert_equal(json.loads(json.dumps(trace)), trace)
+
+    # nothing gets recorded while inactive
+    cv(ds)
+    assert_equal(len(prof.to_chrome_trace()['traceEvents']), len(events))
+    prof.reset()
+    assert_equal(prof.stats, [])
+
+
+def test_node_profiler_no_events():
+    prof = NodeProfiler(events=False)
+    with prof:
+        kNN().train(datasets['uni2small'])
+    assert_equal([s['path'] for s in prof.stats], [('kNN._train',)])
+    assert_raises(RuntimeError, prof.to_chrome_trace)
@@ -8,7 +8,7 @@
 ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Unit tests for PyMVPA searchlight algorithm"""
 
-import tempfile, time
+import tempfile, time, shutil
 import numpy.random as rnd
 
 from math import ceil
@@ -50,6 +50,10 @@ class SearchlightTests(unittest.TestCase):
         # the searchlight
         self.dataset.fa['voxel_indices'] = self.dataset.fa.myspace
         self._tested_pprocess = False
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
 
 
     # https://github.com/PyMVPA/PyMVPA/issues/67
@@ -624,7 +628,7 @@ class SearchlightTests(unittest.TestCase):
         ds = datasets['3dsmall'].copy(deep=True)
         ds.fa['voxel_indices'] = ds.fa.myspace
 
-        our_custom_prefix = tempfile.mktemp()
+        our_custom_prefix = os.path.join(self.tmpdir, 'tmpsl')
         for backend in ['native'] + \
                 (externals.exists('h5py') and ['hdf5'] or []):
             sl = sphere_searchlight(sw_measure(),
@@ -655,6 +659,75 @@ class SearchlightTests(unittest.TestCase):
         assert_equal(len(tempfiles), 0)
 
 
+    @reseed_rng()
+    def test_searchlight_sequential_null_dist(self):
+        from mvpa2.clfs.stats import MCNullDist
+        from mvpa2.measures.anova import OneWayAnova
+        ds = datasets['3dsmall'].copy()
+        ds.fa['voxel_indices'] = ds.fa.myspace
+        nroi_calls = []
+        def measure(roi):
+            nroi_calls.append(1)
+            return np.mean(OneWayAnova()(roi).samples)
+        null = MCNullDist(AttributePermutator('targets', count=20),
+                          tail='right', sequential_stop=2,
+                          enable_ca=['npermutations'])
+        sl = sphere_searchlight(measure, radius=1, null_dist=null)
+        res = sl(ds)
+        assert_equal(res.shape, (1, ds.nfeatures))
+        nperms = null.ca.npermutations
+        assert_equal(nperms.shape, res.shape)
+        # ROIs were only computed for as long as they were undecided
+        # (plus the original data, once)
+        assert_equal(len(nroi_calls), nperms.sum() + ds.nfeatures)
+        assert_equal(sl.ca.null_prob.shape, res.shape)
+        assert_true(sl.roi_ids is None)
+
+    @sweepargs(preallocate_output=(True, False))
+    def test_hdf5_backend_results(self, preallocate_output):
+        skip_if_no_external('h5py')
+        ds = datasets['3dsmall'].copy(deep=True)
+        ds.fa['voxel_indices'] = ds.fa.myspace
+        prefix = os.path.join(self.tmpdir, 'tmpsl')
+        results = [sphere_searchlight(lambda x: np.mean(x.samples, axis=0)[:2],
+                                      radius=1, tmp_prefix=prefix,
+                                      results_backend=backend,
+                                      preallocate_output=preallocate_output)(ds)
+                   for backend in ('native', 'hdf5')]
+        assert_datasets_equal(*results)
+        # results are in memory, and temporary files are gone
+        assert_equal(type(results[1].samples), np.ndarray)
+        assert_equal(len(glob.glob(prefix + '*')), 0)
+
+    @sweepargs(nproc=(1, 2))
+    def test_hdf5_results_file(self, nproc):
+        skip_if_no_external('h5py')
+        if nproc > 1:
+            skip_if_no_external('pprocess')
+        from mvpa2.base.hdf5 import LazyHDF5Array
+        ds = datasets['3dsmall'].copy(deep=True)
+        ds.fa['voxel_indices'] = ds.fa.myspace
+        measure = lambda x: np.mean(x.samples, axis=0)[:2]
+        sl = sphere_searchlight(measure, radius=1, enable_ca=['roi_sizes'])
+        res_native = sl(ds)
+        roi_sizes = sl.ca.roi_sizes
+        results_file = os.path.join(self.tmpdir, 'sl.hdf5')
+        sl = sphere_searchlight(measure, radius=1, nproc=nproc,
+                                results_backend='hdf5',
+                                preallocate_output=True,
+                                results_file=results_file,
+                                enable_ca=['roi_sizes'])
+        res = sl(ds)
+        # samples stay on disk, in a virtual dataset combining all blocks
+        assert_true(isinstance(res.samples, LazyHDF5Array))
+        assert_equal(res.shape, res_native.shape)
+        assert_array_equal(res.samples, res_native.samples)
+        assert_array_equal(res.fa.center_ids, res_native.fa.center_ids)
+        assert_equal(sl.ca.roi_sizes, roi_sizes)
+        assert_equal(len(glob.glob(os.path.join(self.tmpdir, 'sl-*.hdf5'))),
+                     nproc)
+        res.samples.close()
+
     @sweepargs(preallocate_output=(False, True))
     def test_nblocks(self, preallocate_output):
         skip_if_no_external('pprocess')
@@ -687,7 +760,7 @@ class SearchlightTests(unittest.TestCase):
         # only limited nproc.
         skip_if_no_external('pprocess')
 
-        tfile = tempfile.mktemp('mvpa', 'test-sl')
+        tfile = os.path.join(self.tmpdir, 'test-sl')
 
         ds = datasets['3dsmall'].copy()[:, :25] # smaller copy
         ds.fa['voxel_indices'] = ds.fa.myspace
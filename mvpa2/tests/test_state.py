@@ -219,6 +219,37 @@ class StateTests(unittest.TestCase):
         self.assertEqual(proper.ca.enabled, ["state2"])
 
 
+    def test_enabled_set(self):
+        proper = TestClassProper()
+        other = TestClassProper()
+
+        if __debug__ and 'ENFORCE_CA_ENABLED' in debug.active:
+            # skip testing since all ca are on now
+            return
+
+        self.assertEqual(proper.ca.enabled_set, frozenset(["state2"]))
+        # follows changes done in any way
+        proper.ca.enable("state1")
+        self.assertEqual(proper.ca.enabled_set,
+                         frozenset(["state1", "state2"]))
+        proper.ca['state2'].enabled = False
+        self.assertEqual(proper.ca.enabled_set, frozenset(["state1"]))
+        proper.ca.change_temporarily(enable_ca=["state2"])
+        self.assertEqual(proper.ca.enabled_set,
+                         frozenset(["state1", "state2"]))
+        proper.ca.reset_changed_temporarily()
+        self.assertEqual(proper.ca.enabled_set, frozenset(["state1"]))
+        proper.ca['state3'] = ConditionalAttribute(enabled=True)
+        self.assertEqual(proper.ca.enabled_set,
+                         frozenset(["state1", "state3"]))
+        proper.ca.pop('state3')
+        self.assertEqual(proper.ca.enabled_set, frozenset(["state1"]))
+        # without affecting other instances
+        self.assertEqual(other.ca.enabled_set, frozenset(["state2"]))
+        self.assertEqual(copy.deepcopy(proper).ca.enabled_set,
+                         frozenset(["state1"]))
+
+
     def test_proper_state_child(self):
         """
         Simple test if child gets conditional attributes from the parent as well
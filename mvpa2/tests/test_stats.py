@@ -79,6 +79,64 @@ class StatsTests(unittest.TestCase):
             self.assertRaises(ValueError, null.p, [5, 3, 4])
 
 
+    @reseed_rng()
+    def test_null_dist_sequential(self):
+        ds = datasets['uni2small']
+        null = MCNullDist(AttributePermutator('targets', count=100),
+                          tail='right', sequential_stop=5,
+                          enable_ca=['npermutations', 'dist_samples'])
+        null.fit(OneWayAnova(), ds)
+        nperms = null.ca.npermutations
+        assert_equal(nperms.shape, (1, ds.nfeatures))
+        assert_true(np.all(nperms <= 100))
+        assert_equal(null.ca.dist_samples.shape[:2], (1, ds.nfeatures))
+        orig = OneWayAnova()(ds).samples
+        prob = null.p(orig)
+        if cfg.getboolean('tests', 'labile', default='yes'):
+            # non-bogus features need all permutations, while bogus ones
+            # get decided early on
+            nonbogus = ds.a.nonbogus_features
+            bogus = ds.a.bogus_features
+            assert_array_equal(nperms[0, nonbogus], 100)
+            assert_true(np.median(nperms[0, bogus]) < 50)
+            assert_true(np.all(prob[0, nonbogus] < 0.05))
+        # p-values of stopped elements follow Besag & Clifford (clipped as
+        # any Nonparametric estimate)
+        stopped = nperms[0] < 100
+        n = nperms[0, stopped]
+        assert_array_almost_equal(prob[0, stopped],
+                                  np.clip(5. / n, 1. / (n + 2),
+                                          (n + 1.) / (n + 2)))
+
+        # as null_dist of a featurewise measure, it is computed only on
+        # the features still undecided, and its result on the original data
+        # is reused
+        nfeatures = []
+        class CountingAnova(OneWayAnova):
+            def _call(self, ds):
+                nfeatures.append(ds.nfeatures)
+                return super(CountingAnova, self)._call(ds)
+        null = MCNullDist(AttributePermutator('targets', count=100),
+                          tail='right', sequential_stop=5,
+                          enable_ca=['npermutations'])
+        anova = CountingAnova(null_dist=null, enable_ca=['calling_time'])
+        assert_array_equal(anova(ds), orig)
+        nperms = null.ca.npermutations
+        assert_equal(nfeatures[0], ds.nfeatures)
+        assert_equal(len(nfeatures), nperms.max() + 1)
+        assert_equal(sum(nfeatures[1:]), nperms.sum())
+        assert_array_equal(anova.ca.null_prob.samples, null.p(orig))
+        assert_true(anova.ca.is_set('calling_time'))
+
+        # only Nonparametric is supported
+        if externals.exists('scipy'):
+            assert_raises(ValueError, MCNullDist,
+                          AttributePermutator('targets', count=10),
+                          scipy.stats.norm, sequential_stop=5)
+        assert_raises(ValueError, MCNullDist,
+                      AttributePermutator('targets', count=10),
+                      sequential_stop=0)
+
     def test_anova(self):
         """Do some extended testing of OneWayAnova
 
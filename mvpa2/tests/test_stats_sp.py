@@ -372,6 +372,67 @@ class StatsTestsScipy(unittest.TestCase):
         assert_equals(len(ftest), 4)
         assert_true(ftest.samples[0, 0] > ftest.samples[0, 1])
 
+        # all features at once do the same as a model per feature
+        import statsmodels.api as sm
+        from mvpa2.measures.statsmodels_adaptor import UnivariateStatsModels
+        for res in ('params', 'bse', 'pvalues', np.array([1, -1]),
+                    np.array([[1, 0], [0, 1]])):
+            assert_array_almost_equal(
+                UnivariateStatsModels(X, res=res)(data).samples,
+                UnivariateStatsModels(X, model_gen=sm.OLS, res=res)(data).samples)
+
+
+    @reseed_rng()
+    def test_ols_fit(self):
+        from scipy import stats
+        from mvpa2.misc.ols import ols_fit
+        X = np.c_[np.random.randn(40, 2), np.ones(40)]
+        Y = np.dot(X, np.random.randn(3, 5)) + np.random.randn(40, 5)
+        res = ols_fit(X, Y)
+        for i in xrange(Y.shape[1]):
+            params, ssr = np.linalg.lstsq(X, Y[:, i])[:2]
+            assert_array_almost_equal(res.params[:, i], params)
+            assert_almost_equal(res.ssr[i], ssr[0])
+        assert_equal(res.df_resid, 37)
+        assert_array_almost_equal(
+            res.bse[:, 0],
+            np.sqrt(np.diag(np.linalg.inv(np.dot(X.T, X))) * res.scale[0]))
+        # a single row F-test is a squared t-test
+        ttest = res.t_test([1, -1, 0])
+        ftest = res.f_test([[1, -1, 0]])
+        assert_array_almost_equal(ttest['tvalue'] ** 2, ftest['fvalue'])
+        assert_array_almost_equal(ttest['pvalue'], ftest['pvalue'])
+        assert_array_almost_equal(res.t_test([1, 0, 0])['tvalue'],
+                                  res.tvalues[0])
+        # z-values have the same tail probabilities as t-values
+        assert_array_equal(np.sign(ttest['zvalue']), np.sign(ttest['tvalue']))
+        assert_array_almost_equal(
+            np.log(stats.norm.sf(np.abs(ttest['zvalue']))),
+            np.log(stats.t.sf(np.abs(ttest['tvalue']), res.df_resid)))
+        assert_raises(ValueError, ols_fit, X[:-1], Y)
+
+        # weighted fit is a fit of scaled data
+        w = np.random.uniform(0.5, 2, len(X))
+        wres = ols_fit(X, Y, weights=w)
+        assert_array_almost_equal(
+            wres.params, ols_fit(X * np.sqrt(w)[:, None],
+                                 Y * np.sqrt(w)[:, None]).params)
+
+        # AR(1) errors
+        noise = np.random.randn(200, 6)
+        for i in xrange(1, len(noise)):
+            noise[i] += 0.6 * noise[i - 1]
+        X = np.c_[np.sin(np.arange(200) / 10.), np.ones(200)]
+        ares = ols_fit(X, noise + X[:, :1], ar1=True, ar1_bins=10)
+        assert_true(np.all(np.abs(ares.rho - 0.6) < 0.25))
+        assert_equal(len(ares.normalized_cov_params),
+                     len(np.unique(ares.rho)))
+        # features with the same coefficient are fitted together
+        ids = ares.groups == ares.groups[0]
+        single = ols_fit(X, noise[:, ids] + X[:, :1], ar1=True, ar1_bins=10)
+        assert_array_almost_equal(single.params, ares.params[:, ids])
+        assert_array_almost_equal(single.bse, ares.bse[:, ids])
+
 
     def test_binomdist_ppf(self):
         """Test if binomial distribution works ok
@@ -9,12 +9,33 @@
 """Unit test for PyMVPA mvpa2.suite() of being loading ok"""
 
 import inspect
+import os
 import re
+import subprocess
 import sys
 import unittest
 
+import mvpa2
+from mvpa2.testing import SkipTest
 from mvpa2.base.dochelpers import get_docstring_split
 
+
+def _get_imported(code):
+    """Run code in a fresh interpreter and return the modules it imported"""
+    sentinel = 'IMPORTED:'
+    out, err = subprocess.Popen(
+        [sys.executable, '-c',
+         '%s\nimport sys; print(%r + " ".join(sys.modules))'
+         % (code, sentinel)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=dict(os.environ,
+                 PYTHONPATH=os.pathsep.join(sys.path))).communicate()
+    for line in out.splitlines():
+        if line.startswith(sentinel):
+            return line[len(sentinel):].split()
+    raise AssertionError("Failed to run %r:\n%s" % (code, err))
+
+
 class SuiteTest(unittest.TestCase):
 
     def test_suite_load(self):
@@ -96,6 +117,45 @@ class SuiteTest(unittest.TestCase):
             self.fail('\n'.join(sfailures))
 
 
+    def test_startup_imports(self):
+        # guard against regressions in startup time: expensive modules
+        # must not be imported until they are needed
+        imported = _get_imported('import mvpa2')
+        for m in ('mvpa2.tests', 'mvpa2.clfs', 'mvpa2.datasets',
+                  'matplotlib', 'pylab'):
+            self.assertFalse(m in imported, msg="import mvpa2 imports %s" % m)
+
+        imported = _get_imported('import mvpa2.suite')
+        for m in ('mvpa2.tests', 'pylab', 'nibabel', 'shogun',
+                  'mvpa2.clfs.warehouse', 'mvpa2.misc.surfing'):
+            self.assertFalse(m in imported,
+                             msg="import mvpa2.suite imports %s" % m)
+
+        # only the requested command gets imported by the command line tool
+        pymvpa2 = os.path.join(os.path.dirname(mvpa2.__file__),
+                               os.pardir, 'bin', 'pymvpa2')
+        if not os.path.exists(pymvpa2):
+            raise SkipTest("Cannot find pymvpa2 command line tool")
+        imported = _get_imported(
+            'import sys; sys.argv = ["pymvpa2", "info"]\n'
+            'try: execfile(%r)\nexcept SystemExit: pass' % pymvpa2)
+        cmds = [m for m in imported if m.startswith('mvpa2.cmdline.cmd_')]
+        self.assertEqual(cmds, ['mvpa2.cmdline.cmd_info'])
+
+    def test_deferred_imports(self):
+        # deferred modules of mvpa2.suite get imported when their names are
+        # first used, and only then
+        for name, modules in (('clfswh', ['mvpa2.clfs.warehouse']),
+                              ('surfing', ['mvpa2.misc.surfing'])):
+            imported = _get_imported('import mvpa2.suite; mvpa2.suite.%s'
+                                     % name)
+            for m in modules:
+                self.assertTrue(m in imported,
+                                msg="mvpa2.suite.%s did not import %s"
+                                    % (name, m))
+            self.assertFalse('mvpa2.tests' in imported)
+
+
 def suite():  # pragma: no cover
     return unittest.makeSuite(SuiteTest)
 
@@ -304,6 +304,13 @@ def test_limit_filter():
 def test_mask2slice():
     slc = np.repeat(False, 5)
     assert_equal(mask2slice(slc), slice(None, 0, None))
+    slc[1:4] = True
+    assert_equal(mask2slice(slc), slice(1, 4, 1))
+    # index sequences
+    assert_equal(mask2slice([1, 3, 5]), slice(1, 6, 2))
+    assert_equal(mask2slice(np.array([2])), slice(2, 3, None))
+    for ids in ([1, 2, 4], [3, 2, 1], [1, 1], [-1, 0]):
+        assert_array_equal(mask2slice(ids), ids)
 
 
 def test_xrandom_iterprod():
@@ -148,6 +148,23 @@ class SurfTests(unittest.TestCase):
         for k, v in some_ds.iteritems():
             assert_true(abs(v - ds2[k]) < eps)
 
+        # edge lengths are symmetric and consistent with neighbors
+        e2l = s.edge_length_matrix
+        assert_equal(e2l.shape, (s.nvertices, s.nvertices))
+        assert_equal(abs(e2l - e2l.T).max(), 0)
+        for i, j, k in n_check:
+            assert_true(abs(e2l[i, j] - k) < .0001)
+
+        # batched distances should match single-node ones
+        srcs = [2, 40, 100]
+        for src, n2d in zip(srcs, s.dijkstra_distances(srcs, 2.,
+                                                        batch_size=2)):
+            assert_equal(n2d, s.dijkstra_distance(src, 2.))
+            assert_true(max(n2d.values()) <= 2.)
+            for k, v in some_ds.iteritems():
+                if src == 2 and v <= 2.:
+                    assert_true(abs(v - n2d[k]) < eps)
+
         # test I/O (through ascii files)
         surf.write(temp_fn, s, overwrite=True)
         s2 = surf.read(temp_fn)
@@ -205,6 +222,46 @@ class SurfTests(unittest.TestCase):
 
 
 
+    def test_surf_spatial_index(self):
+        s = surf.generate_sphere(10)
+        v = s.vertices
+
+        xyz = np.random.normal(size=(20, 3))
+        ds = volgeom.distance(xyz, v)
+        assert_array_equal(s.nearest_node_index(xyz), np.argmin(ds, 1))
+
+        # only consider a subset of nodes
+        node_mask = np.arange(0, s.nvertices, 3)
+        assert_array_equal(s.nearest_node_index(xyz, node_mask),
+                           node_mask[np.argmin(ds[:, node_mask], 1)])
+
+        # euclidean neighborhoods
+        for center in (0, 40, (.5, .5, .5)):
+            center_xyz = v[center] if type(center) is int else center
+            d = volgeom.distance(np.reshape(center_xyz, (1, 3)), v).ravel()
+            for radius in (0., .3, 1., 3.):
+                n2d = s.circlearound_n2d(center, radius)
+                assert_equal(sorted(n2d), list(np.nonzero(d <= radius)[0]))
+                for node, dist in n2d.iteritems():
+                    assert_almost_equal(dist, d[node])
+
+        # nodes with undefined coordinates are never nearest
+        v_nan = v.copy()
+        v_nan[0] = np.nan
+        s_nan = surf.Surface(v_nan, s.faces)
+        assert_true(0 not in s_nan.nearest_node_index(v))
+        assert_true(0 not in s_nan.circlearound_n2d(1, 10.))
+
+        # fast mapping should agree with exact mapping (up to ties)
+        h = surf.generate_sphere(20)
+        fast = s.map_to_high_resolution_surf(h, .2)
+        slow = s.map_to_high_resolution_surf_slow(h, .2)
+        assert_equal(set(fast), set(slow))
+        for node in fast:
+            d_fast, d_slow = volgeom.distance(v[[node]],
+                                    h.vertices[[fast[node], slow[node]]])[0]
+            assert_almost_equal(d_fast, d_slow)
+
     def test_surf_normalized(self):
 
         def assert_is_unit_norm(v):
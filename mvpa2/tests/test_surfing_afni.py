@@ -326,6 +326,63 @@ class SurfTests(unittest.TestCase):
                                 assert_array_almost_equal(v, v2, eps_dec)
 
 
+    @with_tempfile('.niml.dset', 'dset')
+    def test_afni_niml_dset_streaming(self, fn):
+        sz = (301, 7)
+        rng = self._get_rng()
+        labels = ['lab_%d' % i for i in xrange(sz[1])]
+        stats = ['Ttest(%d)' % i for i in xrange(sz[1])]
+        cols = [5, 0, 2]
+
+        # use tiny blocks so that data is converted in many parts
+        block_sizes = afni_niml._DATA_BLOCK_SIZE, afni_niml._READ_CHUNK_SIZE
+        afni_niml._DATA_BLOCK_SIZE, afni_niml._READ_CHUNK_SIZE = 100, 7
+
+        try:
+            for fmt in ['text', 'binary', 'base64']:
+                for tp in [np.int32, np.float32]:
+                    # values that survive a round trip through text
+                    data = np.asarray(np.round(rng.normal(size=sz) * 100) / 4,
+                                      tp)
+                    dset = dict(data=data, labels=labels, stats=stats)
+
+                    # writing to a file gives the same as to a string
+                    afni_niml_dset.write(fn, dset, fmt)
+                    r = afni_niml_dset.dset2rawniml(dset)
+                    with open(fn, 'rb') as f:
+                        s = f.read()
+                    assert_equal(len(s),
+                                 len(afni_niml.rawniml2string(r, fmt)))
+
+                    dset2 = afni_niml_dset.read(fn)
+                    assert_array_equal(dset2['data'], data)
+                    assert_equal(dset2['labels'], labels)
+
+                    # only read some columns
+                    dset3 = afni_niml_dset.read(fn, columns=cols)
+                    assert_array_equal(dset3['data'], data[:, cols])
+                    assert_equal(dset3['labels'], [labels[c] for c in cols])
+                    assert_equal(dset3['stats'], [stats[c] for c in cols])
+
+                    ds = niml.read(fn, columns=cols)
+                    assert_array_equal(ds.samples, data[:, cols].T)
+                    assert_equal(list(ds.sa.labels), dset3['labels'])
+
+                    # parsing a string gives the same, also with padding
+                    d = afni_niml.string2rawniml(s + b'\0\0\n')
+                    assert_array_equal(d[0]['nodes'][0]['data'], data)
+        finally:
+            afni_niml._DATA_BLOCK_SIZE, afni_niml._READ_CHUNK_SIZE = \
+                block_sizes
+
+        # truncated binary data is detected
+        afni_niml_dset.write(fn, dict(data=data), 'binary')
+        with open(fn, 'rb') as f:
+            s = f.read()
+        i = s.index(b'</SPARSE_DATA>')
+        assert_raises(ValueError, afni_niml.string2rawniml, s[:i - 10])
+
+
     @with_tempfile('.niml.dset', 'dset')
     def test_niml(self, fn):
         d = dict(data=np.random.normal(size=(10, 2)),
@@ -31,7 +31,7 @@ from mvpa2.support.nibabel import surf
 from mvpa2.misc.surfing import surf_voxel_selection, volgeom, \
     volsurf
 from mvpa2.misc.surfing.volume_mask_dict import VolumeMaskDictionary, \
-    _dict_with_arrays2array_tuple
+    CSRVolumeMaskDictionary, _dict_with_arrays2array_tuple
 from mvpa2.misc.surfing import volume_mask_dict
 from mvpa2.misc.surfing.volgeom import VolGeom
 
@@ -849,6 +849,126 @@ class SurfVoxelSelectionTests(unittest.TestCase):
         d._src2aux['foo'][1] = np.asarray('bar')
         assert_raises(TypeError, _dict_with_arrays2array_tuple, d._src2aux)
 
+    def test_voxel_selection_vectorized(self):
+        vg = VolGeom((10, 10, 10), np.identity(4) * 5)
+        outer = surf.generate_sphere(10) * 25. + 15
+        inner = surf.generate_sphere(10) * 20. + 15
+
+        for radius in (50, 10.):
+            sel = surf_voxel_selection.run_voxel_selection(radius, vg,
+                                                    inner, outer, nproc=1)
+            sel_csr = surf_voxel_selection.run_voxel_selection(radius, vg,
+                                    inner, outer, nproc=1, storage='csr')
+            assert_true(isinstance(sel_csr, CSRVolumeMaskDictionary))
+            assert_equal(sel, sel_csr)
+
+        # vectorized and generic versions give the same voxels
+        vs = volsurf.VolSurfMaximalMapping(vg, outer, inner)
+        n2v = vs.get_node2voxels_mapping()
+        intermediate = outer * .5 + inner * .5
+        selector = surf_voxel_selection.VoxelSelector(50, intermediate, n2v)
+        for src in (0, 10, 50):
+            n2d = intermediate.circlearound_n2d(src, 10., 'dijkstra')
+            fast = selector.nodes2voxel_attributes(n2d, n2v)
+            slow = selector.nodes2voxel_attributes(n2d, n2v,
+                                        distancesummary=lambda x: min(x))
+            for fs in (fast, slow):
+                order = np.argsort(fs['linear_voxel_indices'])
+                for k in fs:
+                    fs[k] = fs[k][order]
+            for k in slow:
+                assert_array_equal(fast[k], slow[k])
+
+        assert_raises(ValueError, surf_voxel_selection.run_voxel_selection,
+                      10., vg, inner, outer, nproc=1, storage='foo')
+
+    @reseed_rng()
+    @with_tempfile('.npz')
+    def test_csr_volume_mask_dictionary(self, fn):
+        vg = VolGeom((5, 6, 7), np.identity(4))
+        # meta data like that of voxel selection
+        d = VolumeMaskDictionary(vg, None, meta=dict(foo=1, volgeom=vg,
+                                                     radius=np.float64(2.)))
+        for i in xrange(20):
+            n = np.random.randint(20)
+            nbrs = np.random.permutation(vg.nvoxels)[:n]
+            d.add(i, nbrs, dict(center_distances=np.random.uniform(size=n),
+                                grey_matter_position=[i]))
+
+        c = CSRVolumeMaskDictionary.from_mask_dictionary(d)
+        assert_equal(d, c)
+        assert_equal(c, d)
+        assert_equal(d.get_targets(), c.get_targets())
+        for target in xrange(vg.nvoxels):
+            assert_equal(d.target2sources(target), c.target2sources(target))
+        assert_array_equal(d.get_mask(), c.get_mask())
+        assert_array_equal(d.get_mask([1, 3]), c.get_mask([1, 3]))
+        assert_equal(sorted(d.get_voxel_indices([1, 3])),
+                     sorted(c.get_voxel_indices([1, 3])))
+
+        # merging keeps the same masks, but not the same keys twice
+        odd = CSRVolumeMaskDictionary(vg, None, meta=dict(foo=1))
+        even = CSRVolumeMaskDictionary(vg, None, meta=dict(foo=1))
+        for k in d.keys():
+            aux = dict((label, d.get_aux(k, label))
+                       for label in d.aux_keys())
+            (odd if k % 2 else even).add(k, d[k], aux)
+        odd.merge(even)
+        assert_equal(odd, c)
+        assert_raises(ValueError, odd.merge, even)
+        assert_raises(ValueError, c.add, 3, [1])
+
+        # masks can still be added after the inverse mapping is computed
+        c.add(20, [1, 2], dict(center_distances=[0., 1.],
+                               grey_matter_position=[20]))
+        assert_true(20 in c.target2sources(1))
+        assert_equal(c.get_aux(20, 'grey_matter_position'), [20])
+
+        for compress, mmap_mode in ((False, None), (False, 'r'),
+                                    (True, None)):
+            c.to_npz(fn, compress=compress)
+            loaded = CSRVolumeMaskDictionary.from_npz(fn, mmap_mode=mmap_mode)
+            assert_equal(loaded, c)
+            assert_equal(loaded.meta, c.meta)
+            assert_equal(isinstance(loaded._indices, np.memmap),
+                         mmap_mode is not None)
+
+        # compressed files cannot be memory mapped
+        assert_raises(ValueError, CSRVolumeMaskDictionary.from_npz, fn, 'r')
+        # nothing is pickled
+        entries = np.load(fn, allow_pickle=False)
+        ok_(not any(entries[name].dtype.hasobject for name in entries.files))
+        entries.close()
+
+        # a surface as source is stored through its vertices and faces
+        s = surf.generate_plane((0, 0, 0), (0, 0, 1), (0, 1, 0), 2, 2)
+        cs = CSRVolumeMaskDictionary(vg, s, keys=[0],
+                                     indptr=np.asarray([0, 1]),
+                                     indices=np.asarray([3]))
+        cs.to_npz(fn)
+        loaded = CSRVolumeMaskDictionary.from_npz(fn)
+        assert_array_equal(loaded.source.vertices, s.vertices)
+        assert_array_equal(loaded.source.faces, s.faces)
+        assert_equal(loaded, cs)
+
+        if externals.exists('h5py'):
+            fn_h5 = fn[:-4] + '.h5'
+            h5save(fn_h5, c)
+            loaded = h5load(fn_h5)
+            os.remove(fn_h5)
+            assert_true(isinstance(loaded, CSRVolumeMaskDictionary))
+            assert_equal(loaded, c)
+
+            for mmap_mode in (None, 'r'):
+                c.to_hdf5(fn_h5)
+                loaded = CSRVolumeMaskDictionary.from_hdf5(fn_h5,
+                                                           mmap_mode=mmap_mode)
+                assert_equal(loaded, c)
+                assert_equal(loaded.meta, c.meta)
+                assert_equal(isinstance(loaded._indices, np.memmap),
+                             mmap_mode is not None)
+            os.remove(fn_h5)
+
 
 
 def _cartprod(d):
@@ -12,8 +12,11 @@
 import unittest
 import numpy as np
 
-from mvpa2.mappers.svd import SVDMapper
+from mvpa2.mappers.svd import SVDMapper, TruncatedSVDMapper
 from mvpa2.testing import reseed_rng
+from mvpa2.testing.tools import assert_array_almost_equal, assert_equal, \
+     assert_raises, assert_true
+from mvpa2.datasets import Dataset
 from mvpa2.support.copy import deepcopy
 
 
@@ -100,6 +103,85 @@ class SVDMapperTests(unittest.TestCase):
 
 
 
+    def test_truncated_svd(self):
+        rng = np.random.RandomState(4)
+        # low-rank data with some noise
+        data = np.dot(rng.normal(size=(300, 5)) * [20, 15, 10, 6, 3],
+                      rng.normal(size=(5, 60))) \
+               + 0.01 * rng.normal(size=(300, 60)) + 3
+        full = SVDMapper()
+        full.train(data)
+        ref = np.abs(full.proj[:, :4].A)
+
+        for kwargs in (dict(), dict(block_size=70, n_iter=2),
+                       dict(method='incremental'),
+                       dict(method='incremental', block_size=101),
+                       dict(demean=False, block_size=50),
+                       dict(method='incremental', demean=False)):
+            pm = TruncatedSVDMapper(4, rng=1, **kwargs)
+            pm.train(data)
+            assert_equal(pm.proj.shape, (60, 4))
+            if kwargs.get('demean', True):
+                # incremental updates are approximate
+                assert_array_almost_equal(pm.sv / full.sv[:4], 1, decimal=4)
+                # same components up to their sign
+                assert_array_almost_equal(np.abs(pm.proj.A), ref, decimal=3)
+                assert_equal(pm.nsamples_seen, len(data))
+            # components are orthonormal
+            assert_array_almost_equal(np.dot(pm.proj.T, pm.proj),
+                                      np.eye(4))
+            # projection as by any ProjectionMapper
+            p = pm.forward(data)
+            assert_equal(p.shape, (300, 4))
+            if kwargs.get('demean', True):
+                # the smallest component is missing
+                assert_true(np.abs(pm.reverse(p) - data).std()
+                            < 0.5 * data.std())
+
+        # explicit incremental training from blocks, also as datasets
+        pm = TruncatedSVDMapper(4)
+        for i in range(0, len(data), 60):
+            pm.partial_train(Dataset(data[i:i + 60]))
+        assert_true(pm.is_trained)
+        assert_equal(pm.nsamples_seen, len(data))
+        assert_array_almost_equal(pm._offset_in, data.mean(axis=0))
+        assert_array_almost_equal(pm.sv / full.sv[:4], 1, decimal=4)
+        # retraining starts over
+        pm.train(data[:50])
+        assert_equal(pm.nsamples_seen, 50)
+        pm.untrain()
+        assert_true(pm.proj is None)
+        assert_equal(pm.nsamples_seen, 0)
+
+        assert_raises(ValueError, TruncatedSVDMapper, 4, method='some')
+
+
+    def test_truncated_svd_memmap(self):
+        import tempfile, os
+        rng = np.random.RandomState(2)
+        data = rng.normal(size=(200, 30)).astype(np.float32)
+        fd, fname = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            mm = np.memmap(fname, dtype=np.float32, mode='w+',
+                           shape=data.shape)
+            mm[:] = data
+            mm.flush()
+            mm = np.memmap(fname, dtype=np.float32, mode='r',
+                           shape=data.shape)
+            for method in ('randomized', 'incremental'):
+                pm = TruncatedSVDMapper(30, method=method, block_size=40,
+                                        n_iter=1)
+                pm.train(Dataset(mm))
+                # all components -- the exact decomposition
+                full = SVDMapper()
+                full.train(data.astype(float))
+                assert_array_almost_equal(pm.sv, full.sv, decimal=3)
+            del mm
+        finally:
+            os.unlink(fname)
+
+
 def suite():  # pragma: no cover
     return unittest.makeSuite(SVDMapperTests)
 
@@ -188,6 +188,80 @@ class SVMTests(unittest.TestCase):
         self.assertTrue(np.isfinite(clf._get_default_c(a)))
 
 
+    @reseed_rng()
+    def test_libsvm_batched_predictions(self):
+        skip_if_no_external('libsvm')
+        from mvpa2.clfs.libsvmc import _svm
+        from mvpa2.clfs.libsvmc.svmc import C_SVC, EPSILON_SVR
+        x = np.random.randn(40, 5)
+        for svm_type, y in ((C_SVC, np.arange(40) % 2),
+                            (C_SVC, np.arange(40) % 3),
+                            (EPSILON_SVR, np.random.randn(40))):
+            # dense data gets converted at once, as a list per sample
+            for data in (x, list(x)):
+                prob = _svm.SVMProblem(y.tolist(), data)
+                param = _svm.SVMParameter(svm_type=svm_type, probability=1)
+                model = _svm.SVMModel(prob, param)
+                assert_equal(prob.maxlen, x.shape[1])
+                predictions, values, prob_predictions, probabilities = \
+                    model.predict_all(x, values=True,
+                                      probability=svm_type == C_SVC)
+                assert_array_equal(predictions,
+                                   [model.predict(p) for p in x])
+                assert_array_almost_equal(
+                    values, [model.predict_values_raw(p) for p in x])
+                if svm_type == C_SVC:
+                    probs = [model.predict_probability(p) for p in x]
+                    assert_array_equal(prob_predictions,
+                                       [p[0] for p in probs])
+                    assert_array_almost_equal(
+                        probabilities,
+                        [[p[1][l] for l in model.labels] for p in probs])
+                else:
+                    assert_equal(prob_predictions, None)
+                    assert_raises(TypeError, model.predict_all, x,
+                                  probability=True)
+                assert_equal(model.predict_all(x[:0])[0].shape, (0,))
+
+    @reseed_rng()
+    def test_libsvm_precomputed_kernel(self):
+        skip_if_no_external('libsvm')
+        from mvpa2.kernels.base import CachedKernel
+        from mvpa2.kernels.np import LinearKernel, RbfKernel
+        from mvpa2.kernels.libsvm import RbfLSKernel
+        ds = datasets['uni3small'].copy()
+        # numpy kernels get precomputed for libsvm, which should not
+        # change anything
+        for k_np, k_ls in ((LinearKernel(), libsvm.LinearLSKernel()),
+                           (RbfKernel(sigma=4.0), RbfLSKernel(gamma=0.25))):
+            clf_np = libsvm.SVM(kernel=k_np, C=1, enable_ca=['estimates'])
+            clf_ls = libsvm.SVM(kernel=k_ls, C=1, enable_ca=['estimates'])
+            # no sensitivities for precomputed kernels
+            ok_(not 'has_sensitivity' in clf_np.__tags__)
+            ok_('non-linear' in clf_np.__tags__)
+            assert_raises(NotImplementedError,
+                          clf_np.get_sensitivity_analyzer)
+            clf_np.train(ds[::2])
+            clf_ls.train(ds[::2])
+            assert_array_equal(clf_np.predict(ds[1::2]),
+                               clf_ls.predict(ds[1::2]))
+            for e_np, e_ls in zip(clf_np.ca.estimates, clf_ls.ca.estimates):
+                for pair in e_ls:
+                    assert_almost_equal(e_np[pair], e_ls[pair])
+
+        # cached kernel gets computed once and reused across folds and Cs
+        ck = CachedKernel(LinearKernel())
+        ck.compute(ds)
+        ok_(ck._recomputed)
+        for C in (1, 10):
+            clf = libsvm.SVM(kernel=ck, C=C)
+            errs = CrossValidation(clf, NFoldPartitioner())(ds)
+            ok_(not ck._recomputed)
+            errs_ls = CrossValidation(
+                libsvm.SVM(kernel=libsvm.LinearLSKernel(), C=C),
+                NFoldPartitioner())(ds)
+            assert_array_equal(errs.samples, errs_ls.samples)
+
     def test_memleak(self):
         skip_if_no_external('libsvm')
         if __debug__: